@@ -9,13 +9,14 @@ import platform
 import re
 import typing
 
-import f90nml
 import multiparser.parsing.file as mp_file_parser
 import multiparser.parsing.tail as mp_tail_parser
 import pydantic
 import simvue
 
 from simvue_integrations.connectors.generic import WrappedRun
+from simvue_integrations.connectors.sweep import CaseResult, Sweep
+from simvue_integrations.extras.fds_input import expand_fds_template, read_fds_input
 
 
 class FDSRun(WrappedRun):
@@ -39,68 +40,57 @@ class FDSRun(WrappedRun):
     _activation_times: bool = False
     _activation_times_data: typing.Dict[str, float] = {}
     _chid: str = None
+    _input_metadata: typing.Dict[str, typing.Any] = {}
     _results_prefix: str = None
-    _patterns: typing.List[typing.Dict[str, typing.Pattern]] = [
-        {"pattern": re.compile(r"\s+Time\sStep\s+(\d+).*"), "name": "step"},
-        {
-            "pattern": re.compile(r"\s+Step\sSize:.*Total\sTime:\s+([\d\.]+)\ss.*"),
-            "name": "time",
-        },
-        {
-            "pattern": re.compile(r"\s+Pressure\sIterations:\s(\d+)$"),
-            "name": "pressure_iteration",
-        },
-        {
-            "pattern": re.compile(
-                r"\s+Maximum\sVelocity\sError:\s+([\d\.\-\+E]+)\son\sMesh\s\d+\sat\s\(\d+,\d+,\d+\)$"
-            ),
-            "name": "max_velocity_error",
-        },
-        {
-            "pattern": re.compile(
-                r"\s+Maximum\sPressure\sError:\s+([\d\.\-\+E]+)\son\sMesh\s\d+\sat\s\(\d+,\d+,\d+\)$"
-            ),
-            "name": "max_pressure_error",
-        },
-        {
-            "pattern": re.compile(
-                r"\s+Max\sCFL\snumber:\s+([\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$"
-            ),
-            "name": "max_cfl",
-        },
-        {
-            "pattern": re.compile(
-                r"\s+Max\sdivergence:\s+([\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$"
-            ),
-            "name": "max_divergence",
-        },
-        {
-            "pattern": re.compile(
-                r"\s+Min\sdivergence:\s+([\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$"
-            ),
-            "name": "min_divergence",
-        },
-        {
-            "pattern": re.compile(
-                r"\s+Max\sVN\snumber:\s+([\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$"
-            ),
-            "name": "max_vn",
-        },
-        {
-            "pattern": re.compile(r"\s+No.\sof\sLagrangian\sParticles:\s+(\d+)$"),
-            "name": "num_lagrangian_particles",
-        },
-        {
-            "pattern": re.compile(r"\s+Total\sHeat\sRelease\sRate:\s+([\d\.\-]+)\skW$"),
-            "name": "total_heat_release_rate",
-        },
-        {
-            "pattern": re.compile(
-                r"\s+Radiation\sLoss\sto\sBoundaries:\s+([\d\.\-]+)\skW$"
-            ),
-            "name": "radiation_loss_to_boundaries",
-        },
-    ]
+    # Single alternation of every log line of interest, where each alternative captures its value in a group
+    # named after the metric, so that one search per line both identifies the metric and extracts its value
+    _patterns: typing.Pattern = re.compile(
+        "|".join(
+            (
+                r"\s+Time\sStep\s+(?P<step>\d+).*",
+                r"\s+Step\sSize:.*Total\sTime:\s+(?P<time>[\d\.]+)\ss.*",
+                r"\s+Pressure\sIterations:\s(?P<pressure_iteration>\d+)$",
+                r"\s+Maximum\sVelocity\sError:\s+(?P<max_velocity_error>[\d\.\-\+E]+)\son\sMesh\s\d+\sat\s\(\d+,\d+,\d+\)$",
+                r"\s+Maximum\sPressure\sError:\s+(?P<max_pressure_error>[\d\.\-\+E]+)\son\sMesh\s\d+\sat\s\(\d+,\d+,\d+\)$",
+                r"\s+Max\sCFL\snumber:\s+(?P<max_cfl>[\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$",
+                r"\s+Max\sdivergence:\s+(?P<max_divergence>[\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$",
+                r"\s+Min\sdivergence:\s+(?P<min_divergence>[\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$",
+                r"\s+Max\sVN\snumber:\s+(?P<max_vn>[\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$",
+                r"\s+No.\sof\sLagrangian\sParticles:\s+(?P<num_lagrangian_particles>\d+)$",
+                r"\s+Total\sHeat\sRelease\sRate:\s+(?P<total_heat_release_rate>[\d\.\-]+)\skW$",
+                r"\s+Radiation\sLoss\sto\sBoundaries:\s+(?P<radiation_loss_to_boundaries>[\d\.\-]+)\skW$",
+            )
+        )
+    )
+    _activation_time_pattern: typing.Pattern = re.compile(
+        r"\s+\d+\s+([\w]+)\s+\w+\s+([\d\.]+)\s*"
+    )
+    # Fields in the header of the FDS stderr output file, compiled once and shared by every run
+    _header_patterns: typing.Tuple[typing.Tuple[str, typing.Pattern], ...] = (
+        ("fds.revision", re.compile(r"^\s*Revision\s+\:\s*([\w\d\.\-\_][^\n]+)")),
+        (
+            "fds.revision_date",
+            re.compile(r"^\s*Revision Date\s+\:\s*([\w\s\:\d\-][^\n]+)"),
+        ),
+        (
+            "fds.compiler",
+            re.compile(r"^\s*Compiler\s+\:\s*([\w\d\-\_\(\)\s\.\[\]\,][^\n]+)"),
+        ),
+        (
+            "fds.compilation_date",
+            re.compile(r"^\s*Compilation Date\s+\:\s*([\w\d\-\:\,\s][^\n]+)"),
+        ),
+        ("fds.mpi_processes", re.compile(r"^\s*Number of MPI Processes:\s*(\d+)")),
+        ("fds.mpi_version", re.compile(r"^\s*MPI version:\s*([\d\.]+)")),
+        (
+            "fds.mpi_library_version",
+            re.compile(r"^\s*MPI library version:\s*([\w\d\.\s\*\(\)\[\]\-\_][^\n]+)"),
+        ),
+    )
+    # Marks the first time step (or the end of time stepping), after which there are no more header fields
+    _header_end_pattern: typing.Pattern = re.compile(r"^\s*Time\sStep")
+    # Maximum number of characters to read while searching for header fields
+    _header_max_size: int = 1024 * 1024
 
     def _soft_abort(self):
         """Create a '.stop' file so that FDS simulation is stopped gracefully if an abort is triggered."""
@@ -132,20 +122,20 @@ class FDSRun(WrappedRun):
         _out_record = {}
 
         for line in file_content.split("\n"):
-            for pattern in self._patterns:
-                match = pattern["pattern"].search(line)
-                if match:
-                    if pattern["name"] == "step":
-                        if _out_record:
-                            _out_data += [_out_record]
-                        _out_record = {}
-
-                    _out_record[pattern["name"]] = match.group(1)
-
-                    if pattern["name"] == "time":
-                        self.log_event(
-                            f"Time Step: {_out_record['step']}, Simulation Time: {_out_record['time']} s"
-                        )
+            if match := self._patterns.search(line):
+                name = match.lastgroup
+                if name == "step":
+                    if _out_record:
+                        _out_data += [_out_record]
+                    _out_record = {}
+
+                _out_record[name] = match.group(name)
+
+                if name == "time":
+                    self.log_event(
+                        f"Time Step: {_out_record['step']}, Simulation Time: {_out_record['time']} s",
+                        source="time_step",
+                    )
 
             if "DEVICE Activation Times" in line:
                 self._activation_times = True
@@ -153,7 +143,7 @@ class FDSRun(WrappedRun):
             elif self._activation_times and "Time Stepping" in line:
                 self._activation_times = False
             elif self._activation_times:
-                match = re.match(r"\s+\d+\s+([\w]+)\s+\w+\s+([\d\.]+)\s*", line)
+                match = self._activation_time_pattern.match(line)
                 if match:
                     self._activation_times_data[f"{match.group(1)}_activation_time"] = (
                         float(match.group(2))
@@ -200,33 +190,26 @@ class FDSRun(WrappedRun):
             An (empty) dictionary of metadata, and a dictionary of data to upload as metadata to the Simvue run
 
         """
-        with open(input_file) as in_f:
-            _file_lines = in_f.readlines()
-
-        _components_regex: dict[str, typing.Pattern[typing.AnyStr]] = {
-            "fds.revision": re.compile(r"^\s*Revision\s+\:\s*([\w\d\.\-\_][^\n]+)"),
-            "fds.revision_date": re.compile(
-                r"^\s*Revision Date\s+\:\s*([\w\s\:\d\-][^\n]+)"
-            ),
-            "fds.compiler": re.compile(
-                r"^\s*Compiler\s+\:\s*([\w\d\-\_\(\)\s\.\[\]\,][^\n]+)"
-            ),
-            "fds.compilation_date": re.compile(
-                r"^\s*Compilation Date\s+\:\s*([\w\d\-\:\,\s][^\n]+)"
-            ),
-            "fds.mpi_processes": re.compile(r"^\s*Number of MPI Processes:\s*(\d+)"),
-            "fds.mpi_version": re.compile(r"^\s*MPI version:\s*([\d\.]+)"),
-            "fds.mpi_library_version": re.compile(
-                r"^\s*MPI library version:\s*([\w\d\.\s\*\(\)\[\]\-\_][^\n]+)"
-            ),
-        }
-
         _output_metadata: dict[str, str] = {}
+        _chars_read: int = 0
 
-        for line in _file_lines:
-            for key, regex in _components_regex.items():
-                if search_res := regex.findall(line):
-                    _output_metadata[key] = search_res[0]
+        # The header is complete before the first time step, so only read lines up to that point
+        with open(input_file, errors="replace") as in_f:
+            for line in in_f:
+                _chars_read += len(line)
+                if (
+                    self._header_end_pattern.match(line)
+                    or _chars_read > self._header_max_size
+                ):
+                    break
+                for key, regex in self._header_patterns:
+                    if key not in _output_metadata and (
+                        search_res := regex.match(line)
+                    ):
+                        _output_metadata[key] = search_res.group(1)
+                        break
+                if len(_output_metadata) == len(self._header_patterns):
+                    break
 
         return {}, _output_metadata
 
@@ -252,7 +235,7 @@ class FDSRun(WrappedRun):
                 f", when it reached a value of {data['Value']}{data.get('Units', '')}."
             )
 
-        self.log_event(event_str)
+        self.log_event(event_str, source="ctrl_log")
         self.update_metadata({data["ID"]: state})
 
     def _pre_simulation(self):
@@ -277,15 +260,8 @@ class FDSRun(WrappedRun):
 
     def _during_simulation(self):
         """Describe which files should be monitored during the simulation by Multiparser."""
-        # Upload data from input file as metadata
-        self.file_monitor.track(
-            path_glob_exprs=str(self.fds_input_file_path),
-            callback=lambda data, meta: self.update_metadata(
-                {k: v for k, v in data.items() if v}
-            ),
-            file_type="fortran",
-            static=True,
-        )
+        # Upload data from input file as metadata, which was read when the simulation was launched
+        self.update_metadata(self._input_metadata)
         # Upload metadata from file header
         self.file_monitor.track(
             path_glob_exprs=f"{self._results_prefix}.out",
@@ -321,13 +297,7 @@ class FDSRun(WrappedRun):
         self.update_metadata(self._activation_times_data)
 
         if self.upload_files is None:
-            for file in glob.glob(f"{self._results_prefix}*"):
-                if (
-                    pathlib.Path(file).absolute()
-                    == pathlib.Path(self.fds_input_file_path).absolute()
-                ):
-                    continue
-                self.save_file(file, "output")
+            _files = glob.glob(f"{self._results_prefix}*")
         else:
             if self.workdir_path:
                 self.upload_files = [
@@ -335,14 +305,17 @@ class FDSRun(WrappedRun):
                     for path in self.upload_files
                 ]
 
-            for path in self.upload_files:
-                for file in glob.glob(path):
-                    if (
-                        pathlib.Path(file).absolute()
-                        == pathlib.Path(self.fds_input_file_path).absolute()
-                    ):
-                        continue
-                    self.save_file(file, "output")
+            _files = [file for path in self.upload_files for file in glob.glob(path)]
+
+        self._save_files(
+            [
+                file
+                for file in _files
+                if pathlib.Path(file).absolute()
+                != pathlib.Path(self.fds_input_file_path).absolute()
+            ],
+            "output",
+        )
 
         super()._post_simulation()
 
@@ -356,6 +329,17 @@ class FDSRun(WrappedRun):
         upload_files: list[str] = None,
         ulimit: typing.Union[str, int] = "unlimited",
         fds_env_vars: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        metrics_buffer_size: int = 100,
+        metrics_flush_interval: float = 1.0,
+        metrics_flush_on_step: bool = False,
+        metric_downsampling: typing.Optional[
+            typing.Dict[str, typing.Dict[str, typing.Any]]
+        ] = None,
+        max_events_per_second: typing.Optional[float] = None,
+        event_rate_limits: typing.Optional[typing.Dict[str, float]] = None,
+        upload_workers: int = 4,
+        upload_retries: int = 3,
+        file_cache_path: typing.Optional[pathlib.Path] = None,
     ):
         """Command to launch the FDS simulation and track it with Simvue.
 
@@ -379,6 +363,29 @@ class FDSRun(WrappedRun):
             Value to set your stack size to (for Linux and MacOS), by default "unlimited"
         fds_env_vars : typing.Optional[typing.Dict[str, typing.Any]], optional
             Environment variables to provide to FDS when executed, by default None
+        metrics_buffer_size : int, optional
+            Number of metric records to collect before sending them to Simvue together, by default 100
+            Set to 1 to send each record as soon as it is logged.
+        metrics_flush_interval : float, optional
+            Maximum time in seconds to hold metric records before sending them to Simvue, by default 1.0
+        metrics_flush_on_step : bool, optional
+            Whether to send the metric records held for a step as soon as a record for a later step is logged,
+            by default False
+        metric_downsampling : typing.Optional[typing.Dict[str, typing.Dict[str, typing.Any]]], optional
+            Downsampling strategy for the metrics whose names match each glob pattern, by default None (no downsampling)
+            See WrappedRun.launch() for the available strategies.
+        max_events_per_second : typing.Optional[float], optional
+            Maximum number of events to log per second, above which events are dropped, by default None (no limit)
+        event_rate_limits : typing.Optional[typing.Dict[str, float]], optional
+            Maximum number of events to log per second from each named event source, by default None (no limits)
+            Events are logged from the sources 'time_step' and 'ctrl_log'.
+        upload_workers : int, optional
+            Maximum number of files to upload to Simvue at once, by default 4
+        upload_retries : int, optional
+            Number of times to retry uploading a file which fails to upload, by default 3
+        file_cache_path : typing.Optional[pathlib.Path], optional
+            Path to a file recording which file contents are already stored on the server, by default None (no cache)
+            Use the same path for every run in a sweep to log how many of each run's files the server already held.
 
         """
         self.fds_input_file_path = fds_input_file_path
@@ -390,8 +397,9 @@ class FDSRun(WrappedRun):
         self._activation_times = False
         self._activation_times_data = {}
 
-        nml = f90nml.read(self.fds_input_file_path)
-        self._chid = nml["head"]["chid"]
+        _input = read_fds_input(self.fds_input_file_path)
+        self._chid = _input.chid
+        self._input_metadata = _input.metadata
 
         if self.workdir_path:
             pathlib.Path(self.workdir_path).mkdir(exist_ok=True)
@@ -411,4 +419,118 @@ class FDSRun(WrappedRun):
             else self._chid
         )
 
-        super().launch()
+        super().launch(
+            metrics_buffer_size=metrics_buffer_size,
+            metrics_flush_interval=metrics_flush_interval,
+            metrics_flush_on_step=metrics_flush_on_step,
+            metric_downsampling=metric_downsampling,
+            max_events_per_second=max_events_per_second,
+            event_rate_limits=event_rate_limits,
+            upload_workers=upload_workers,
+            upload_retries=upload_retries,
+            file_cache_path=file_cache_path,
+        )
+
+
+class FDSSweep(Sweep):
+    """Class for launching a set of FDS simulations, tracking each one with its own FDSRun.
+
+    Cases are given as the arguments to FDSRun.launch() for each case, keyed by the name of the case. Eg:
+
+    sweep = FDSSweep(folder="/fds_sweep", processes_per_case=4)
+    sweep.launch(
+        {
+            "case_1": {"fds_input_file_path": "case_1.fds", "workdir_path": "case_1"},
+            "case_2": {"fds_input_file_path": "case_2.fds", "workdir_path": "case_2"},
+        }
+    )
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        max_parallel_cases: typing.Optional[int] = None,
+        processes_per_case: int = 1,
+        run_kwargs: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        init_kwargs: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ):
+        """Initialize the sweep.
+
+        Parameters
+        ----------
+        folder : str
+            The Simvue folder to create the run for every case in
+        max_parallel_cases : typing.Optional[int], optional
+            Maximum number of FDS simulations to run at once, by default None
+            Uses the number of CPU cores divided by processes_per_case by default.
+        processes_per_case : int, optional
+            Number of cores used by each FDS simulation, such as its number of MPI processes, by default 1
+        run_kwargs : typing.Optional[typing.Dict[str, typing.Any]], optional
+            Arguments used to create the FDSRun for every case, such as the mode, by default None
+        init_kwargs : typing.Optional[typing.Dict[str, typing.Any]], optional
+            Arguments passed to run.init() for every case, such as tags, by default None
+
+        """
+        super().__init__(
+            FDSRun,
+            folder=folder,
+            max_parallel_cases=max_parallel_cases,
+            processes_per_case=processes_per_case,
+            run_kwargs=run_kwargs,
+            init_kwargs=init_kwargs,
+        )
+
+    def launch_template(
+        self,
+        base_input_file: pydantic.FilePath,
+        parameters: typing.Dict[str, typing.Sequence[typing.Any]],
+        output_dir: typing.Union[str, pathlib.Path],
+        chid_prefix: typing.Optional[str] = None,
+        **launch_kwargs,
+    ) -> typing.List[CaseResult]:
+        """Launch a case for every combination of parameter values, each with a variant of a base FDS input file.
+
+        The base input file is parsed once, and each variant is written to its own subdirectory of the output
+        directory with a unique CHID, which is also used as the name of its run. The CHID and metadata of each
+        variant are recorded as it is written, so no input file is parsed again when its case is launched. Eg:
+
+        sweep = FDSSweep(folder="/fds_sweep")
+        sweep.launch_template(
+            "base.fds",
+            {"reac.soot_yield": [0.01, 0.03], "surf[0].hrrpua": [150, 300]},
+            output_dir="sweep_results",
+        )
+
+        Parameters
+        ----------
+        base_input_file : pydantic.FilePath
+            Path to the base FDS input file
+        parameters : typing.Dict[str, typing.Sequence[typing.Any]]
+            The values to use for each parameter, keyed by 'group.key', or 'group[index].key' for repeated groups
+        output_dir : typing.Union[str, pathlib.Path]
+            The directory to write the variants to, in which each case is run in its own subdirectory
+        chid_prefix : typing.Optional[str], optional
+            The prefix of the CHID of each variant, which is followed by the index of the variant, by default None
+            Uses the CHID of the base input file by default.
+        **launch_kwargs
+            Other arguments passed to FDSRun.launch() for every case, such as upload_files
+
+        Returns
+        -------
+        typing.List[CaseResult]
+            The outcome of each case, in the order of the combinations of parameter values
+
+        """
+        _variants = expand_fds_template(
+            base_input_file, parameters, output_dir, chid_prefix
+        )
+        return self.launch(
+            {
+                chid: {
+                    **launch_kwargs,
+                    "fds_input_file_path": input_file,
+                    "workdir_path": str(input_file.parent),
+                }
+                for chid, input_file in _variants.items()
+            }
+        )
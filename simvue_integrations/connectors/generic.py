@@ -3,12 +3,27 @@
 Generic connector class to build on top of when creating integrations for non-Python software.
 """
 
+import asyncio
 import multiprocessing
+import os
+import pathlib
 import typing
 
 import click
 import multiparser
+import pydantic
 import simvue
+from simvue.models import NAME_REGEX, MetricKeyString
+from simvue.run import check_run_initialised
+from simvue.utilities import calculate_sha256, skip_if_failed, validate_timestamp
+
+from simvue_integrations.extras.async_monitor import AsyncFileMonitor
+from simvue_integrations.extras.downsampling import MetricDownsampler
+from simvue_integrations.extras.event_pipeline import EventPipeline
+from simvue_integrations.extras.file_cache import FileCache
+from simvue_integrations.extras.file_registration import file_registration
+from simvue_integrations.extras.metric_buffer import MetricBuffer, MetricRecord
+from simvue_integrations.extras.upload_pool import UploadPool
 
 try:
     from typing import Self
@@ -16,6 +31,44 @@ except ImportError:
     from typing_extensions import Self
 
 
+def _check_timestamp(timestamp: str) -> str:
+    """Check that a metric timestamp is in the format Simvue expects.
+
+    Parameters
+    ----------
+    timestamp : str
+        The timestamp
+
+    Returns
+    -------
+    str
+        The timestamp, unchanged
+
+    Raises
+    ------
+    ValueError
+        Raised if the timestamp is not in the expected format
+
+    """
+    if not validate_timestamp(timestamp):
+        raise ValueError("Invalid timestamp format")
+    return timestamp
+
+
+# Used to validate each batch of buffered metric records in a single call when it is flushed, checking the same
+# names, values and timestamps as simvue.Run.log_metrics does for each call
+_metric_records_validator = pydantic.TypeAdapter(
+    typing.List[
+        typing.Tuple[
+            typing.Dict[MetricKeyString, typing.Union[int, float]],
+            int,
+            float,
+            typing.Annotated[str, pydantic.AfterValidator(_check_timestamp)],
+        ]
+    ]
+)
+
+
 class WrappedRun(simvue.Run):
     """Generic wrapper to the Run class which can be used to build Connectors to non-python applications.
 
@@ -24,6 +77,12 @@ class WrappedRun(simvue.Run):
     """
 
     _terminated = False
+    _launch_async = False
+    _metrics_buffer: typing.Optional[MetricBuffer] = None
+    _metric_downsampler: typing.Optional[MetricDownsampler] = None
+    _event_pipeline: typing.Optional[EventPipeline] = None
+    _upload_pool: typing.Optional[UploadPool] = None
+    _file_cache: typing.Optional[FileCache] = None
 
     def __init__(
         self,
@@ -78,6 +137,257 @@ class WrappedRun(simvue.Run):
         self.kill_all_processes()
         self._trigger.set()
 
+    def _dispatch_metric_records(self, records: typing.List[MetricRecord]) -> None:
+        """Validate a batch of metric records, and add each of them to the queue of metrics to send to Simvue.
+
+        The batch is validated in a single call, and the run's state is only checked once for the whole batch.
+        Invalid records are dropped with a warning rather than stopping the run, since the buffer may be flushed
+        from a background thread or after the simulation has finished. If the run has stopped or failed since the
+        records were logged, they are dropped, as they can no longer be sent.
+
+        Parameters
+        ----------
+        records : typing.List[MetricRecord]
+            The (metrics, step, time, timestamp) records to send, in the order they were logged
+
+        """
+        if (
+            self._aborted
+            or not self._dispatcher
+            or not self._active
+            or self._status != "running"
+            or (self._shutdown_event and self._shutdown_event.is_set())
+        ):
+            return
+
+        try:
+            _records = _metric_records_validator.validate_python(records)
+        except pydantic.ValidationError as e:
+            _invalid = {error["loc"][0] for error in e.errors()}
+            click.secho(
+                f"[simvue] WARNING: dropping {len(_invalid)} invalid metric record{'s' if len(_invalid) > 1 else ''} - {e}",
+                bold=self._term_color,
+                fg="yellow" if self._term_color else None,
+            )
+            _records = _metric_records_validator.validate_python(
+                [record for i, record in enumerate(records) if i not in _invalid]
+            )
+
+        for metrics, step, time, timestamp in _records:
+            self._dispatcher.add_item(
+                {"values": metrics, "time": time, "timestamp": timestamp, "step": step},
+                "metrics",
+                self._queue_blocking,
+            )
+
+    @skip_if_failed("_aborted", "_suppress_errors", False)
+    @check_run_initialised
+    def log_metrics(
+        self,
+        metrics: typing.Dict[str, typing.Union[int, float]],
+        step: typing.Optional[int] = None,
+        time: typing.Optional[float] = None,
+        timestamp: typing.Optional[str] = None,
+    ) -> bool:
+        """Log metrics to Simvue, via the metric downsampler and metrics buffer if active while the simulation is running.
+
+        The step, time and timestamp are recorded when this method is called rather than when the buffer is
+        flushed, so buffered metrics are stored exactly as if they had been logged immediately. The run's state is
+        checked here, as in simvue.Run.log_metrics, but the metric names and values are validated for each batch of
+        records when the buffer is flushed, and invalid records are then dropped with a warning.
+
+        Parameters
+        ----------
+        metrics : typing.Dict[str, typing.Union[int, float]]
+            Set of metrics to upload to server for this run
+        step : typing.Optional[int], optional
+            Manually specify the step index for this log, by default None
+        time : typing.Optional[float], optional
+            Manually specify the time for this log, by default None
+        timestamp : typing.Optional[str], optional
+            Manually specify the timestamp for this log, by default None
+
+        Returns
+        -------
+        bool
+            Whether the metrics were successfully logged or buffered
+
+        """
+        if self._mode == "disabled" or not (
+            self._metrics_buffer or self._metric_downsampler
+        ):
+            return super().log_metrics(
+                metrics, step=step, time=time, timestamp=timestamp
+            )
+
+        if not metrics:
+            return True
+
+        if not self._active:
+            self._error("Run is not active")
+            return False
+
+        if self._status != "running":
+            self._error("Cannot log metrics when not in the running state")
+            return False
+
+        _record = (
+            metrics,
+            step if step is not None else self._step,
+            time if time is not None else self.duration,
+            timestamp or self.time_stamp,
+        )
+        self._step += 1
+
+        self._log_metric_records(
+            self._metric_downsampler.add(*_record)
+            if self._metric_downsampler
+            else [_record]
+        )
+        return True
+
+    def _log_metric_records(self, records: typing.List[MetricRecord]) -> None:
+        """Send metric records to Simvue, via the metrics buffer if one is active.
+
+        Parameters
+        ----------
+        records : typing.List[MetricRecord]
+            The (metrics, step, time, timestamp) records to send
+
+        """
+        if not self._metrics_buffer:
+            self._dispatch_metric_records(records)
+            return
+
+        for record in records:
+            self._metrics_buffer.add(*record)
+
+    def log_event(
+        self,
+        message: str,
+        timestamp: typing.Optional[str] = None,
+        source: str = "default",
+    ) -> bool:
+        """Log an event to Simvue, via the event pipeline if one is active while the simulation is running.
+
+        Parameters
+        ----------
+        message : str
+            Event message to log
+        timestamp : typing.Optional[str], optional
+            Manually specify the time stamp for this log, by default None
+        source : str, optional
+            Name of the source of this event, used to apply per source rate limits, by default "default"
+
+        Returns
+        -------
+        bool
+            Whether the event was logged, or counted as a repeat of the previous event
+
+        """
+        if not self._event_pipeline:
+            return super().log_event(message, timestamp=timestamp)
+        return self._event_pipeline.log(message, timestamp=timestamp, source=source)
+
+    @pydantic.validate_call
+    def _upload_file(
+        self,
+        file_path: str,
+        category: typing.Literal["input", "output", "code"],
+        name: typing.Optional[
+            typing.Annotated[str, pydantic.Field(pattern=NAME_REGEX)]
+        ] = None,
+    ) -> None:
+        """Register a single file with the Simvue server, raising an exception if the upload fails so that it can be retried.
+
+        The file is registered in the same way as simvue.Run.save_file, but a failure to reach the server is raised
+        to the upload pool instead of being passed to _error(), which would end the run before the upload could be
+        retried. If a file cache is active, the file's cached checksum is used rather than hashing the file again,
+        and the upload is recorded in the cache. Files are skipped once the run has been aborted.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to the file to upload
+        category : typing.Literal["input", "output", "code"]
+            Category of file with respect to this run
+        name : typing.Optional[typing.Annotated[str, pydantic.Field(pattern=NAME_REGEX)]], optional
+            Name to associate with this file, by default the file name
+
+        Raises
+        ------
+        ValueError
+            Raised if output files are uploaded before the run has started, which a retry would not fix
+        RuntimeError
+            Raised if the file could not be registered with the server
+
+        """
+        if self._aborted:
+            return
+
+        if self._status == "created" and category == "output":
+            raise ValueError("Cannot upload output files for runs in the created state")
+
+        if not os.path.getsize(file_path):
+            click.secho(
+                "[simvue] WARNING: saving zero-sized files not currently supported",
+                bold=self._term_color,
+                fg="yellow" if self._term_color else None,
+            )
+            return
+
+        _checksum = (
+            self._file_cache.checksum(file_path)
+            if self._file_cache
+            else calculate_sha256(file_path, True)
+        )
+        _data = file_registration(self, file_path, category, _checksum, name=name)
+        if self._simvue.save_file(_data) is None:
+            raise RuntimeError(f"Failed to upload file {file_path}")
+
+        if self._file_cache:
+            self._file_cache.record_upload(_checksum, self._user_config.server.url)
+
+    def _save_files(
+        self,
+        file_paths: typing.Iterable[typing.Union[str, pathlib.Path]],
+        category: typing.Literal["input", "output", "code"],
+        relative_to: typing.Optional[typing.Union[str, pathlib.Path]] = None,
+    ) -> None:
+        """Save a set of files to the Simvue run, using the upload pool if one is active.
+
+        Parameters
+        ----------
+        file_paths : typing.Iterable[typing.Union[str, pathlib.Path]]
+            Paths to the files to upload
+        category : typing.Literal["input", "output", "code"]
+            Category of the files with respect to this run
+        relative_to : typing.Optional[typing.Union[str, pathlib.Path]], optional
+            If provided, name each file by its path relative to this directory, by default names are file names
+
+        """
+        _uploads = [
+            (
+                str(file_path),
+                category,
+                str(pathlib.Path(file_path).relative_to(relative_to))
+                if relative_to
+                else None,
+            )
+            for file_path in file_paths
+        ]
+
+        if not self._upload_pool or self._mode == "disabled":
+            for file_path, category, name in _uploads:
+                self.save_file(file_path, category, name=name)
+            return
+
+        if _failures := self._upload_pool.upload(_uploads):
+            self.log_event(
+                f"Failed to upload {len(_failures)} file{'s' if len(_failures) > 1 else ''}: "
+                + ", ".join(f"{upload[0]} ({e})" for upload, e in _failures)
+            )
+
     def _pre_simulation(self):
         """Execute after launch() is called, but before a simulation begins.
 
@@ -102,7 +412,36 @@ class WrappedRun(simvue.Run):
 
         By default, checks whether an abort has been caused by an alert, and if so prints a message and sets
         the run to the terminated state. This method should be called AFTER the rest of your functions in the overriden method.
+        Any metrics still held by the metric downsampler or the metrics buffer are also sent to Simvue, along with a summary of any events
+        which were coalesced or dropped by the event pipeline, and summaries of any files uploaded by the upload pool
+        and of file cache hits and misses.
         """
+        if self._event_pipeline:
+            self._event_pipeline.close()
+            self._event_pipeline = None
+
+        if self._upload_pool:
+            if self._upload_pool.files_uploaded:
+                self.log_event(self._upload_pool.summary())
+            self._upload_pool = None
+
+        if self._file_cache:
+            if self._file_cache.hits or self._file_cache.misses:
+                self.log_event(self._file_cache.summary())
+            try:
+                self._file_cache.save()
+            except OSError as e:
+                self.log_event(f"Failed to save file cache: {e}")
+            self._file_cache = None
+
+        if self._metric_downsampler:
+            self._log_metric_records(self._metric_downsampler.flush())
+            self._metric_downsampler = None
+
+        if self._metrics_buffer:
+            self._metrics_buffer.stop()
+            self._metrics_buffer = None
+
         if self._alert_raised_trigger.is_set():
             self.log_event("Simulation aborted due to an alert being triggered.")
             self._terminated = True
@@ -122,20 +461,139 @@ class WrappedRun(simvue.Run):
             self.set_status("terminated")
         return _out
 
-    def launch(self):
+    def launch(
+        self,
+        metrics_buffer_size: int = 100,
+        metrics_flush_interval: float = 1.0,
+        metrics_flush_on_step: bool = False,
+        metric_downsampling: typing.Optional[
+            typing.Dict[str, typing.Dict[str, typing.Any]]
+        ] = None,
+        max_events_per_second: typing.Optional[float] = None,
+        event_rate_limits: typing.Optional[typing.Dict[str, float]] = None,
+        upload_workers: int = 4,
+        upload_retries: int = 3,
+        file_cache_path: typing.Optional[pathlib.Path] = None,
+    ):
         """Launch the simulation and the monitoring.
 
         By default calls the three methods above, and sets up a FileMonitor for tracking files.
+
+        Parameters
+        ----------
+        metrics_buffer_size : int, optional
+            Number of metric records to collect before sending them to Simvue together, by default 100
+            Set to 1 to send each record as soon as it is logged.
+        metrics_flush_interval : float, optional
+            Maximum time in seconds to hold metric records before sending them to Simvue, by default 1.0
+        metrics_flush_on_step : bool, optional
+            Whether to send the metric records held for a step as soon as a record for a later step is logged,
+            by default False
+        metric_downsampling : typing.Optional[typing.Dict[str, typing.Dict[str, typing.Any]]], optional
+            Downsampling strategy for the metrics whose names match each glob pattern, by default None (no downsampling)
+            Each strategy is a dictionary with a 'method' of:
+                'every_nth': keep every 'n'th value
+                'time_bucket': keep the 'aggregation' ('mean', 'min' or 'max') of values within each 'bucket_width'
+                    of simulation time, or of step if metrics have no time
+                'lttb': reduce each 'window' of values to 'points_per_window' values with Largest-Triangle-Three-Buckets
+            For example {"HRR*": {"method": "lttb", "window": 1000, "points_per_window": 100}}.
+            Full resolution data remains available in any output files uploaded at the end of the run.
+        max_events_per_second : typing.Optional[float], optional
+            Maximum number of events to log per second, above which events are dropped, by default None (no limit)
+        event_rate_limits : typing.Optional[typing.Dict[str, float]], optional
+            Maximum number of events to log per second from each named event source, by default None (no limits)
+        upload_workers : int, optional
+            Maximum number of files to upload to Simvue at once, by default 4
+        upload_retries : int, optional
+            Number of times to retry uploading a file which fails to upload, by default 3
+        file_cache_path : typing.Optional[pathlib.Path], optional
+            Path to a file recording which file contents are already stored on the server, by default None (no cache)
+            Use the same path for every run in a sweep to log how many of each run's files the server already held.
+
         """
+        self._upload_pool = UploadPool(
+            upload_callback=self._upload_file,
+            max_workers=upload_workers,
+            max_retries=upload_retries,
+        )
+        self._file_cache = FileCache(file_cache_path) if file_cache_path else None
+
         self._pre_simulation()
 
-        # Start an instance of the file monitor, to keep track of log and results files
-        with multiparser.FileMonitor(
-            exception_callback=self.log_event,
-            termination_trigger=self._trigger,
-            flatten_data=True,
-        ) as self.file_monitor:
+        self._event_pipeline = EventPipeline(
+            log_callback=super().log_event,
+            max_events_per_second=max_events_per_second,
+            source_rate_limits=event_rate_limits,
+        )
+
+        if metric_downsampling:
+            self._metric_downsampler = MetricDownsampler(metric_downsampling)
+
+        if metrics_buffer_size > 1:
+            self._metrics_buffer = MetricBuffer(
+                flush_callback=self._dispatch_metric_records,
+                max_records=metrics_buffer_size,
+                flush_interval=metrics_flush_interval,
+                exception_callback=self.log_event,
+                flush_on_step=metrics_flush_on_step,
+            )
+
+        # If launched from launch_async(), files are monitored from the event loop once this method returns
+        if self._launch_async:
+            self.file_monitor = AsyncFileMonitor(
+                exception_callback=self.log_event,
+                termination_trigger=self._trigger,
+                flatten_data=True,
+            )
             self._during_simulation()
-            self.file_monitor.run()
+        else:
+            if self._metrics_buffer:
+                self._metrics_buffer.start()
+
+            # Start an instance of the file monitor, to keep track of log and results files
+            with multiparser.FileMonitor(
+                exception_callback=self.log_event,
+                termination_trigger=self._trigger,
+                flatten_data=True,
+            ) as self.file_monitor:
+                self._during_simulation()
+                self.file_monitor.run()
+
+            self._post_simulation()
+
+    async def launch_async(self, *args: typing.Any, **kwargs: typing.Any):
+        """Launch the simulation, and monitor it from the running event loop rather than blocking the calling thread.
+
+        Takes the same arguments as launch(), and calls the same three methods above, so that many simulations
+        can be launched and monitored concurrently from a single event loop, eg using asyncio.gather().
+        Files are monitored by an AsyncFileMonitor, which has the same interface as multiparser.FileMonitor,
+        and pre and post simulation steps such as uploading files are run in the event loop's default executor.
+
+        Parameters
+        ----------
+        *args : typing.Any
+            Positional arguments to pass to launch()
+        **kwargs : typing.Any
+            Keyword arguments to pass to launch()
+
+        """
+        _loop = asyncio.get_running_loop()
+
+        self._launch_async = True
+        try:
+            await _loop.run_in_executor(None, lambda: self.launch(*args, **kwargs))
+        finally:
+            self._launch_async = False
+
+        _flush_task = (
+            asyncio.create_task(self._metrics_buffer.flush_periodically())
+            if self._metrics_buffer
+            else None
+        )
+        try:
+            await self.file_monitor.run()
+        finally:
+            if _flush_task:
+                _flush_task.cancel()
 
-        self._post_simulation()
+        await _loop.run_in_executor(None, self._post_simulation)
@@ -4,18 +4,30 @@ This module provides functionality for using Simvue to track and monitor a MOOSE
 """
 
 import csv
+import os
 import pathlib
-import re
-import time
+import threading
 import typing
 
 import multiparser.parsing.file as mp_file_parser
 import multiparser.parsing.tail as mp_tail_parser
+import numpy
 import pydantic
 import simvue
 
 from simvue_integrations.connectors.generic import WrappedRun
 from simvue_integrations.extras.create_command import format_command_env_vars
+from simvue_integrations.extras.hit_parser import parse_hit_file
+from simvue_integrations.extras.moose_log import (
+    HEADER_END_PATTERN,
+    HEADER_KEY_INVALID_PATTERN,
+    HEADER_MAX_SIZE,
+    LOG_PATTERNS,
+    TERMINATOR_PATTERN,
+    MooseStepState,
+    StepRecord,
+)
+from simvue_integrations.extras.ring_buffer import RingBuffer, downsample_stride
 
 
 class MooseRun(WrappedRun):
@@ -38,21 +50,35 @@ class MooseRun(WrappedRun):
     run_in_parallel: bool = None
     num_processors: int = None
     mpiexec_env_vars: typing.Dict[str, typing.Any] = None
+    track_residuals: bool = None
+    residual_points_per_step: int = None
 
     _output_dir_path: typing.Union[str, pydantic.DirectoryPath] = None
     _results_prefix: str = None
-    _time = time.time()
-    # This represents the step number and time of the step, ie when MOOSE says 'Time Step X, time = Y'
-    _step_num = 0
-    _step_time = 0
-    # Initialize counters for keeping track of the number of linear and nonlinear steps involved in each solve
-    _nonlinear = 0
-    _linear = 0
+    # Step number, time, dt and iteration counts of the step being solved, ie when MOOSE says 'Time Step X, time = Y'
+    _step_state: MooseStepState = None
     _dt = None
+    # Most recent nonlinear and linear residuals of the step being solved, if residuals are tracked
+    _residual_buffers: typing.Dict[str, RingBuffer] = None
+    _residual_buffer_size: int = 4096
+    # Metric names and value columns for each VectorPostProcessor layout, keyed by vector name, header and IDs
+    _vector_layouts: typing.Dict[
+        typing.Tuple[str, typing.Tuple[str, ...], bytes, bool],
+        typing.Tuple[typing.List[str], typing.List[int]],
+    ] = None
+    _max_vector_layouts: int = 64
+    # Byte offset read up to and last row parsed for each VectorPostProcessor time file
+    _time_file_cache: typing.Dict[
+        str, typing.Tuple[int, typing.Optional[typing.List[str]]]
+    ] = None
+    _time_file_lock: threading.Lock = None
+    _time_file_tail_bytes: int = 65536
 
     def _moose_input_parser(self, input_file: pathlib.Path):
         """Parse MOOSE input file, and create a dictionary of metadata with dot notation representing indentation of keys.
 
+        The parsed contents of each input file are cached, so runs launched from the same input file only parse it once.
+
         Parameters
         ----------
         input_file: pathlib.Path
@@ -64,37 +90,11 @@ class MooseRun(WrappedRun):
             Raised if there is no 'file_base' parameter in the MOOSE file Output section, since the connector requires this to find output files.
 
         """
-        input_metadata = {}
         prefix = input_file.name.split(".")[0]
-        key = prefix
-
-        with open(input_file, "r") as file:
-            for line in file:
-                line = line.strip()
-                # Find lines which represent ends of blocks
-                # Could be similar to [] or [../] - so check for square brackets with any number of non alphanumeric chars between
-                if re.search(r"\[[^\w]*\]", line):
-                    # Remove that block from the key - split at the last dot in the key and remove what comes after
-                    key = key.rsplit(".", 1)[0]
-                # Find lines which represent starts of new blocks
-                # Eg [Mesh] - so look for square brackets with any characters between (already screened out end blocks above)
-                elif new_key := re.search(r"\[.+\]", line):
-                    # Add the title of the new block to the key, dot separated notation
-                    # Remove './' from before the titles of blocks if present
-                    # Replace a '.' with '_' to prevent issues with dot notation of keys, but still allow users to use dots in block names
-                    key += f".{new_key.group().strip('[]/').replace('./', '').replace('.', '_')}"
-                # Find lines which represent a key value pair, <key> = <value>
-                # Make sure to remove in line comments from the value
-                elif match := re.search(r"(\w*)\s*=\s*([^#]+)(#+.*)?", line):
-                    # If the value ends with a ;, it means it is a multi line array input
-                    # Not interested in uploading long inputs like these as metadata, so ignore for now
-                    if ";" in match.group(2):
-                        continue
-                    try:
-                        val = float(match.group(2).strip())
-                    except ValueError:
-                        val = match.group(2).strip()
-                    input_metadata[f"{key}.{match.group(1)}"] = val
+        input_metadata = {
+            f"{prefix}.{key}": value
+            for key, value in parse_hit_file(input_file).items()
+        }
 
         self.update_metadata(input_metadata)
 
@@ -132,32 +132,113 @@ class MooseRun(WrappedRun):
             The parsed data from the header of the MOOSE log file
 
         """
-        # Open the log file, and read header lines (which contains information about the MOOSE version used etc)
-        with open(input_file) as file:
-            file_lines = file.readlines()
-        file_lines = list(filter(None, file_lines))
-
-        # Add the data from each line of the header into a dictionary as a key/value pair
         header_data = {}
-        for line in file_lines:
-            # Ignore blank lines and lines which don't contain a colon
-            if not line.strip() or ":" not in line:
-                continue
-            key, value = line.split(":", 1)
-            key = key.strip()
-            key = key.replace(" ", "_").lower()
-            # Replace any characters which will fail server side validation of key name with dashes
-            key = re.sub(r"[^\w\-\s\.]+", "-", key)
-            # Ignore lines which correspond to 'titles'
-            if not value:
-                continue
-            value = value.strip()
-            if not value:
-                continue
-            header_data[f"moose.{key}"] = value
+        _chars_read: int = 0
+
+        # Read lines from the log file until the first solve starts, as only the header contains information about
+        # the MOOSE version used etc, and add the data from each line into a dictionary as a key/value pair
+        with open(input_file, errors="replace") as file:
+            for line in file:
+                _chars_read += len(line)
+                if HEADER_END_PATTERN.match(line) or _chars_read > HEADER_MAX_SIZE:
+                    break
+                # Ignore blank lines and lines which don't contain a colon
+                if ":" not in line:
+                    continue
+                key, value = line.split(":", 1)
+                # Ignore lines which correspond to 'titles'
+                if not (value := value.strip()):
+                    continue
+                key = key.strip().replace(" ", "_").lower()
+                # Replace any characters which will fail server side validation of key name with dashes
+                key = HEADER_KEY_INVALID_PATTERN.sub("-", key)
+                header_data[f"moose.{key}"] = value
 
         return {}, header_data
 
+    def _vector_layout(
+        self, vector_name: str, header: typing.Tuple[str, ...], ids: numpy.ndarray
+    ) -> typing.Tuple[typing.List[str], typing.List[int]]:
+        """Get the metric names and value columns for a VectorPostProcessor file, creating them only once per layout.
+
+        Parameters
+        ----------
+        vector_name : str
+            The name of the vector calculated by the VectorPostProcessor
+        header : typing.Tuple[str, ...]
+            The column names from the header of the CSV file
+        ids : numpy.ndarray
+            The ID of each row in the CSV file
+
+        Returns
+        -------
+        typing.Tuple[typing.List[str], typing.List[int]]
+            The metric name for each value, ordered by column and then by ID, and the indices of the value columns
+
+        """
+        _key = (vector_name, header, ids.tobytes(), self.track_vector_positions)
+        if _layout := self._vector_layouts.get(_key):
+            return _layout
+
+        _ignored_columns = {"id"}
+        if not self.track_vector_positions:
+            _ignored_columns |= {"x", "y", "z", "radius"}
+        value_columns = [
+            index for index, key in enumerate(header) if key not in _ignored_columns
+        ]
+        _ids = [str(int(_id)) if _id.is_integer() else str(_id) for _id in ids.tolist()]
+        metric_names = [
+            f"{vector_name}.{header[index]}.{_id}"
+            for index in value_columns
+            for _id in _ids
+        ]
+
+        # Layouts only change if the VectorPostProcessor changes its sample points, so this rarely fills up
+        if len(self._vector_layouts) >= self._max_vector_layouts:
+            self._vector_layouts.clear()
+        self._vector_layouts[_key] = (metric_names, value_columns)
+        return metric_names, value_columns
+
+    def _latest_time_data(self, time_file: str) -> typing.Optional[typing.List[str]]:
+        """Get the last row of a VectorPostProcessor time file, only reading bytes added since it was last read.
+
+        Parameters
+        ----------
+        time_file : str
+            Path to the time file
+
+        Returns
+        -------
+        typing.Optional[typing.List[str]]
+            The values in the last complete row of the file, or None if no complete row has been found
+
+        """
+        with self._time_file_lock:
+            offset, last_row = self._time_file_cache.get(time_file, (0, None))
+
+            with open(time_file, "rb") as in_t:
+                size = in_t.seek(0, os.SEEK_END)
+                if size < offset:
+                    # File has been rewritten, so start again
+                    offset, last_row = 0, None
+                # Only the last row is needed, so skip to near the end of a long file which has not been read yet
+                start = max(offset, size - self._time_file_tail_bytes)
+                in_t.seek(start)
+                new_data = in_t.read(size - start)
+
+            # Ignore any partially written row at the end of the file until it is complete
+            end = new_data.rfind(b"\n")
+            if end != -1:
+                complete_rows = new_data[:end].rstrip()
+                previous_rows, _, last_line = complete_rows.rpartition(b"\n")
+                # If reading started part way through the file, the first row found may be incomplete
+                if last_line and (start == offset or previous_rows):
+                    last_row = next(csv.reader([last_line.decode()]))
+                offset = start + end + 1
+
+            self._time_file_cache[time_file] = (offset, last_row)
+            return last_row
+
     @mp_file_parser.file_parser
     def _vector_postprocessor_parser(
         self,
@@ -188,34 +269,38 @@ class MooseRun(WrappedRun):
 
         # If user has enabled time_data in their MOOSE file, get latest line from this file and save time
         time_file = f"{input_file.rsplit('_', 1)[0]}_time.csv"
-        if pathlib.Path(time_file).exists():
-            with open(time_file, newline="\n") as in_t:
-                final_line = [in_t.readlines()[-1]]
-                current_time_data = next(csv.reader(final_line))
-                metrics["time"] = current_time_data[0]
-                metrics["step"] = current_time_data[1]
+        if pathlib.Path(time_file).exists() and (
+            current_time_data := self._latest_time_data(time_file)
+        ):
+            metrics["time"] = current_time_data[0]
+            metrics["step"] = current_time_data[1]
         else:
             metrics["step"] = int(serial_num.split(".")[0])
             if self._dt:
                 metrics["time"] = metrics["step"] * self._dt
 
         with open(input_file, newline="") as in_f:
-            read_csv = csv.DictReader(in_f)
-
-            for csv_data in read_csv:
-                if not self.track_vector_positions:
-                    csv_data.pop("x", None)
-                    csv_data.pop("y", None)
-                    csv_data.pop("z", None)
-                    csv_data.pop("radius", None)
-
-                if _id := csv_data.pop("id", None):
-                    metrics.update(
-                        {
-                            f"{vector_name}.{key}.{_id}": value
-                            for (key, value) in csv_data.items()
-                        }
-                    )
+            header = tuple(next(csv.reader([in_f.readline()]), []))
+            # Check there is at least one row of data, as loadtxt warns if there is not
+            _data_start = in_f.tell()
+            if "id" not in header or not in_f.readline().strip():
+                return {}, metrics
+            in_f.seek(_data_start)
+            try:
+                data = numpy.loadtxt(in_f, delimiter=",", ndmin=2)
+            except ValueError:
+                # Some values are missing, which loadtxt cannot handle, so read them as NaN instead
+                in_f.seek(_data_start)
+                data = numpy.genfromtxt(in_f, delimiter=",", ndmin=2)
+
+        ids = data[:, header.index("id")]
+        if numpy.isnan(ids).any():
+            data = data[~numpy.isnan(ids)]
+            ids = ids[~numpy.isnan(ids)]
+
+        metric_names, value_columns = self._vector_layout(vector_name, header, ids)
+        # Values are ordered by column and then by ID, matching the order of the metric names
+        metrics.update(zip(metric_names, data[:, value_columns].T.ravel().tolist()))
 
         return {}, metrics
 
@@ -233,66 +318,121 @@ class MooseRun(WrappedRun):
             Returns False if unable to upload events, to signal an error
 
         """
-        # Look for relevant keys in the dictionary of data which we are passed in, and log the event with Simvue
-        if any(
-            key in ("time_step", "converged", "non_converged", "terminated")
-            for key in log_data.keys()
-        ):
-            try:
-                self.log_event(list(log_data.values())[0])
-            except RuntimeError as e:
-                self._error(e)
-                return False
+        # Iteration lines make up most of the log, so are counted before anything else is checked
+        if "linear" in log_data:
+            self._step_state.linear += 1
+            if self.track_residuals:
+                self._append_residual("linear", log_data["linear"])
+            return True
+        if "nonlinear" in log_data:
+            self._step_state.nonlinear += 1
+            if self.track_residuals:
+                self._append_residual("nonlinear", log_data["nonlinear"])
+            return True
+
+        try:
+            source, message = next(iter(log_data.items()))
+            self.log_event(message, source=source)
+        except RuntimeError as e:
+            self._error(e)
+            return False
+
+        if source == "time_step":
+            self._step_state.start_step(message)
+
+        elif source == "converged":
+            self._log_residuals()
+            self._log_step_record(self._step_state.finish_step())
+
+        elif source == "non_converged":
+            # Residuals from solves which fail to converge are uploaded straight away, so that stalls can be seen
+            self._log_residuals()
+
+        elif source == "terminated":
+            self._terminated = True
 
-        if "time_step" in log_data.keys():
-            self._time = time.time()
+            terminator = TERMINATOR_PATTERN.search(message).group(1)
 
-            step_time = re.search(
-                r"Time Step (\d+), time = (\d+), dt = .*", log_data["time_step"]
+            self.update_metadata({terminator: True})
+            self.update_tags(
+                [
+                    terminator,
+                ]
             )
-            if step_time:
-                self._step_num = int(step_time.group(1))
-                self._step_time = float(step_time.group(2))
 
-        elif "converged" in log_data.keys():
+        return True
+
+    def _append_residual(self, kind: str, residual: str):
+        """Add the residual of an iteration to the residuals held for the current step.
+
+        Parameters
+        ----------
+        kind : str
+            Whether this is a 'nonlinear' or 'linear' iteration
+        residual : str
+            The residual from the log
+
+        """
+        try:
+            self._residual_buffers[kind].append(float(residual))
+        except ValueError:
             self.log_event(
-                f" Step calculation time: {round((time.time() - self._time), 2)} seconds."
-            )
-            self.log_event(f" Total Nonlinear Iterations: {self._nonlinear}.")
-            self.log_event(f" Total Linear Iterations: {self._linear}.")
-
-            self.log_metrics(
-                {
-                    "total_linear_iterations": self._linear,
-                    "total_nonlinear_iterations": self._nonlinear,
-                },
-                self._step_num,
-                self._step_time,
+                f"Unable to read {kind} residual '{residual}' from MOOSE log.",
+                source="residuals",
             )
 
-            self._linear = 0
-            self._nonlinear = 0
+    def _log_residuals(self):
+        """Downsample the residuals held for the current step, and upload them as Metrics.
 
-        # Keep track of total number of linear and nonlinear iterations in the solve
-        elif "nonlinear" in log_data.keys():
-            self._nonlinear += 1
-        elif "linear" in log_data.keys():
-            self._linear += 1
+        Each residual is logged with the index of its iteration among all iterations of the same kind in the simulation
+        as its step, and with the time of the current step.
+        """
+        if not self.track_residuals:
+            return
 
-        elif "terminated" in log_data.keys():
-            self._terminated = True
+        for kind, residual_buffer in self._residual_buffers.items():
+            for index, residual in zip(
+                *downsample_stride(
+                    *residual_buffer.drain(), self.residual_points_per_step
+                )
+            ):
+                self.log_metrics(
+                    {f"{kind}_residual": float(residual)},
+                    step=int(index),
+                    time=self._step_state.time,
+                )
 
-            terminator = re.search(
-                r"Terminator '(.+)' is causing the execution to terminate.",
-                log_data["terminated"],
-            ).group(1)
+    def _log_step_record(self, step_record: StepRecord):
+        """Upload the summary of a converged step as Events and Metrics.
 
-            self.update_metadata({terminator: True})
-            self.update_tags(
-                [
-                    terminator,
-                ]
-            )
+        Parameters
+        ----------
+        step_record : StepRecord
+            The summary of the step from the MOOSE log
+
+        """
+        self.log_event(
+            f" Step calculation time: {round(step_record.wall_time, 2)} seconds.",
+            source="step_summary",
+        )
+        self.log_event(
+            f" Total Nonlinear Iterations: {step_record.nonlinear_iterations}.",
+            source="step_summary",
+        )
+        self.log_event(
+            f" Total Linear Iterations: {step_record.linear_iterations}.",
+            source="step_summary",
+        )
+
+        _metrics = {
+            "total_linear_iterations": step_record.linear_iterations,
+            "total_nonlinear_iterations": step_record.nonlinear_iterations,
+            "step_calculation_time": step_record.wall_time,
+        }
+        if step_record.dt is not None:
+            _metrics["dt"] = step_record.dt
+
+        self.log_metrics(_metrics, step_record.step, step_record.time)
 
     def _per_metric_callback(
         self, csv_data: typing.Dict[str, float], sim_metadata: typing.Dict[str, str]
@@ -317,8 +457,8 @@ class MooseRun(WrappedRun):
         # Log all results for this timestep as Metrics
         self.log_metrics(
             csv_data,
-            step=metric_step or self._step_num,
-            time=metric_time or self._step_time,
+            step=metric_step or self._step_state.step,
+            time=metric_time or self._step_state.time,
             timestamp=sim_metadata["timestamp"],
         )
 
@@ -337,7 +477,7 @@ class MooseRun(WrappedRun):
 
         # Save the MOOSE file for this run to the Simvue server
         if pathlib.Path(self.moose_file_path).exists:
-            self.save_file(self.moose_file_path, "input")
+            self._save_files([self.moose_file_path], "input")
 
         # Parse the MOOSE input file
         self._moose_input_parser(pathlib.Path(self.moose_file_path))
@@ -348,8 +488,8 @@ class MooseRun(WrappedRun):
             .parent.joinpath("Makefile")
             .exists()
         ):
-            self.save_file(
-                pathlib.Path(self.moose_application_path).parent.joinpath("Makefile"),
+            self._save_files(
+                [pathlib.Path(self.moose_application_path).parent.joinpath("Makefile")],
                 "input",
             )
 
@@ -376,8 +516,8 @@ class MooseRun(WrappedRun):
         """Describe which files should be monitored during the simulation by Multiparser."""
         self.log_event("Beginning MOOSE simulation...")
 
-        # Record time here, for that for static problems the overall time for execution will be returned
-        self._time = time.time()
+        # Start timing here, so that for static problems the overall time for execution will be returned
+        self._step_state = MooseStepState()
 
         # Read the initial information within the log file when it is first created, to parse the header information
         self.file_monitor.track(
@@ -400,22 +540,8 @@ class MooseRun(WrappedRun):
                 )
             ),
             callback=self._per_event_callback,
-            tracked_values=[
-                re.compile(r"Time Step.*"),
-                " Solve Converged!",
-                " Solve Did NOT Converge!",
-                re.compile(r"Terminator '.+' is causing the execution to terminate."),
-                re.compile(r" \d+ Nonlinear \|R\|"),
-                re.compile(r"     \d+ Linear \|R\|"),
-            ],
-            labels=[
-                "time_step",
-                "converged",
-                "non_converged",
-                "terminated",
-                "nonlinear",
-                "linear",
-            ],
+            tracked_values=[pattern for _, pattern in LOG_PATTERNS],
+            labels=[label for label, _ in LOG_PATTERNS],
         )
         # Monitor each line added to the MOOSE results file as the simulation proceeds, and upload results to Simvue
         self.file_monitor.tail(
@@ -449,15 +575,20 @@ class MooseRun(WrappedRun):
 
     def _post_simulation(self):
         """Upload informatino to Simvue after the MOOSE simulation finishes."""
-        for file in pathlib.Path(self._output_dir_path).glob(
-            f"{self._results_prefix}*"
-        ):
-            if (
-                pathlib.Path(file).absolute()
-                == pathlib.Path(self.moose_file_path).absolute()
-            ):
-                continue
-            self.save_file(file, "output")
+        # Upload residuals from any step which was still being solved when the simulation ended
+        self._log_residuals()
+
+        self._save_files(
+            [
+                file
+                for file in pathlib.Path(self._output_dir_path).glob(
+                    f"{self._results_prefix}*"
+                )
+                if pathlib.Path(file).absolute()
+                != pathlib.Path(self.moose_file_path).absolute()
+            ],
+            "output",
+        )
 
         super()._post_simulation()
 
@@ -473,6 +604,19 @@ class MooseRun(WrappedRun):
         run_in_parallel: bool = False,
         num_processors: int = 1,
         mpiexec_env_vars: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        track_residuals: bool = False,
+        residual_points_per_step: pydantic.PositiveInt = 100,
+        metrics_buffer_size: int = 100,
+        metrics_flush_interval: float = 1.0,
+        metrics_flush_on_step: bool = False,
+        metric_downsampling: typing.Optional[
+            typing.Dict[str, typing.Dict[str, typing.Any]]
+        ] = None,
+        max_events_per_second: typing.Optional[float] = None,
+        event_rate_limits: typing.Optional[typing.Dict[str, float]] = None,
+        upload_workers: int = 4,
+        upload_retries: int = 3,
+        file_cache_path: typing.Optional[pathlib.Path] = None,
     ):
         """Command to launch the MOOSE simulation and track it with Simvue.
 
@@ -494,6 +638,35 @@ class MooseRun(WrappedRun):
             The number of processors to run a parallel MOOSE job across, by default 1
         mpiexec_env_vars : typing.Optional[typing.Dict[str, typing.Any]]
             Any environment variables to pass to mpiexec on startup if running in parallel, by default None
+        track_residuals : bool, optional
+            Whether to upload the residual of each nonlinear and linear iteration as the Metrics 'nonlinear_residual'
+            and 'linear_residual', by default False
+        residual_points_per_step : pydantic.PositiveInt, optional
+            Maximum number of residuals of each kind to upload per step, by default 100
+            The residuals of each step are downsampled to evenly spaced iterations, always keeping the final iteration.
+        metrics_buffer_size : int, optional
+            Number of metric records to collect before sending them to Simvue together, by default 100
+            Set to 1 to send each record as soon as it is logged.
+        metrics_flush_interval : float, optional
+            Maximum time in seconds to hold metric records before sending them to Simvue, by default 1.0
+        metrics_flush_on_step : bool, optional
+            Whether to send the metric records held for a step as soon as a record for a later step is logged,
+            by default False
+        metric_downsampling : typing.Optional[typing.Dict[str, typing.Dict[str, typing.Any]]], optional
+            Downsampling strategy for the metrics whose names match each glob pattern, by default None (no downsampling)
+            See WrappedRun.launch() for the available strategies.
+        max_events_per_second : typing.Optional[float], optional
+            Maximum number of events to log per second, above which events are dropped, by default None (no limit)
+        event_rate_limits : typing.Optional[typing.Dict[str, float]], optional
+            Maximum number of events to log per second from each named event source, by default None (no limits)
+            Events are logged from the sources 'time_step', 'converged', 'non_converged', 'terminated' and 'step_summary'.
+        upload_workers : int, optional
+            Maximum number of files to upload to Simvue at once, by default 4
+        upload_retries : int, optional
+            Number of times to retry uploading a file which fails to upload, by default 3
+        file_cache_path : typing.Optional[pathlib.Path], optional
+            Path to a file recording which file contents are already stored on the server, by default None (no cache)
+            Use the same path for every run in a sweep to log how many of each run's files the server already held.
 
         Raises
         ------
@@ -514,5 +687,24 @@ class MooseRun(WrappedRun):
         self.run_in_parallel = run_in_parallel
         self.num_processors = num_processors
         self.mpiexec_env_vars = mpiexec_env_vars or {}
-
-        super().launch()
+        self.track_residuals = track_residuals
+        self.residual_points_per_step = residual_points_per_step
+        self._residual_buffers = {
+            kind: RingBuffer(self._residual_buffer_size)
+            for kind in ("nonlinear", "linear")
+        }
+        self._vector_layouts = {}
+        self._time_file_cache = {}
+        self._time_file_lock = threading.Lock()
+
+        super().launch(
+            metrics_buffer_size=metrics_buffer_size,
+            metrics_flush_interval=metrics_flush_interval,
+            metrics_flush_on_step=metrics_flush_on_step,
+            metric_downsampling=metric_downsampling,
+            max_events_per_second=max_events_per_second,
+            event_rate_limits=event_rate_limits,
+            upload_workers=upload_workers,
+            upload_retries=upload_retries,
+            file_cache_path=file_cache_path,
+        )
@@ -6,14 +6,16 @@ This module provides functionality for using Simvue to track and monitor an Open
 import os
 import pathlib
 import re
+import tempfile
+import threading
 import typing
-import zipfile
 
 import multiparser.parsing.tail as mp_tail_parser
 import pydantic
 import simvue
 
 from simvue_integrations.connectors.generic import WrappedRun
+from simvue_integrations.extras.parallel_zip import write_zip
 
 
 class OpenfoamRun(WrappedRun):
@@ -30,9 +32,19 @@ class OpenfoamRun(WrappedRun):
 
     openfoam_case_dir: pydantic.DirectoryPath = None
     upload_as_zip: bool = None
+    zip_compression: typing.Literal["stored", "deflated", "bzip2", "lzma"] = None
+    zip_compression_level: typing.Optional[int] = None
+    zip_directory: typing.Optional[pydantic.DirectoryPath] = None
+    upload_during_simulation: bool = None
     openfoam_env_vars: typing.Dict[str, typing.Any] = None
 
     _metadata_uploaded: bool = None
+    _uploaded_time_dirs: typing.Set[str] = None
+    _time_dir_watcher: typing.Optional[threading.Thread] = None
+    _time_dir_poll_interval: float = 1.0
+    _time_dir_pattern: re.Pattern[str] = re.compile(
+        r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$"
+    )
 
     def _save_directory(
         self,
@@ -43,7 +55,9 @@ class OpenfoamRun(WrappedRun):
         """Save directories of files to the Simvue run.
 
         If upload_to_zip is True, will add files from all of the directories provided to a single archive Zip file,
-        and then upload this file to Simvue.
+        compressing files in parallel, and then upload this file to Simvue. The archive is created in a temporary
+        directory within zip_directory, by default the case directory so that the archive is written to the same
+        filesystem as the files it contains, and removed once uploaded.
 
         If upload_to_zip is False, will upload each file in the directories individually to Simvue.
 
@@ -57,9 +71,7 @@ class OpenfoamRun(WrappedRun):
             The category of files being uploaded
 
         """
-        if self.upload_as_zip:
-            out_zip = pathlib.Path(self.openfoam_case_dir).joinpath(zip_name)
-            zip_file = zipfile.ZipFile(out_zip, "w")
+        file_paths = []
 
         for dir_name in dir_names:
             dir_path = pathlib.Path(self.openfoam_case_dir).joinpath(dir_name)
@@ -68,7 +80,7 @@ class OpenfoamRun(WrappedRun):
                 print(f"WARNING: Could not find directory {dir_path} - skipping!")
                 continue
 
-            # Go through directory recursively, either add each file to the zip, or upload individually to Simvue
+            # Go through directory recursively, collecting each file to add to the zip or upload individually to Simvue
             for root, _, file_names in os.walk(
                 dir_path
             ):  # Using os.walk() as pathlib.Path.walk() only available in >=3.12
@@ -76,26 +88,26 @@ class OpenfoamRun(WrappedRun):
                     file_path = pathlib.Path(root).joinpath(file_name)
                     if not file_path:
                         continue
-                    if self.upload_as_zip:
-                        zip_file.write(
-                            file_path,
-                            pathlib.Path(file_path).relative_to(self.openfoam_case_dir),
-                        )
-                    else:
-                        self.save_file(
-                            file_path,
-                            file_type,
-                            name=str(
-                                pathlib.Path(file_path).relative_to(
-                                    self.openfoam_case_dir
-                                )
-                            ),
-                        )
+                    file_paths.append(file_path)
 
         if self.upload_as_zip:
-            zip_file.close()
-            self.save_file(out_zip, file_type)
-            pathlib.Path(out_zip).unlink()
+            with tempfile.TemporaryDirectory(
+                prefix=".simvue_zip_",
+                dir=self.zip_directory or self.openfoam_case_dir,
+            ) as temp_dir:
+                out_zip = pathlib.Path(temp_dir).joinpath(zip_name)
+                write_zip(
+                    out_zip,
+                    [
+                        (file_path, str(file_path.relative_to(self.openfoam_case_dir)))
+                        for file_path in file_paths
+                    ],
+                    compression=self.zip_compression,
+                    compresslevel=self.zip_compression_level,
+                )
+                self._save_files([out_zip], file_type)
+        else:
+            self._save_files(file_paths, file_type, relative_to=self.openfoam_case_dir)
 
     @mp_tail_parser.log_parser
     def _log_parser(
@@ -181,7 +193,7 @@ class OpenfoamRun(WrappedRun):
 
             # Log events for any initial solver info
             if solver_info and line:
-                self.log_event(f"[{current_process}]: {line}")
+                self.log_event(f"[{current_process}]: {line}", source="solver_info")
 
             # Get time, store metrics
             match = exp2.match(line)
@@ -211,8 +223,59 @@ class OpenfoamRun(WrappedRun):
             **self.openfoam_env_vars,
         )
 
+    def _time_directories(self) -> typing.List[str]:
+        """Find the names of the time directories in the case directory.
+
+        Returns
+        -------
+        typing.List[str]
+            The names of the time directories, in order of time
+
+        """
+        return sorted(
+            (
+                dir.name
+                for dir in pathlib.Path(self.openfoam_case_dir).iterdir()
+                if dir.is_dir() and self._time_dir_pattern.match(dir.name)
+            ),
+            key=float,
+        )
+
+    def _watch_time_directories(self):
+        """Upload each time directory once Openfoam has finished writing it, until the simulation finishes.
+
+        Openfoam writes each time directory in full before creating the next one, so every time directory
+        except the latest is complete. The latest time directory is uploaded in _post_simulation. If a time
+        directory fails to upload, the error is logged as an event and the directory is left to be uploaded
+        in _post_simulation, so that one failure does not stop the remaining directories being uploaded.
+        """
+        _failed_time_dirs = set()
+
+        while not self._trigger.wait(self._time_dir_poll_interval):
+            try:
+                time_dirs = self._time_directories()
+            except OSError as e:
+                self.log_event(f"Failed to find time directories: {e}")
+                continue
+
+            for dir_name in time_dirs[:-1]:
+                if (
+                    dir_name in self._uploaded_time_dirs
+                    or dir_name in _failed_time_dirs
+                ):
+                    continue
+                try:
+                    self._save_directory(
+                        [dir_name], f"results_{dir_name}.zip", "output"
+                    )
+                except Exception as e:
+                    self.log_event(f"Failed to upload time directory {dir_name}: {e}")
+                    _failed_time_dirs.add(dir_name)
+                else:
+                    self._uploaded_time_dirs.add(dir_name)
+
     def _during_simulation(self):
-        """Track any log files produced by Openfoam."""
+        """Track any log files produced by Openfoam, and start uploading completed time directories if requested."""
         # Track all log files
         self.file_monitor.tail(
             parser_func=self._log_parser,
@@ -220,13 +283,22 @@ class OpenfoamRun(WrappedRun):
             callback=lambda *_, **__: None,
         )
 
+        if self.upload_during_simulation:
+            self._time_dir_watcher = threading.Thread(
+                target=self._watch_time_directories, daemon=True
+            )
+            self._time_dir_watcher.start()
+
     def _post_simulation(self):
-        """Upload all results found in the Openfoam case directory."""
-        reg_exp = re.compile(r"([\d\.]+)")
+        """Upload all results found in the Openfoam case directory which were not uploaded during the simulation."""
+        if self._time_dir_watcher:
+            self._time_dir_watcher.join()
+            self._time_dir_watcher = None
+
         result_dirs = [
-            dir.name
-            for dir in pathlib.Path(self.openfoam_case_dir).iterdir()
-            if reg_exp.match(dir.name)
+            dir_name
+            for dir_name in self._time_directories()
+            if dir_name not in self._uploaded_time_dirs
         ]
         self._save_directory(result_dirs, "results.zip", "output")
 
@@ -239,6 +311,23 @@ class OpenfoamRun(WrappedRun):
         openfoam_case_dir: pydantic.DirectoryPath,
         upload_as_zip: bool = True,
         openfoam_env_vars: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        zip_compression: typing.Literal[
+            "stored", "deflated", "bzip2", "lzma"
+        ] = "deflated",
+        zip_compression_level: typing.Optional[int] = None,
+        zip_directory: typing.Optional[pydantic.DirectoryPath] = None,
+        upload_during_simulation: bool = False,
+        metrics_buffer_size: int = 100,
+        metrics_flush_interval: float = 1.0,
+        metrics_flush_on_step: bool = False,
+        metric_downsampling: typing.Optional[
+            typing.Dict[str, typing.Dict[str, typing.Any]]
+        ] = None,
+        max_events_per_second: typing.Optional[float] = None,
+        event_rate_limits: typing.Optional[typing.Dict[str, float]] = None,
+        upload_workers: int = 4,
+        upload_retries: int = 3,
+        file_cache_path: typing.Optional[pathlib.Path] = None,
     ):
         """Command to launch the Openfoam simulation and track it with Simvue.
 
@@ -250,10 +339,59 @@ class OpenfoamRun(WrappedRun):
             Whether to upload inputs and outputs as zip files, by default True
         openfoam_env_vars : typing.Optional[typing.Dict[str, typing.Any]], optional
             A dictionary of any environment variables to pass to the Openfoam simulation, by default None
+        zip_compression : typing.Literal["stored", "deflated", "bzip2", "lzma"], optional
+            The compression method to use for zip files, by default "deflated"
+        zip_compression_level : typing.Optional[int], optional
+            The compression level to use for zip files, by default None (the default level for the compression method)
+            Ignored for the "stored" and "lzma" methods.
+        zip_directory : typing.Optional[pydantic.DirectoryPath], optional
+            The directory in which to create zip files before uploading them, by default None (the case directory)
+        upload_during_simulation : bool, optional
+            Whether to upload each time directory in the background as soon as Openfoam has finished writing it,
+            rather than uploading all results after the simulation finishes, by default False
+            If uploading as zip files, each time directory is uploaded as a separate 'results_<time>.zip' file.
+        metrics_buffer_size : int, optional
+            Number of metric records to collect before sending them to Simvue together, by default 100
+            Set to 1 to send each record as soon as it is logged.
+        metrics_flush_interval : float, optional
+            Maximum time in seconds to hold metric records before sending them to Simvue, by default 1.0
+        metrics_flush_on_step : bool, optional
+            Whether to send the metric records held for a step as soon as a record for a later step is logged,
+            by default False
+        metric_downsampling : typing.Optional[typing.Dict[str, typing.Dict[str, typing.Any]]], optional
+            Downsampling strategy for the metrics whose names match each glob pattern, by default None (no downsampling)
+            See WrappedRun.launch() for the available strategies.
+        max_events_per_second : typing.Optional[float], optional
+            Maximum number of events to log per second, above which events are dropped, by default None (no limit)
+        event_rate_limits : typing.Optional[typing.Dict[str, float]], optional
+            Maximum number of events to log per second from each named event source, by default None (no limits)
+            Events are logged from the source 'solver_info'.
+        upload_workers : int, optional
+            Maximum number of files to upload to Simvue at once, by default 4
+        upload_retries : int, optional
+            Number of times to retry uploading a file which fails to upload, by default 3
+        file_cache_path : typing.Optional[pathlib.Path], optional
+            Path to a file recording which file contents are already stored on the server, by default None (no cache)
+            Use the same path for every run in a sweep to log how many of each run's files the server already held.
 
         """
         self.openfoam_case_dir = openfoam_case_dir
         self.upload_as_zip = upload_as_zip
+        self.zip_compression = zip_compression
+        self.zip_compression_level = zip_compression_level
+        self.zip_directory = zip_directory
+        self.upload_during_simulation = upload_during_simulation
+        self._uploaded_time_dirs = set()
         self.openfoam_env_vars = openfoam_env_vars or {}
 
-        super().launch()
+        super().launch(
+            metrics_buffer_size=metrics_buffer_size,
+            metrics_flush_interval=metrics_flush_interval,
+            metrics_flush_on_step=metrics_flush_on_step,
+            metric_downsampling=metric_downsampling,
+            max_events_per_second=max_events_per_second,
+            event_rate_limits=event_rate_limits,
+            upload_workers=upload_workers,
+            upload_retries=upload_retries,
+            file_cache_path=file_cache_path,
+        )
@@ -0,0 +1,208 @@
+"""Sweep.
+
+Launch many simulation cases concurrently with a connector, tracking each case in its own Simvue run.
+"""
+
+import asyncio
+import functools
+import os
+import sys
+import time
+import typing
+
+import click
+
+from simvue_integrations.connectors.generic import WrappedRun
+
+
+class CaseResult(typing.NamedTuple):
+    """Outcome of a single case in a sweep."""
+
+    name: str
+    run_id: typing.Optional[str]
+    succeeded: bool
+    duration: float
+    error: typing.Optional[str]
+
+
+class Sweep:
+    """Launch a set of cases with a connector, running a bounded number of cases at once.
+
+    Every case is tracked by its own Simvue run in a shared folder. The files of all running cases are monitored
+    from a single event loop using WrappedRun.launch_async(), while the simulations themselves run as separate
+    processes, so the number of cases running at once is limited by the number of worker slots rather than by Python.
+    A case which fails is recorded in the results and does not stop the remaining cases.
+
+    Eg:
+
+    sweep = Sweep(FDSRun, folder="/fds_sweep")
+    results = sweep.launch(
+        {
+            "case_1": {"fds_input_file_path": "case_1.fds", "workdir_path": "case_1"},
+            "case_2": {"fds_input_file_path": "case_2.fds", "workdir_path": "case_2"},
+        }
+    )
+    """
+
+    def __init__(
+        self,
+        run_class: typing.Type[WrappedRun],
+        folder: str,
+        max_parallel_cases: typing.Optional[int] = None,
+        processes_per_case: int = 1,
+        run_kwargs: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        init_kwargs: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ):
+        """Initialize the sweep.
+
+        Parameters
+        ----------
+        run_class : typing.Type[WrappedRun]
+            The connector used to launch and track each case
+        folder : str
+            The Simvue folder to create the run for every case in
+        max_parallel_cases : typing.Optional[int], optional
+            Maximum number of cases to run at once, by default None
+            Uses the number of CPU cores divided by processes_per_case by default.
+        processes_per_case : int, optional
+            Number of cores used by each case, such as the number of MPI processes or threads, by default 1
+        run_kwargs : typing.Optional[typing.Dict[str, typing.Any]], optional
+            Arguments used to create the run for every case, such as the mode, by default None
+        init_kwargs : typing.Optional[typing.Dict[str, typing.Any]], optional
+            Arguments passed to run.init() for every case, such as tags, by default None
+
+        """
+        self._run_class = run_class
+        self.folder = folder
+        self.max_parallel_cases = max_parallel_cases or max(
+            1, (os.cpu_count() or 1) // processes_per_case
+        )
+        self._run_kwargs = run_kwargs or {}
+        self._init_kwargs = init_kwargs or {}
+        self.results: typing.List[CaseResult] = []
+        self.sweep_time: float = 0.0
+
+    async def _launch_case(
+        self,
+        slots: asyncio.Semaphore,
+        name: str,
+        launch_kwargs: typing.Dict[str, typing.Any],
+    ) -> CaseResult:
+        """Launch a single case once a worker slot is free, returning its outcome rather than raising any error.
+
+        Parameters
+        ----------
+        slots : asyncio.Semaphore
+            The worker slots shared by all cases
+        name : str
+            The name of the case, used as the name of its run
+        launch_kwargs : typing.Dict[str, typing.Any]
+            Arguments passed to run.launch() for this case
+
+        Returns
+        -------
+        CaseResult
+            The outcome of the case
+
+        """
+        _loop = asyncio.get_running_loop()
+        async with slots:
+            _start_time = time.monotonic()
+            run = self._run_class(**self._run_kwargs)
+            _exc_info = (None, None, None)
+            try:
+                await _loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        run.init, name=name, folder=self.folder, **self._init_kwargs
+                    ),
+                )
+                await run.launch_async(**launch_kwargs)
+            except Exception:
+                _exc_info = sys.exc_info()
+
+            # Closing the run marks it as failed if an exception was raised, and exits if the simulation process failed
+            try:
+                await _loop.run_in_executor(None, run.__exit__, *_exc_info)
+            except (Exception, SystemExit):
+                _exc_info = _exc_info if _exc_info[0] else sys.exc_info()
+
+        _error = f"{_exc_info[0].__name__}: {_exc_info[1]}" if _exc_info[0] else None
+        if _error:
+            click.secho(
+                f"[simvue] Case '{name}' failed: {_error}",
+                fg="red" if run._term_color else None,
+                bold=run._term_color,
+            )
+        return CaseResult(
+            name=name,
+            run_id=run.id,
+            succeeded=_error is None,
+            duration=time.monotonic() - _start_time,
+            error=_error,
+        )
+
+    async def launch_async(
+        self, cases: typing.Dict[str, typing.Dict[str, typing.Any]]
+    ) -> typing.List[CaseResult]:
+        """Launch every case from the running event loop, returning once all cases have finished.
+
+        Parameters
+        ----------
+        cases : typing.Dict[str, typing.Dict[str, typing.Any]]
+            The arguments to pass to run.launch() for each case, keyed by the name of the case
+
+        Returns
+        -------
+        typing.List[CaseResult]
+            The outcome of each case, in the order the cases were given
+
+        """
+        _slots = asyncio.Semaphore(self.max_parallel_cases)
+        _start_time = time.monotonic()
+        _results = await asyncio.gather(
+            *[
+                self._launch_case(_slots, name, launch_kwargs)
+                for name, launch_kwargs in cases.items()
+            ]
+        )
+        self.sweep_time += time.monotonic() - _start_time
+        self.results += _results
+        return list(_results)
+
+    def launch(
+        self, cases: typing.Dict[str, typing.Dict[str, typing.Any]]
+    ) -> typing.List[CaseResult]:
+        """Launch every case, returning once all cases have finished.
+
+        Parameters
+        ----------
+        cases : typing.Dict[str, typing.Dict[str, typing.Any]]
+            The arguments to pass to run.launch() for each case, keyed by the name of the case
+
+        Returns
+        -------
+        typing.List[CaseResult]
+            The outcome of each case, in the order the cases were given
+
+        """
+        _results = asyncio.run(self.launch_async(cases))
+        click.secho(f"[simvue] {self.summary()}")
+        return _results
+
+    def summary(self) -> str:
+        """Describe the number of cases run and failed, and the throughput of completed cases.
+
+        Returns
+        -------
+        str
+            The summary message
+
+        """
+        _failed = sum(not result.succeeded for result in self.results)
+        _hours = self.sweep_time / 3600
+        _throughput = (len(self.results) - _failed) / _hours if _hours else 0.0
+        return (
+            f"Ran {len(self.results)} case{'s' if len(self.results) != 1 else ''} "
+            f"({_failed} failed) in {self.sweep_time:.1f} s ({_throughput:.1f} cases/hour)."
+        )
@@ -4,18 +4,76 @@ Generic callback class which can be used in any Tensorflow Keras CNN to automati
 """
 
 import inspect
+import logging
 import pathlib
 import typing
 
 import simvue
+import tensorflow as tf
 from tensorflow.keras.callbacks import Callback
 
 import simvue_integrations.extras.validators as validators
+from simvue_integrations.extras.checkpoint_uploader import CheckpointUploader
+from simvue_integrations.extras.dispatch_queue import DispatchPolicy, DispatchQueue
+from simvue_integrations.extras.interval_aggregator import (
+    Aggregation,
+    IntervalAggregator,
+)
+from simvue_integrations.extras.metric_selection import MetricSelector
+from simvue_integrations.extras.run_pool import RunPool
+from simvue_integrations.extras.upload_memo import UploadMemo
+
+logger = logging.getLogger(__name__)
+
+
+def _minimum(a: typing.Any, b: typing.Any) -> typing.Any:
+    """Get the smaller of two metric values, without copying tensors from the device they are on.
+
+    Parameters
+    ----------
+    a : typing.Any
+        The first value, a number or a tensor
+    b : typing.Any
+        The second value, a number or a tensor
+
+    Returns
+    -------
+    typing.Any
+        The smaller value
+
+    """
+    return tf.minimum(a, b) if tf.is_tensor(a) or tf.is_tensor(b) else min(a, b)
+
+
+def _maximum(a: typing.Any, b: typing.Any) -> typing.Any:
+    """Get the larger of two metric values, without copying tensors from the device they are on.
+
+    Parameters
+    ----------
+    a : typing.Any
+        The first value, a number or a tensor
+    b : typing.Any
+        The second value, a number or a tensor
+
+    Returns
+    -------
+    typing.Any
+        The larger value
+
+    """
+    return tf.maximum(a, b) if tf.is_tensor(a) or tf.is_tensor(b) else max(a, b)
 
 
 class TensorVue(simvue.Run, Callback):
     """Tensorflow Callback class for adding Simvue integration."""
 
+    # Receive batch logs as tensors rather than copying them to the host every batch. This is only read by tf.keras 2
+    # (tensorflow < 2.16, or with TF_USE_LEGACY_KERAS); Keras 3 ignores it, so under Keras 3 batch logs arrive however
+    # Keras passes them. The batch handlers accept both tensors and Python numbers, so either is handled.
+    _supports_tf_logs: bool = True
+    # Shared by every instance, so that the same script and model config are only uploaded once to each run
+    _upload_memo: UploadMemo = UploadMemo()
+
     def __init__(
         self,
         run_name: typing.Optional[str] = None,
@@ -35,10 +93,18 @@ class TensorVue(simvue.Run, Callback):
         script_filepath: str = inspect.stack()[-1].filename,
         model_checkpoint_filepath: typing.Optional[str] = None,
         model_final_filepath: str = "/tmp/simvue/final_model.keras",
+        checkpoint_chunk_size: typing.Optional[int] = None,
         evaluation_parameter: str = None,
         evaluation_target: float = None,
         evaluation_condition: validators.Operator = None,
         create_epoch_runs: typing.Optional[bool] = True,
+        prepare_epoch_runs: bool = True,
+        dispatch_queue_size: int = 10000,
+        dispatch_policy: DispatchPolicy = "block",
+        batch_log_interval: int = 1,
+        batch_aggregation: Aggregation = "mean",
+        metrics_include: typing.Optional[list[str]] = None,
+        metrics_exclude: typing.Optional[list[str]] = None,
         optimisation_framework: bool = False,
         simulation_run: typing.Optional[simvue.Run] = None,
         evaluation_run: typing.Optional[simvue.Run] = None,
@@ -81,6 +147,11 @@ class TensorVue(simvue.Run, Callback):
             If using the ModelCheckpoint callback, the path where the checkpoint files are saved after each epoch, by default None
         model_final_filepath : str, optional
             The location where the final model should be stored after training is complete, by default "/tmp/simvue/final_model.keras"
+        checkpoint_chunk_size: typing.Optional[int], optional
+            Approximate average size in bytes of the chunks to split the checkpoints and final model into when uploading,
+            so that only chunks which have changed since the last upload are sent, by default None (upload whole files)
+            Each file is then saved as its chunks and a manifest, which simvue_integrations.extras.checkpoint_uploader.rebuild_chunked_file
+            rebuilds the file from. Only used in online mode.
         evaluation_parameter: str, optional
             The parameter to check the value of after each Epoch, eitheer accuracy, loss, val_accuracy, or val_loss
         evaluation_target: float, optional
@@ -89,6 +160,30 @@ class TensorVue(simvue.Run, Callback):
             How you wish to compare the latest value of the parameter to the target value
         create_epoch_runs: typing.Optional[bool], optional
             Whether to create runs for the training data for each Epoch individually, by default True
+        prepare_epoch_runs: bool, optional
+            Whether to create the run for each Epoch in the background during the previous Epoch, by default True
+            Only used when running online. Epoch runs are always closed in the background, so that training is not
+            paused while they are created or closed.
+        dispatch_queue_size: int, optional
+            Maximum number of batch and epoch metrics and events waiting to be logged, by default 10000
+            These are logged by a background thread, so that training is not paused while they are sent to Simvue.
+        dispatch_policy: DispatchPolicy, optional
+            What to do with new metrics and events when the queue of those waiting to be logged is full, by default "block"
+            Either "block" to pause training until there is space, "drop" to discard them, or "sample" to keep one in
+            every ten once the queue is half full. The number of calls dropped is logged as an event once training
+            or evaluation ends.
+        batch_log_interval: int, optional
+            Number of training, validation or evaluation batches to aggregate the accuracy and loss over before
+            logging them as metrics, by default 1
+            Values are aggregated without copying them from the device, so longer intervals reduce the overhead of
+            logging for small batches. Metrics logged at the end of each epoch are not affected.
+        batch_aggregation: Aggregation, optional
+            How to aggregate batch metrics over each interval, either "mean", "min", "max" or "last", by default "mean"
+        metrics_include: typing.Optional[list[str]], optional
+            Glob patterns of the names of the metrics in the Keras logs to upload, by default None (upload all metrics)
+            Validation metrics are named with the prefix 'val_', as in the logs at the end of each epoch.
+        metrics_exclude: typing.Optional[list[str]], optional
+            Glob patterns of the names of metrics not to upload, which take precedence over metrics_include, by default None
         optimisation_framework : bool, optional
             Whether to use the Simvue ML Optimisation framework, by default False
         simulation_run : typing.Optional[simvue.Run], optional
@@ -124,6 +219,30 @@ class TensorVue(simvue.Run, Callback):
         self.evaluation_condition = evaluation_condition
         self.evaluation_target = evaluation_target
         self.create_epoch_runs = create_epoch_runs
+        self.prepare_epoch_runs = prepare_epoch_runs
+        self._dispatch_queue = DispatchQueue(
+            max_size=dispatch_queue_size,
+            policy=dispatch_policy,
+            exception_callback=logger.error,
+        )
+        self._calls_dropped_logged: int = 0
+        self._train_batch_aggregator = IntervalAggregator(
+            batch_log_interval, batch_aggregation, _minimum, _maximum
+        )
+        self._test_batch_aggregator = IntervalAggregator(
+            batch_log_interval, batch_aggregation, _minimum, _maximum
+        )
+        self._last_train_batch: int = 0
+        self._metric_selector = MetricSelector(
+            metrics_include, metrics_exclude, ignore_keys=("batch", "size")
+        )
+        self._previous_epoch_metrics: typing.Dict[str, typing.Any] = {}
+        self._last_test_batch: int = 0
+        self._checkpoint_uploader = CheckpointUploader(
+            keep_snapshots=run_mode == "offline",
+            exception_callback=logger.error,
+            chunk_size=checkpoint_chunk_size,
+        )
         self.optimisation_framework = optimisation_framework
         self.simulation_run = simulation_run
         self.eval_run = evaluation_run
@@ -138,6 +257,9 @@ class TensorVue(simvue.Run, Callback):
         self.epoch_alerts = epoch_alerts or []
         self.evaluation_alerts = evaluation_alerts or []
         self.start_alerts_from_epoch = start_alerts_from_epoch
+        # Alerts are only created once, and their IDs are added to every later epoch run
+        self._epoch_alert_ids: typing.Optional[list[str]] = None
+        self._epoch_run_pool: typing.Optional[RunPool] = None
 
         for alert_name in (
             self.simulation_alerts
@@ -178,12 +300,125 @@ class TensorVue(simvue.Run, Callback):
             )
 
         if self.script_filepath:
-            manifest_run.save_file(
+            self._upload_memo.save_file(
+                manifest_run,
                 file_path=self.script_filepath,
                 category="code",
             )
         return manifest_run
 
+    def _log_batch_metrics(
+        self,
+        run: simvue.Run,
+        metrics: typing.Dict[str, typing.Any],
+        step: int,
+        timestamp: str,
+    ):
+        """Log aggregated batch metrics to a run, only copying the values from the device now.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to log the metrics to
+        metrics : typing.Dict[str, typing.Any]
+            The aggregated value of each metric, a number or a tensor
+        step : int
+            The last batch which the metrics were aggregated over
+        timestamp : str
+            The time when the last batch ended
+
+        """
+        run.log_metrics(
+            {name: float(value) for name, value in metrics.items()},
+            step=step,
+            timestamp=timestamp,
+        )
+
+    def _log_dropped_calls(self, run: simvue.Run) -> None:
+        """Log a warning and an event on a run if the dispatch queue has dropped calls since this was last logged.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to log the event to
+
+        """
+        _dropped = self._dispatch_queue.calls_dropped - self._calls_dropped_logged
+        if not _dropped:
+            return
+        self._calls_dropped_logged += _dropped
+        _message = (
+            f"Dispatch queue was full: {_dropped} metric and event "
+            f"call{'s' if _dropped != 1 else ''} dropped."
+        )
+        logger.warning(_message)
+        run.log_event(_message)
+
+    def _queue_batch_metrics(
+        self,
+        run: simvue.Run,
+        metrics: typing.Optional[typing.Dict[str, typing.Any]],
+        step: int,
+    ) -> None:
+        """Queue aggregated batch metrics to be logged to a run in the background.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to log the metrics to
+        metrics : typing.Optional[typing.Dict[str, typing.Any]]
+            The aggregated value of each metric, or None if there is nothing to log
+        step : int
+            The last batch which the metrics were aggregated over
+
+        """
+        if not metrics:
+            return
+        self._dispatch_queue.put(
+            self._log_batch_metrics, run, metrics, step, self.time_stamp
+        )
+
+    def _create_epoch_run(self, epoch: int, running: bool) -> simvue.Run:
+        """Create the run for an epoch, with the alerts defined for epoch runs.
+
+        Parameters
+        ----------
+        epoch : int
+            The epoch which the run will track
+        running : bool
+            Whether to start the run immediately, or leave it in the created state until the epoch begins
+
+        Returns
+        -------
+        simvue.Run
+            The epoch run
+
+        """
+        epoch_run = simvue.Run(mode=self.run_mode)
+        epoch_run.init(
+            name=self.run_name + f"_epoch_{epoch+1}",
+            folder=self.run_folder,
+            description=f"Tracking the training performed during Epoch {epoch+1}.",
+            tags=self.run_tags + ["epoch", "training"],
+            metadata=self.run_metadata,
+            running=running,
+        )
+
+        if epoch + 1 >= self.start_alerts_from_epoch and self.epoch_alerts:
+            if self._epoch_alert_ids:
+                epoch_run.add_alerts(ids=self._epoch_alert_ids)
+            else:
+                _alert_ids = [
+                    epoch_run.create_alert(
+                        name=alert_name, **self.alert_definitions[alert_name]
+                    )
+                    for alert_name in self.epoch_alerts
+                ]
+                if self.run_mode == "online" and all(_alert_ids):
+                    self._epoch_alert_ids = _alert_ids
+
+        return epoch_run
+
     def on_train_begin(self, logs: dict):
         """Upload relevant information to Simvue at the start of the training session.
 
@@ -238,15 +473,24 @@ class TensorVue(simvue.Run, Callback):
             )
 
         if self.script_filepath:
-            self.simulation_run.save_file(
+            self._upload_memo.save_file(
+                self.simulation_run,
                 file_path=self.script_filepath,
                 category="code",
             )
-        model_config = self.model.get_config()
-        self.simulation_run.save_object(
-            obj=model_config,
+        if self.create_epoch_runs:
+            self._epoch_run_pool = RunPool(
+                self._create_epoch_run,
+                prepare_ahead=self.prepare_epoch_runs and self.run_mode == "online",
+            )
+
+        # The config is only retrieved from the model the first time it is saved, for as long as the model exists
+        self._upload_memo.save_object(
+            self.simulation_run,
+            obj=self.model.get_config,
             category="input",
             name="model_config",
+            source=self.model,
         )
 
     def on_train_end(self, logs: dict):
@@ -258,6 +502,10 @@ class TensorVue(simvue.Run, Callback):
             The output from the final call of on_epoch_end
 
         """
+        # Log everything still queued before any runs are closed
+        self._dispatch_queue.stop()
+        self._log_dropped_calls(self.simulation_run)
+
         if self.model_final_filepath:
             if not pathlib.Path(self.model_final_filepath).exists():
                 print(
@@ -265,15 +513,25 @@ class TensorVue(simvue.Run, Callback):
                 )
                 pathlib.Path(self.model_final_filepath).parent.mkdir(exist_ok=True)
             self.model.save(self.model_final_filepath)
-            self.simulation_run.save_file(
-                file_path=self.model_final_filepath,
-                category="output",
+            # Nothing writes to the final model after this, so it is uploaded while the epoch runs are closed
+            self._checkpoint_uploader.upload(
+                self.simulation_run,
+                self.model_final_filepath,
                 name="final_model.keras",
+                snapshot=False,
             )
-        if not self.optimisation_framework:
-            self.simulation_run.close()
+        # The simulation run is closed even if an epoch run failed, after which the failure is raised again
+        try:
+            if self._epoch_run_pool:
+                self._epoch_run_pool.shutdown()
+        finally:
+            self._epoch_run_pool = None
+            self._checkpoint_uploader.shutdown()
 
-        self.simulation_run = None
+            if not self.optimisation_framework:
+                self.simulation_run.close()
+
+            self.simulation_run = None
 
     def on_epoch_begin(self, epoch: int, logs: dict) -> None:
         """Upload relevant information to Simvue at the start of a new epoch.
@@ -296,21 +554,10 @@ class TensorVue(simvue.Run, Callback):
         if not self.create_epoch_runs:
             return
 
-        self.epoch_run = simvue.Run(mode=self.run_mode)
-        self.epoch_run.init(
-            name=self.run_name + f"_epoch_{epoch+1}",
-            folder=self.run_folder,
-            description=f"Tracking the training performed during Epoch {epoch+1}.",
-            tags=self.run_tags + ["epoch", "training"],
-            metadata=self.run_metadata,
+        self.epoch_run = self._epoch_run_pool.get(
+            epoch, prepare_next=epoch + 1 < self.params.get("epochs", 0)
         )
 
-        if epoch + 1 >= self.start_alerts_from_epoch:
-            for alert_name in self.epoch_alerts:
-                self.epoch_run.create_alert(
-                    name=alert_name, **self.alert_definitions[alert_name]
-                )
-
         if epoch > 0:
             self.epoch_run.log_event("Accuracy and Loss values before epoch training:")
             self.epoch_run.log_event(f"Accuracy: {self.accuracy}, Loss: {self.loss}")
@@ -338,11 +585,7 @@ class TensorVue(simvue.Run, Callback):
             Raised if an evalation parameter has been specified for early stopping, but this cannot be found in the logs
 
         """
-        available_metrics = (
-            ["accuracy", "loss", "val_accuracy", "val_loss"]
-            if logs.get("val_accuracy") and logs.get("val_loss")
-            else ["accuracy", "loss"]
-        )
+        metrics = self._metric_selector.select(logs)
         runs_to_update = (
             (self.epoch_run, self.simulation_run)
             if self.create_epoch_runs
@@ -363,24 +606,28 @@ class TensorVue(simvue.Run, Callback):
                 "Improvements in Accuracy and Loss after epoch training:"
             )
 
-        for metric in available_metrics:
-            value = logs.get(metric)
-            self.simulation_run.log_metrics({metric: value}, step=epoch + 1)
-            if not self.create_epoch_runs:
-                continue
-            elif epoch > 0:
-                change: float = value - getattr(self, metric)
-                if (metric in ["accuracy", "val_accuracy"] and change > 0) or (
-                    metric in ["loss", "val_loss"] and change < 0
-                ):
-                    improved: bool = True
-                else:
-                    improved = False
-
+        self._dispatch_queue.put(
+            self.simulation_run.log_metrics,
+            metrics,
+            step=epoch + 1,
+            timestamp=self.time_stamp,
+        )
+        if self.create_epoch_runs:
+            for metric, value in metrics.items():
+                if (previous := self._previous_epoch_metrics.get(metric)) is None:
+                    continue
+                change: float = value - previous
+                # Lower values of losses and errors are improvements, and higher values of all other metrics
+                improved: bool = (
+                    change < 0 if "loss" in metric or "error" in metric else change > 0
+                )
                 self.epoch_run.log_event(
                     f"Improved {metric}: {improved}. Change in {metric}: {change}"
                 )
-            self.epoch_run.update_metadata({f"final_{metric}": value})
+            self.epoch_run.update_metadata(
+                {f"final_{metric}": value for metric, value in metrics.items()}
+            )
+        self._previous_epoch_metrics = metrics
 
         self.accuracy = logs.get("accuracy")
         self.loss = logs.get("loss")
@@ -388,16 +635,29 @@ class TensorVue(simvue.Run, Callback):
         self.val_loss = logs.get("val_loss")
 
         if self.create_epoch_runs:
+            self._queue_batch_metrics(
+                self.epoch_run,
+                self._train_batch_aggregator.flush(),
+                self._last_train_batch,
+            )
+            _checkpoint_upload = None
             if self.model_checkpoint_filepath:
                 if not pathlib.Path(self.model_checkpoint_filepath).exists():
                     raise FileNotFoundError(
                         f"Model checkpoint has not been created at {self.model_checkpoint_filepath}. Have you enabled the ModelCheckpoint callback? "
                     )
-                self.epoch_run.save_file(
-                    self.model_checkpoint_filepath, category="output"
+                # Uploaded from a snapshot in the background, and skipped if unchanged since the last epoch
+                _checkpoint_upload = self._checkpoint_uploader.upload(
+                    self.epoch_run, self.model_checkpoint_filepath
                 )
 
-            self.epoch_run.close()
+            # Released once the metrics and events already queued for this epoch run have been logged,
+            # and closed once its checkpoint has been uploaded
+            self._dispatch_queue.put_required(
+                self._epoch_run_pool.release,
+                self.epoch_run,
+                wait_for=[_checkpoint_upload] if _checkpoint_upload else None,
+            )
         if all(
             (
                 self.evaluation_condition,
@@ -438,8 +698,10 @@ class TensorVue(simvue.Run, Callback):
         if int((batch) / (self.params.get("steps") / 10)) != int(
             (batch + 1) / (self.params.get("steps") / 10)
         ):
-            self.epoch_run.log_event(
-                f"Training is {10* int((batch) / (self.params.get('steps') / 10))}% complete."
+            self._dispatch_queue.put(
+                self.epoch_run.log_event,
+                f"Training is {10* int((batch) / (self.params.get('steps') / 10))}% complete.",
+                timestamp=self.time_stamp,
             )
 
     def on_train_batch_end(self, batch: int, logs: dict) -> None:
@@ -460,11 +722,11 @@ class TensorVue(simvue.Run, Callback):
         """
         if not self.create_epoch_runs:
             return
-        self.epoch_run.log_metrics(
-            {
-                "accuracy": logs.get("accuracy"),
-                "loss": logs.get("loss"),
-            }
+        self._last_train_batch = batch
+        self._queue_batch_metrics(
+            self.epoch_run,
+            self._train_batch_aggregator.add(self._metric_selector.select(logs)),
+            batch,
         )
 
     def on_test_begin(self, logs: dict):
@@ -512,15 +774,17 @@ class TensorVue(simvue.Run, Callback):
                 )
 
             if self.script_filepath:
-                self.eval_run.save_file(
+                self._upload_memo.save_file(
+                    self.eval_run,
                     file_path=self.script_filepath,
                     category="code",
                 )
-            model_config = self.model.get_config()
-            self.eval_run.save_object(
-                obj=model_config,
+            self._upload_memo.save_object(
+                self.eval_run,
+                obj=self.model.get_config,
                 category="input",
                 name="model_config",
+                source=self.model,
             )
 
     def on_test_end(self, logs: dict):
@@ -532,7 +796,21 @@ class TensorVue(simvue.Run, Callback):
             Aggregated accuracy/loss metrics for the test, output from the final call of on_test_batch_end
 
         """
-        if not self.simulation_run:
+        if self.simulation_run:
+            if self.create_epoch_runs:
+                self._queue_batch_metrics(
+                    self.epoch_run,
+                    self._test_batch_aggregator.flush(),
+                    self._last_test_batch,
+                )
+        else:
+            self._queue_batch_metrics(
+                self.eval_run,
+                self._test_batch_aggregator.flush(),
+                self._last_test_batch,
+            )
+            self._dispatch_queue.stop()
+            self._log_dropped_calls(self.eval_run)
             self.eval_run.log_event("Accuracy and Loss values after evaluation:")
             self.eval_run.log_event(
                 f"Accuracy: {logs.get('accuracy')}, Loss: {logs.get('loss')}"
@@ -558,8 +836,10 @@ class TensorVue(simvue.Run, Callback):
             if int((batch) / (self.params.get("steps") / 10)) != int(
                 (batch + 1) / (self.params.get("steps") / 10)
             ):
-                self.eval_run.log_event(
-                    f"Evaluation is {10* int((batch) / (self.params.get('steps') / 10))}% complete."
+                self._dispatch_queue.put(
+                    self.eval_run.log_event,
+                    f"Evaluation is {10* int((batch) / (self.params.get('steps') / 10))}% complete.",
+                    timestamp=self.time_stamp,
                 )
 
     def on_test_batch_end(self, batch: int, logs: dict):
@@ -573,19 +853,15 @@ class TensorVue(simvue.Run, Callback):
             Aggregated metrics for this evaluation up to this batch, such as accuracy and loss
 
         """
-        if self.simulation_run:
-            if self.create_epoch_runs:
-                self.epoch_run.log_metrics(
-                    {
-                        "val_accuracy": logs.get("accuracy"),
-                        "val_loss": logs.get("loss"),
-                    },
-                    step=batch,
-                )
-        else:
-            self.eval_run.log_metrics(
-                {
-                    "accuracy": logs.get("accuracy"),
-                    "loss": logs.get("loss"),
-                }
+        if self.create_epoch_runs or not self.simulation_run:
+            self._last_test_batch = batch
+            self._queue_batch_metrics(
+                self.epoch_run if self.simulation_run else self.eval_run,
+                self._test_batch_aggregator.add(
+                    # Validation metrics are logged with the same names as at the end of each epoch
+                    self._metric_selector.select(
+                        logs, prefix="val_" if self.simulation_run else ""
+                    )
+                ),
+                batch,
             )
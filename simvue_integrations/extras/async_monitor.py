@@ -0,0 +1,288 @@
+"""Async File Monitor.
+
+File monitor which runs on an asyncio event loop, so that many simulations can be monitored from a single thread.
+"""
+
+import asyncio
+import glob
+import os.path
+import typing
+
+import multiparser.parsing as mp_parse
+
+
+class AsyncFileMonitor:
+    """Monitor files for changes from a coroutine, with the same track, tail and exclude interface as multiparser.FileMonitor.
+
+    Rather than starting a thread for each monitored file, every file is polled in turn from the coroutine returned
+    by run(). Parsing is passed to the event loop's default executor, so that the loop is not blocked while a large
+    file is parsed, and is shared between all monitors running on that loop, so parsers and callbacks still run in
+    executor threads.
+
+    Files are parsed with multiparser.parsing.record_log and record_file, which are the internals multiparser's own
+    file monitor threads call, rather than part of its documented interface. They were tested with
+    ukaea-multiparser 1.0.4, and may need updating if their arguments or return values change in later versions.
+    """
+
+    def __init__(
+        self,
+        termination_trigger: typing.Any,
+        exception_callback: typing.Optional[typing.Callable[[str], typing.Any]] = None,
+        interval: float = 0.1,
+        flatten_data: bool = False,
+    ):
+        """Initialize the file monitor.
+
+        Parameters
+        ----------
+        termination_trigger : typing.Any
+            Event which, once set, causes the monitor to parse any final changes to files and then stop
+        exception_callback : typing.Optional[typing.Callable[[str], typing.Any]], optional
+            Function called with a message if parsing a file fails, by default None
+        interval : float, optional
+            Time in seconds between checks for new or modified files, by default 0.1
+        flatten_data : bool, optional
+            Whether to convert data to a single level dictionary of key-value pairs, by default False
+
+        """
+        self._termination_trigger = termination_trigger
+        self._exception_callback = exception_callback
+        self._interval = interval
+        self._flatten_data = flatten_data
+        self._trackables: typing.List[typing.Dict[str, typing.Any]] = []
+        self._excluded_patterns: typing.List[str] = []
+        # Modification time and cached metadata of each file found, for each trackable
+        self._file_states: typing.Dict[
+            typing.Tuple[int, str], typing.Dict[str, typing.Any]
+        ] = {}
+
+    def exclude(self, path_glob_exprs: typing.Union[typing.List[str], str]):
+        """Exclude a set of files from monitoring.
+
+        Parameters
+        ----------
+        path_glob_exprs : typing.Union[typing.List[str], str]
+            Globular expression(s) defining files to exclude from monitoring
+
+        """
+        if isinstance(path_glob_exprs, str):
+            path_glob_exprs = [path_glob_exprs]
+        self._excluded_patterns += path_glob_exprs
+
+    def track(
+        self,
+        *,
+        path_glob_exprs: typing.Union[typing.List[str], str],
+        tracked_values: typing.Optional[typing.List[typing.Any]] = None,
+        callback: typing.Optional[typing.Callable] = None,
+        parser_func: typing.Optional[typing.Callable] = None,
+        parser_kwargs: typing.Optional[typing.Dict] = None,
+        static: bool = False,
+        file_type: typing.Optional[str] = None,
+    ):
+        """Track a set of files, reading the whole file each time it is modified.
+
+        Parameters
+        ----------
+        path_glob_exprs : typing.Union[typing.List[str], str]
+            Globular expression(s) defining files to monitor
+        tracked_values : typing.Optional[typing.List[typing.Any]], optional
+            Regular expressions or strings defining keys to keep from the parsed data, by default None
+        callback : typing.Optional[typing.Callable], optional
+            Function called with the data and metadata parsed from the file, by default None
+        parser_func : typing.Optional[typing.Callable], optional
+            Custom parser function, decorated with multiparser.parsing.file_parser, by default None
+        parser_kwargs : typing.Optional[typing.Dict], optional
+            Arguments to pass to the parser function, by default None
+        static : bool, optional
+            Whether the file is only written once, and so only needs to be parsed once, by default False
+        file_type : typing.Optional[str], optional
+            Override the file extension when choosing a built in parser, by default None
+
+        """
+        if isinstance(path_glob_exprs, str):
+            path_glob_exprs = [path_glob_exprs]
+
+        self._trackables += [
+            {
+                "glob_expr": glob_expr,
+                "tail": False,
+                "tracked_values": tracked_values,
+                "callback": callback,
+                "parser_func": parser_func,
+                "parser_kwargs": parser_kwargs,
+                "static": static,
+                "file_type": file_type,
+            }
+            for glob_expr in path_glob_exprs
+        ]
+
+    def tail(
+        self,
+        *,
+        path_glob_exprs: typing.Union[typing.List[str], str],
+        tracked_values: typing.Optional[typing.List[typing.Any]] = None,
+        skip_lines_w_pattern: typing.Optional[typing.List[typing.Any]] = None,
+        labels: typing.Optional[typing.List[typing.Optional[str]]] = None,
+        callback: typing.Optional[typing.Callable] = None,
+        parser_func: typing.Optional[typing.Callable] = None,
+        parser_kwargs: typing.Optional[typing.Dict] = None,
+    ):
+        """Tail a set of files, reading only the content added since the file was last read.
+
+        Parameters
+        ----------
+        path_glob_exprs : typing.Union[typing.List[str], str]
+            Globular expression(s) defining files to monitor
+        tracked_values : typing.Optional[typing.List[typing.Any]], optional
+            Regular expressions or strings defining values to capture from each line, by default None
+        skip_lines_w_pattern : typing.Optional[typing.List[typing.Any]], optional
+            Regular expressions or strings defining lines which should be skipped, by default None
+        labels : typing.Optional[typing.List[typing.Optional[str]]], optional
+            Label to assign to the value captured by each of the tracked values, by default None
+        callback : typing.Optional[typing.Callable], optional
+            Function called with the data and metadata parsed from the file, by default None
+        parser_func : typing.Optional[typing.Callable], optional
+            Custom parser function, decorated with multiparser.parsing.log_parser, by default None
+        parser_kwargs : typing.Optional[typing.Dict], optional
+            Arguments to pass to the parser function, by default None
+
+        Raises
+        ------
+        AssertionError
+            Raised if the number of labels does not match the number of tracked values
+
+        """
+        if isinstance(path_glob_exprs, str):
+            path_glob_exprs = [path_glob_exprs]
+
+        _label_value_pairs = None
+        if tracked_values and not parser_func:
+            if labels and len(labels) != len(tracked_values):
+                raise AssertionError(
+                    "Number of labels must match number of regular expressions in 'tail'."
+                )
+            _label_value_pairs = list(
+                zip(labels or [None] * len(tracked_values), tracked_values)
+            )
+
+        if skip_lines_w_pattern:
+            parser_kwargs = (parser_kwargs or {}) | {
+                "ignore_lines": skip_lines_w_pattern
+            }
+
+        self._trackables += [
+            {
+                "glob_expr": glob_expr,
+                "tail": True,
+                "tracked_values": _label_value_pairs,
+                "callback": callback,
+                "parser_func": parser_func,
+                "parser_kwargs": parser_kwargs,
+                "static": False,
+                "file_type": None,
+            }
+            for glob_expr in path_glob_exprs
+        ]
+
+    def _parse_file(
+        self,
+        file_name: str,
+        trackable: typing.Dict[str, typing.Any],
+        cached_metadata: typing.Dict[str, typing.Any],
+    ) -> typing.Dict[str, typing.Any]:
+        """Parse a file which has been modified, and pass each set of data extracted to the trackable's callback.
+
+        Parameters
+        ----------
+        file_name : str
+            The path to the file to parse
+        trackable : typing.Dict[str, typing.Any]
+            The definition of how to parse the file, from track() or tail()
+        cached_metadata : typing.Dict[str, typing.Any]
+            Metadata returned by the previous parse of this file, such as the number of bytes already read
+
+        Returns
+        -------
+        typing.Dict[str, typing.Any]
+            Metadata returned by this parse of the file
+
+        """
+        # Internal multiparser functions, called in the same way as by multiparser.FileMonitor's threads
+        _record = mp_parse.record_log if trackable["tail"] else mp_parse.record_file
+        _parsed = _record(
+            file_name,
+            tracked_values=trackable["tracked_values"],
+            parser_func=trackable["parser_func"],
+            file_type=trackable["file_type"],
+            **(
+                cached_metadata
+                | {
+                    k: v
+                    for k, v in (trackable["parser_kwargs"] or {}).items()
+                    if v is not None
+                }
+            ),
+        )
+
+        if not _parsed:
+            return cached_metadata
+
+        _metadata, _data = _parsed
+
+        for _entry in _data if isinstance(_data, (list, tuple)) else [_data]:
+            if not _entry:
+                continue
+            if self._flatten_data:
+                _entry = mp_parse.flatten_data(_entry)
+            if trackable["callback"]:
+                trackable["callback"](_entry, _metadata)
+
+        return _metadata
+
+    async def _poll(self):
+        """Parse every monitored file which has been created or modified since the last poll."""
+        _excluded = {
+            file_name
+            for glob_expr in self._excluded_patterns
+            for file_name in glob.glob(glob_expr)
+        }
+
+        for index, trackable in enumerate(self._trackables):
+            for file_name in glob.glob(trackable["glob_expr"]):
+                if file_name in _excluded:
+                    continue
+
+                _state = self._file_states.setdefault(
+                    (index, file_name),
+                    {"modified_time": None, "metadata": {}, "complete": False},
+                )
+                if _state["complete"]:
+                    continue
+
+                _modified_time = os.path.getmtime(file_name)
+                if _modified_time == _state["modified_time"]:
+                    continue
+                _state["modified_time"] = _modified_time
+
+                try:
+                    _state[
+                        "metadata"
+                    ] = await asyncio.get_running_loop().run_in_executor(
+                        None, self._parse_file, file_name, trackable, _state["metadata"]
+                    )
+                    _state["complete"] = trackable["static"]
+                except Exception as e:
+                    # As with multiparser, a file which fails to parse is no longer monitored
+                    _state["complete"] = True
+                    if self._exception_callback:
+                        self._exception_callback(f"{type(e).__name__}: '{e}'")
+
+    async def run(self):
+        """Monitor files until the termination trigger is set, then parse any final changes and return."""
+        while True:
+            _terminating = self._termination_trigger.is_set()
+            await self._poll()
+            if _terminating:
+                return
+            await asyncio.sleep(self._interval)
@@ -0,0 +1,386 @@
+"""Checkpoint Uploader.
+
+Upload files which are rewritten while a process runs, such as model checkpoints, to Simvue in a background thread,
+from a snapshot of the file taken when the upload was requested.
+"""
+
+import concurrent.futures
+import hashlib
+import pathlib
+import shutil
+import tempfile
+import typing
+
+import simvue
+
+from simvue_integrations.extras.content_chunks import content_defined_chunks
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Linux ioctl which clones the contents of one file into another, sharing the data on copy-on-write filesystems
+_FICLONE: int = 0x40049409
+
+
+def _snapshot_file(source: pathlib.Path, destination: pathlib.Path) -> None:
+    """Take a snapshot of a file, cloning it if the filesystem supports copy-on-write and copying it otherwise.
+
+    Hard links are not used, since checkpoints are usually rewritten in place, which would change the snapshot too.
+
+    Parameters
+    ----------
+    source : pathlib.Path
+        The file to take a snapshot of
+    destination : pathlib.Path
+        The path to write the snapshot to
+
+    """
+    if fcntl:
+        try:
+            with source.open("rb") as in_f, destination.open("wb") as out_f:
+                fcntl.ioctl(out_f.fileno(), _FICLONE, in_f.fileno())
+            return
+        except OSError:
+            pass
+    shutil.copyfile(source, destination)
+
+
+def _file_digest(file_path: pathlib.Path, chunk_size: int = 1024 * 1024) -> str:
+    """Calculate the SHA256 digest of a file, reading it in chunks.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        The file to calculate the digest of
+    chunk_size : int, optional
+        Number of bytes to read at once, by default 1 MiB
+
+    Returns
+    -------
+    str
+        The hex digest of the file
+
+    """
+    _hash = hashlib.sha256()
+    with file_path.open("rb") as in_f:
+        while chunk := in_f.read(chunk_size):
+            _hash.update(chunk)
+    return _hash.hexdigest()
+
+
+class CheckpointUploader:
+    """Upload snapshots of files to runs in a background thread, skipping files which have not changed.
+
+    When an upload is requested, the file is skipped if its size and modification time are the same as when it was
+    last uploaded. Otherwise a snapshot of it is taken, so that the caller can carry on and rewrite the file, and the
+    snapshot is uploaded in the background, unless its contents are the same as the last upload of the file.
+
+    If a chunk size is given, files are instead split into content defined chunks, and only chunks which have not
+    been uploaded before are saved to the run, along with a manifest listing the run and artifact holding each chunk
+    of the file, from which the file can be rebuilt with rebuild_chunked_file. Chunks are referenced by the ID of the
+    run they were uploaded to, so files are uploaded whole to runs without an ID, such as offline runs.
+    """
+
+    def __init__(
+        self,
+        snapshot_directory: typing.Optional[pathlib.Path] = None,
+        keep_snapshots: bool = False,
+        exception_callback: typing.Optional[typing.Callable[[str], None]] = None,
+        chunk_size: typing.Optional[int] = None,
+    ):
+        """Initialize the uploader.
+
+        Parameters
+        ----------
+        snapshot_directory : typing.Optional[pathlib.Path], optional
+            Directory to store snapshots in until they are uploaded, by default None (a temporary directory)
+        keep_snapshots : bool, optional
+            Whether to keep snapshots once they are uploaded, by default False
+            Runs in offline mode only record the path to each file, so snapshots must be kept until they are sent.
+        exception_callback : typing.Optional[typing.Callable[[str], None]], optional
+            Function called with a message if an upload fails in the background thread, by default None
+        chunk_size : typing.Optional[int], optional
+            Approximate average size in bytes of the chunks to split files into, by default None (upload whole files)
+
+        """
+        self._snapshot_directory = snapshot_directory
+        self._temporary_directory: typing.Optional[pathlib.Path] = None
+        self._keep_snapshots = keep_snapshots
+        self._exception_callback = exception_callback
+        self._executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._snapshot_count: int = 0
+        # Size and modification time of each file when it was last uploaded, and the digest of its contents
+        self._file_stats: typing.Dict[pathlib.Path, typing.Tuple[int, int]] = {}
+        self._file_digests: typing.Dict[pathlib.Path, str] = {}
+        self._chunk_size = chunk_size
+        # ID of the run and name of the artifact holding each chunk uploaded so far, by digest
+        self._chunk_artifacts: typing.Dict[str, typing.Tuple[str, str]] = {}
+
+    def _snapshot_path(self, name: str) -> pathlib.Path:
+        """Get a new path in the snapshot directory, creating a temporary directory if none was given.
+
+        Parameters
+        ----------
+        name : str
+            The name of the file
+
+        Returns
+        -------
+        pathlib.Path
+            Path to write the snapshot to, unique to this uploader
+
+        """
+        if not (_snapshot_directory := self._snapshot_directory):
+            if not self._temporary_directory:
+                self._temporary_directory = pathlib.Path(
+                    tempfile.mkdtemp(prefix="simvue_snapshots_")
+                )
+            _snapshot_directory = self._temporary_directory
+        self._snapshot_count += 1
+        return _snapshot_directory.joinpath(f"{self._snapshot_count}_{name}")
+
+    def _upload_chunks(
+        self,
+        run: simvue.Run,
+        upload_path: pathlib.Path,
+        category: str,
+        name: str,
+        digest: str,
+    ) -> bool:
+        """Upload the chunks of a file which have not been uploaded before, and the manifest of the file, to a run.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to upload the chunks to
+        upload_path : pathlib.Path
+            The path to upload the file from
+        category : str
+            The category of the file with respect to the run
+        name : str
+            The name of the file, which the chunks and manifest are named after
+        digest : str
+            The SHA256 digest of the whole file
+
+        Returns
+        -------
+        bool
+            Whether the manifest was uploaded
+
+        Raises
+        ------
+        RuntimeError
+            Raised if a chunk could not be uploaded
+
+        """
+        _chunks: typing.List[typing.Dict[str, typing.Any]] = []
+        with upload_path.open("rb") as in_f:
+            for offset, size in content_defined_chunks(
+                upload_path,
+                min_size=self._chunk_size // 4,
+                average_size=self._chunk_size,
+                max_size=self._chunk_size * 4,
+            ):
+                in_f.seek(offset)
+                _data = in_f.read(size)
+                _chunk_digest = hashlib.sha256(_data).hexdigest()
+                if _chunk_digest not in self._chunk_artifacts:
+                    _chunk_name = f"{name}.chunk.{_chunk_digest}"
+                    _chunk_path = self._snapshot_path(_chunk_name)
+                    _chunk_path.write_bytes(_data)
+                    try:
+                        if not run.save_file(
+                            _chunk_path, category=category, name=_chunk_name
+                        ):
+                            raise RuntimeError(f"Failed to upload chunk {_chunk_name}")
+                    finally:
+                        _chunk_path.unlink(missing_ok=True)
+                    self._chunk_artifacts[_chunk_digest] = (run.id, _chunk_name)
+                _run_id, _chunk_name = self._chunk_artifacts[_chunk_digest]
+                _chunks.append(
+                    {
+                        "run": _run_id,
+                        "name": _chunk_name,
+                        "size": size,
+                        "sha256": _chunk_digest,
+                    }
+                )
+        return run.save_object(
+            {
+                "name": name,
+                "size": upload_path.stat().st_size,
+                "sha256": digest,
+                "chunks": _chunks,
+            },
+            category=category,
+            name=f"{name}.manifest",
+        )
+
+    def _upload(
+        self,
+        run: simvue.Run,
+        file_path: pathlib.Path,
+        upload_path: pathlib.Path,
+        category: str,
+        name: str,
+        file_stats: typing.Tuple[int, int],
+    ) -> None:
+        """Upload a file to a run, unless its contents are the same as the last upload of the file.
+
+        The size and modification time of the file are only recorded once it has been uploaded, or found to be
+        unchanged, so that a file which failed to upload is uploaded again the next time it is requested.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to upload the file to
+        file_path : pathlib.Path
+            The original path of the file
+        upload_path : pathlib.Path
+            The path to upload the file from, a snapshot of the file or the file itself
+        category : str
+            The category of the file with respect to the run
+        name : str
+            The name to save the file under
+        file_stats : typing.Tuple[int, int]
+            The size and modification time of the file when the upload was requested
+
+        """
+        _uploaded: bool = False
+        try:
+            _digest = _file_digest(upload_path)
+            if self._file_digests.get(file_path) == _digest:
+                self._file_stats[file_path] = file_stats
+                return
+            if self._chunk_size and run.id:
+                _uploaded = self._upload_chunks(
+                    run, upload_path, category, name, _digest
+                )
+            else:
+                _uploaded = run.save_file(upload_path, category=category, name=name)
+            if _uploaded:
+                self._file_digests[file_path] = _digest
+                self._file_stats[file_path] = file_stats
+        except Exception as e:
+            if self._exception_callback:
+                self._exception_callback(f"Failed to upload {file_path}: {e}")
+        finally:
+            # Snapshots which were not uploaded are never needed again
+            if upload_path != file_path and not (_uploaded and self._keep_snapshots):
+                upload_path.unlink(missing_ok=True)
+
+    def upload(
+        self,
+        run: simvue.Run,
+        file_path: typing.Union[str, pathlib.Path],
+        category: typing.Literal["input", "output", "code"] = "output",
+        name: typing.Optional[str] = None,
+        snapshot: bool = True,
+    ) -> typing.Optional[concurrent.futures.Future]:
+        """Upload a file to a run in the background, if it has changed since it was last uploaded.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to upload the file to
+        file_path : typing.Union[str, pathlib.Path]
+            The path of the file
+        category : typing.Literal["input", "output", "code"], optional
+            The category of the file with respect to the run, by default "output"
+        name : typing.Optional[str], optional
+            The name to save the file under, by default None (the name of the file)
+        snapshot : bool, optional
+            Whether to upload a snapshot of the file, so that it can be changed while it is uploaded, by default True
+
+        Returns
+        -------
+        typing.Optional[concurrent.futures.Future]
+            Future which completes once the file has been uploaded or skipped, or None if the file was skipped now
+
+        """
+        file_path = pathlib.Path(file_path).absolute()
+        _stat = file_path.stat()
+        _file_stats = (_stat.st_size, _stat.st_mtime_ns)
+        if self._file_stats.get(file_path) == _file_stats:
+            return None
+
+        upload_path = file_path
+        if snapshot:
+            upload_path = self._snapshot_path(file_path.name)
+            _snapshot_file(file_path, upload_path)
+
+        if not self._executor:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="simvue_checkpoint_uploader"
+            )
+        return self._executor.submit(
+            self._upload,
+            run,
+            file_path,
+            upload_path,
+            category,
+            name or file_path.name,
+            _file_stats,
+        )
+
+    def shutdown(self):
+        """Wait for all uploads to finish, and remove the temporary snapshot directory unless snapshots are kept."""
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+        if self._temporary_directory and not self._keep_snapshots:
+            shutil.rmtree(self._temporary_directory, ignore_errors=True)
+            self._temporary_directory = None
+
+
+def rebuild_chunked_file(
+    run_id: str,
+    name: str,
+    output_path: typing.Union[str, pathlib.Path],
+    client: typing.Optional[simvue.Client] = None,
+) -> pathlib.Path:
+    """Rebuild a file uploaded in chunks by a CheckpointUploader from its manifest.
+
+    Parameters
+    ----------
+    run_id : str
+        The ID of the run which the manifest of the file was uploaded to
+    name : str
+        The name of the file when it was uploaded
+    output_path : typing.Union[str, pathlib.Path]
+        The path to write the rebuilt file to
+    client : typing.Optional[simvue.Client], optional
+        The client to download the manifest and chunks with, by default None (a new client)
+
+    Returns
+    -------
+    pathlib.Path
+        The path of the rebuilt file
+
+    Raises
+    ------
+    RuntimeError
+        Raised if the rebuilt file does not match the digest in the manifest
+
+    """
+    client = client or simvue.Client()
+    output_path = pathlib.Path(output_path)
+    manifest = client.get_artifact(run_id, f"{name}.manifest")
+
+    with tempfile.TemporaryDirectory(prefix="simvue_chunks_") as chunk_directory:
+        with output_path.open("wb") as out_f:
+            for chunk in manifest["chunks"]:
+                client.get_artifact_as_file(
+                    chunk["run"], chunk["name"], chunk_directory
+                )
+                _chunk_path = pathlib.Path(chunk_directory).joinpath(chunk["name"])
+                out_f.write(_chunk_path.read_bytes())
+                _chunk_path.unlink()
+
+    if _file_digest(output_path) != manifest["sha256"]:
+        raise RuntimeError(
+            f"Rebuilt file {output_path} does not match the file uploaded as {name}"
+        )
+    return output_path
@@ -0,0 +1,106 @@
+"""Content Defined Chunks.
+
+Split files into chunks whose boundaries depend only on the bytes around them, so that a change to one part of a
+file only changes the chunks covering that part, and the rest can be recognised from a previous version of the file.
+"""
+
+import hashlib
+import pathlib
+import typing
+
+import numpy
+
+# Random 32 bit value for each byte, fixed so that chunk boundaries are the same in every process
+_GEAR: numpy.ndarray = numpy.frombuffer(
+    b"".join(hashlib.sha256(bytes([i])).digest()[:4] for i in range(256)),
+    dtype="<u4",
+).astype(numpy.uint32)
+
+
+def _boundary_candidates(data: numpy.ndarray, bits: int) -> numpy.ndarray:
+    """Find the positions in a block of data after which the rolling gear hash allows a chunk boundary.
+
+    The low bits of the gear hash after a byte only depend on that many preceding bytes. The hash is calculated for
+    every position at once by doubling the window summed over, from one byte to the full 32 bits of the hash.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The bytes of the block
+    bits : int
+        Number of low bits of the hash which must all be zero for a boundary
+
+    Returns
+    -------
+    numpy.ndarray
+        The index of each byte in the block which a chunk could end after
+
+    """
+    _hash = _GEAR[data]
+    window = 1
+    while window < 32:
+        _hash[window:] += numpy.left_shift(_hash[:-window], numpy.uint32(window))
+        window *= 2
+    return numpy.flatnonzero((_hash & numpy.uint32((1 << bits) - 1)) == 0)
+
+
+def content_defined_chunks(
+    file_path: pathlib.Path,
+    min_size: int = 1024 * 1024,
+    average_size: int = 4 * 1024 * 1024,
+    max_size: int = 16 * 1024 * 1024,
+    block_size: int = 1024 * 1024,
+) -> typing.List[typing.Tuple[int, int]]:
+    """Split a file into content defined chunks.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        The file to split into chunks
+    min_size : int, optional
+        Minimum size of a chunk in bytes, apart from the last chunk, by default 1 MiB
+    average_size : int, optional
+        Average number of bytes after the minimum size before a chunk boundary, rounded down to a power of two,
+        by default 4 MiB
+    max_size : int, optional
+        Maximum size of a chunk in bytes, by default 16 MiB
+    block_size : int, optional
+        Number of bytes of the file to search for boundaries at once, small enough for the hash to stay in cache,
+        by default 1 MiB
+
+    Returns
+    -------
+    typing.List[typing.Tuple[int, int]]
+        The offset and size of each chunk, in order
+
+    """
+    file_size = file_path.stat().st_size
+    if not file_size:
+        return []
+
+    bits = max(average_size.bit_length() - 1, 1)
+    data = numpy.memmap(file_path, dtype=numpy.uint8, mode="r")
+    chunks: typing.List[typing.Tuple[int, int]] = []
+    start = 0
+
+    for block_start in range(0, file_size, block_size):
+        # Include the end of the previous block, so that the hash has a full window at the start of this block
+        window_start = max(block_start - 31, 0)
+        candidates = _boundary_candidates(
+            data[window_start : block_start + block_size], bits
+        )
+        candidates = candidates[candidates >= block_start - window_start]
+        for end in (candidates + window_start + 1).tolist():
+            while end - start > max_size:
+                chunks.append((start, max_size))
+                start += max_size
+            if end - start >= min_size:
+                chunks.append((start, end - start))
+                start = end
+
+    while file_size - start > max_size:
+        chunks.append((start, max_size))
+        start += max_size
+    if file_size > start:
+        chunks.append((start, file_size - start))
+    return chunks
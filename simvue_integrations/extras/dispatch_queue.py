@@ -0,0 +1,206 @@
+"""Dispatch Queue.
+
+Bounded queue of calls to make to Simvue, drained by a background thread so that callbacks from a training loop
+or simulation never wait for metrics and events to be logged.
+"""
+
+import collections
+import threading
+import typing
+
+DispatchPolicy = typing.Literal["block", "drop", "sample"]
+
+
+class DispatchQueue:
+    """Queue calls in the calling thread and make them in order in a background thread, started by the first call.
+
+    Calls are appended to and taken from a deque, which needs no lock in either thread. When the queue is full,
+    the policy decides what happens to a new call:
+
+    - 'block' waits for the background thread to catch up, so that no calls are lost
+    - 'drop' discards the new call
+    - 'sample' keeps one in every sample_interval new calls once the queue is half full, and drops the rest, so that
+      a thinned out record is kept while the background thread catches up, and discards new calls when full
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        policy: DispatchPolicy = "block",
+        sample_interval: int = 10,
+        exception_callback: typing.Optional[typing.Callable[[str], None]] = None,
+        poll_interval: float = 0.05,
+    ):
+        """Initialize the queue.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Maximum number of calls to hold, by default 10000
+        policy : DispatchPolicy, optional
+            What to do with new calls when the queue is full, either 'block', 'drop' or 'sample', by default 'block'
+        sample_interval : int, optional
+            If using the 'sample' policy, keep one in this many calls once the queue is half full, by default 10
+        exception_callback : typing.Optional[typing.Callable[[str], None]], optional
+            Function called with a message if a call fails in the background thread, by default None
+        poll_interval : float, optional
+            Time in seconds for the background thread to wait for new calls when the queue is empty, by default 0.05
+
+        """
+        self._max_size = max_size
+        self._policy = policy
+        self._sample_interval = sample_interval
+        self._exception_callback = exception_callback
+        self._poll_interval = poll_interval
+        self._queue: typing.Deque[
+            typing.Tuple[typing.Callable, typing.Tuple, typing.Dict[str, typing.Any]]
+        ] = collections.deque()
+        # Each counter is only incremented by one thread, the caller or the background thread
+        self._submitted: int = 0
+        self._completed: int = 0
+        self._sample_count: int = 0
+        self.calls_dropped: int = 0
+        self._wakeup = threading.Event()
+        self._drained = threading.Condition()
+        self._termination_trigger = threading.Event()
+        self._dispatch_thread: typing.Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        """Get the number of calls waiting to be made.
+
+        Returns
+        -------
+        int
+            The number of calls in the queue
+
+        """
+        return len(self._queue)
+
+    def _enqueue(
+        self,
+        policy: DispatchPolicy,
+        function: typing.Callable,
+        args: typing.Tuple,
+        kwargs: typing.Dict[str, typing.Any],
+    ) -> bool:
+        """Queue a call, applying the given policy if the queue is full.
+
+        Parameters
+        ----------
+        policy : DispatchPolicy
+            What to do with the call if the queue is full
+        function : typing.Callable
+            The function to call
+        args : typing.Tuple
+            Positional arguments to call the function with
+        kwargs : typing.Dict[str, typing.Any]
+            Keyword arguments to call the function with
+
+        Returns
+        -------
+        bool
+            Whether the call was queued, rather than dropped due to the policy
+
+        """
+        if not self._dispatch_thread:
+            self.start()
+
+        _length = len(self._queue)
+        if policy == "sample" and _length >= self._max_size // 2:
+            self._sample_count += 1
+            if self._sample_count % self._sample_interval:
+                self.calls_dropped += 1
+                return False
+
+        if _length >= self._max_size:
+            if policy != "block":
+                self.calls_dropped += 1
+                return False
+            self._wakeup.set()
+            with self._drained:
+                self._drained.wait_for(lambda: len(self._queue) < self._max_size)
+
+        self._queue.append((function, args, kwargs))
+        self._submitted += 1
+        return True
+
+    def put(self, function: typing.Callable, *args, **kwargs) -> bool:
+        """Queue a call to be made in the background thread, applying the policy of the queue if it is full.
+
+        Parameters
+        ----------
+        function : typing.Callable
+            The function to call
+        *args
+            Positional arguments to call the function with
+        **kwargs
+            Keyword arguments to call the function with
+
+        Returns
+        -------
+        bool
+            Whether the call was queued, rather than dropped due to the policy
+
+        """
+        return self._enqueue(self._policy, function, args, kwargs)
+
+    def put_required(self, function: typing.Callable, *args, **kwargs):
+        """Queue a call which must not be dropped, such as closing a run, waiting for space if the queue is full.
+
+        Parameters
+        ----------
+        function : typing.Callable
+            The function to call
+        *args
+            Positional arguments to call the function with
+        **kwargs
+            Keyword arguments to call the function with
+
+        """
+        self._enqueue("block", function, args, kwargs)
+
+    def _dispatch_loop(self):
+        """Make queued calls in order until the queue is stopped."""
+        while not self._termination_trigger.is_set():
+            while self._queue:
+                function, args, kwargs = self._queue.popleft()
+                try:
+                    function(*args, **kwargs)
+                except Exception as e:
+                    if self._exception_callback:
+                        self._exception_callback(
+                            f"Failed to dispatch call to {getattr(function, '__name__', function)}: {e}"
+                        )
+                self._completed += 1
+            with self._drained:
+                self._drained.notify_all()
+            self._wakeup.wait(self._poll_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        """Start making queued calls in a background thread, if not already started."""
+        if self._dispatch_thread:
+            return
+        self._termination_trigger.clear()
+        self._dispatch_thread = threading.Thread(
+            target=self._dispatch_loop, daemon=True
+        )
+        self._dispatch_thread.start()
+
+    def flush(self):
+        """Wait until every call queued so far has been made."""
+        if not self._dispatch_thread:
+            return
+        _target = self._submitted
+        self._wakeup.set()
+        with self._drained:
+            self._drained.wait_for(lambda: self._completed >= _target)
+
+    def stop(self):
+        """Make all remaining calls, then stop the background thread."""
+        self.flush()
+        self._termination_trigger.set()
+        self._wakeup.set()
+        if self._dispatch_thread:
+            self._dispatch_thread.join()
+            self._dispatch_thread = None
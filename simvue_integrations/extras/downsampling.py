@@ -0,0 +1,436 @@
+"""Downsampling.
+
+Strategies for reducing the number of points in high frequency metric streams before they are logged to Simvue.
+"""
+
+import abc
+import fnmatch
+import heapq
+import itertools
+import math
+import re
+import typing
+
+import numpy
+
+from simvue_integrations.extras.metric_buffer import MetricRecord
+from simvue_integrations.extras.validators import DownsamplingValidator
+
+# The value, step, time and timestamp of a single point in the stream of one metric, and the index of the record
+# it was added in
+MetricPoint = typing.Tuple[float, typing.Any, typing.Any, str, int]
+
+
+def largest_triangle_three_buckets(
+    x: numpy.ndarray, y: numpy.ndarray, threshold: int
+) -> numpy.ndarray:
+    """Select the points which best preserve the visual shape of a series, using Largest-Triangle-Three-Buckets.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        The x coordinate of each point, in increasing order
+    y : numpy.ndarray
+        The y coordinate of each point
+    threshold : int
+        The number of points to select
+
+    Returns
+    -------
+    numpy.ndarray
+        The indices of the selected points, always including the first and last points
+
+    """
+    _length = len(x)
+    if threshold >= _length or _length <= 2:
+        return numpy.arange(_length)
+    if threshold < 3:
+        return numpy.array([0, _length - 1])
+
+    # Points between the first and last are split into equal buckets, and one point is selected from each
+    _edges = numpy.linspace(1, _length - 1, threshold - 1).astype(int)
+    _selected = numpy.empty(threshold, dtype=int)
+    _selected[0] = 0
+    _selected[-1] = _length - 1
+
+    for bucket in range(threshold - 2):
+        _start, _end = _edges[bucket], _edges[bucket + 1]
+        _next_start, _next_end = (
+            _end,
+            (_edges[bucket + 2] if bucket + 2 < len(_edges) else _length),
+        )
+        # The third vertex of each triangle is the average of the next bucket
+        _next_x = x[_next_start:_next_end].mean()
+        _next_y = y[_next_start:_next_end].mean()
+        _previous = _selected[bucket]
+        _areas = numpy.abs(
+            (x[_previous] - _next_x) * (y[_start:_end] - y[_previous])
+            - (x[_previous] - x[_start:_end]) * (_next_y - y[_previous])
+        )
+        _selected[bucket + 1] = _start + int(numpy.argmax(_areas))
+
+    return _selected
+
+
+class _Strategy(abc.ABC):
+    """Downsampling state for the stream of a single metric."""
+
+    # Points added but not yet released
+    _points: typing.Sequence[MetricPoint] = ()
+
+    def oldest_held(self) -> typing.Optional[int]:
+        """Get the index of the earliest record with a point which is still held.
+
+        Returns
+        -------
+        typing.Optional[int]
+            The index of the record, or None if no points are held
+
+        """
+        return self._points[0][4] if self._points else None
+
+    @abc.abstractmethod
+    def add(self, point: MetricPoint) -> typing.List[MetricPoint]:
+        """Add a point to the stream.
+
+        Parameters
+        ----------
+        point : MetricPoint
+            The value, step, time, timestamp and record index of the point
+
+        Returns
+        -------
+        typing.List[MetricPoint]
+            The points which are ready to be logged
+
+        """
+
+    def flush(self) -> typing.List[MetricPoint]:
+        """Release any points still held.
+
+        Returns
+        -------
+        typing.List[MetricPoint]
+            The points which are still to be logged
+
+        """
+        return []
+
+
+class _EveryNth(_Strategy):
+    """Keep the first of every n points."""
+
+    def __init__(self, n: int, **_):
+        self._n = n
+        self._count = 0
+
+    def add(self, point: MetricPoint) -> typing.List[MetricPoint]:
+        self._count += 1
+        return [point] if (self._count - 1) % self._n == 0 else []
+
+
+class _TimeBucket(_Strategy):
+    """Reduce the points within each bucket of simulation time, or of step if no time is given, to a single point.
+
+    The minimum or maximum is logged with the step and time of the point it came from, and the mean with the step
+    and time of the last point in the bucket. Times and steps are converted to float, so may be numeric strings.
+    """
+
+    def __init__(self, bucket_width: float, aggregation: str = "mean", **_):
+        self._bucket_width = bucket_width
+        self._aggregation = aggregation
+        self._bucket: typing.Optional[int] = None
+        self._points: typing.List[MetricPoint] = []
+
+    def add(self, point: MetricPoint) -> typing.List[MetricPoint]:
+        _, step, time, _, _ = point
+        _bucket = math.floor(
+            float(time if time is not None else step) / self._bucket_width
+        )
+        _out = self.flush() if _bucket != self._bucket else []
+        self._bucket = _bucket
+        self._points.append(point)
+        return _out
+
+    def flush(self) -> typing.List[MetricPoint]:
+        if not self._points:
+            return []
+        _points, self._points = self._points, []
+        if self._aggregation == "min":
+            return [min(_points, key=lambda point: point[0])]
+        if self._aggregation == "max":
+            return [max(_points, key=lambda point: point[0])]
+        _, step, time, timestamp, index = _points[-1]
+        return [
+            (
+                math.fsum(point[0] for point in _points) / len(_points),
+                step,
+                time,
+                timestamp,
+                index,
+            )
+        ]
+
+
+class _LargestTriangleThreeBuckets(_Strategy):
+    """Reduce each window of points with Largest-Triangle-Three-Buckets, carrying the last point of each window over."""
+
+    def __init__(self, window: int, points_per_window: int, **_):
+        self._window = window
+        self._points_per_window = points_per_window
+        # The last point logged from the previous window, which anchors the first bucket of the next window
+        self._anchor: typing.Optional[MetricPoint] = None
+        self._points: typing.List[MetricPoint] = []
+
+    def add(self, point: MetricPoint) -> typing.List[MetricPoint]:
+        self._points.append(point)
+        return self.flush() if len(self._points) >= self._window else []
+
+    def flush(self) -> typing.List[MetricPoint]:
+        if not self._points:
+            return []
+        _anchored = self._anchor is not None
+        _points = ([self._anchor] if _anchored else []) + self._points
+        _x = numpy.array(
+            [time if time is not None else step for _, step, time, *_ in _points],
+            dtype=float,
+        )
+        _y = numpy.array([point[0] for point in _points], dtype=float)
+        _selected = largest_triangle_three_buckets(
+            _x, _y, self._points_per_window + _anchored
+        )
+        self._points = []
+        self._anchor = _points[-1]
+        return [_points[index] for index in _selected[_anchored:]]
+
+
+_STRATEGIES: typing.Dict[str, typing.Type[_Strategy]] = {
+    "every_nth": _EveryNth,
+    "time_bucket": _TimeBucket,
+    "lttb": _LargestTriangleThreeBuckets,
+}
+
+
+class MetricDownsampler:
+    """Downsample the streams of metrics matching each glob pattern, passing all other metrics straight through.
+
+    Each metric has its own downsampling state, using the strategy of the first pattern its name matches.
+    Strategies release the points of time buckets and LTTB windows once the bucket or window is complete, so records
+    are held back until no earlier point is still held by any strategy, and are then passed on in the order they were
+    added. This keeps steps in order across metrics, but means metrics which are not downsampled are delayed by up to
+    the longest bucket or window. Any remaining records must be collected with flush() once logging ends.
+
+    So that a metric which stops being logged part way through a bucket or window does not hold back every later
+    record, a strategy whose oldest point is more than max_held_records records old releases its points early.
+    """
+
+    def __init__(
+        self,
+        strategies: typing.Dict[str, typing.Dict[str, typing.Any]],
+        max_held_records: int = 10000,
+    ):
+        """Initialize the downsampler.
+
+        Parameters
+        ----------
+        strategies : typing.Dict[str, typing.Dict[str, typing.Any]]
+            The downsampling strategy for each glob pattern of metric names, as accepted by DownsamplingValidator
+        max_held_records : int, optional
+            Maximum number of records a strategy can hold a point back for before its points are released early,
+            ending its current bucket or window, by default 10000
+
+        """
+        self._strategies = [
+            (
+                re.compile(fnmatch.translate(pattern)),
+                DownsamplingValidator(**strategy).model_dump(exclude_none=True),
+            )
+            for pattern, strategy in strategies.items()
+        ]
+        # The downsampling state of each metric name seen, or None if the metric is not downsampled
+        self._streams: typing.Dict[str, typing.Optional[_Strategy]] = {}
+        self._record_count: int = 0
+        # Records released by the strategies or passed straight through, by the index of the record they came from,
+        # with a counter so that records from the same index stay in the order they were released
+        self._held: typing.List[typing.Tuple[int, int, MetricRecord]] = []
+        self._held_counter = itertools.count()
+        self._max_held_records = max_held_records
+        # The index of the earliest record with a point held by each metric's strategy, and a heap of the same
+        # (index, metric name) pairs, whose entries are discarded once they no longer match the metric's index
+        self._oldest_held: typing.Dict[str, int] = {}
+        self._oldest_held_heap: typing.List[typing.Tuple[int, str]] = []
+
+    def _stream(self, metric_name: str) -> typing.Optional[_Strategy]:
+        """Get the downsampling state for a metric, creating it the first time the metric is seen.
+
+        Parameters
+        ----------
+        metric_name : str
+            The name of the metric
+
+        Returns
+        -------
+        typing.Optional[_Strategy]
+            The downsampling state, or None if the metric does not match any pattern
+
+        """
+        try:
+            return self._streams[metric_name]
+        except KeyError:
+            _stream = None
+            for pattern, strategy in self._strategies:
+                if pattern.match(metric_name):
+                    _stream = _STRATEGIES[strategy["method"]](**strategy)
+                    break
+            self._streams[metric_name] = _stream
+            return _stream
+
+    def add(
+        self,
+        metrics: typing.Dict[str, typing.Any],
+        step: typing.Any,
+        time: typing.Any,
+        timestamp: str,
+    ) -> typing.List[MetricRecord]:
+        """Add a metric record, returning the records which are ready to be logged.
+
+        Parameters
+        ----------
+        metrics : typing.Dict[str, typing.Any]
+            The metric values logged
+        step : typing.Any
+            The step of the record
+        time : typing.Any
+            The simulation time of the record
+        timestamp : str
+            The timestamp of the record
+
+        Returns
+        -------
+        typing.List[MetricRecord]
+            The (metrics, step, time, timestamp) records to log
+
+        """
+        _index = self._record_count
+        self._record_count += 1
+        _passed: typing.Dict[str, typing.Any] = {}
+
+        for name, value in metrics.items():
+            if (_stream := self._stream(name)) is None:
+                _passed[name] = value
+                continue
+            for point in _stream.add((value, step, time, timestamp, _index)):
+                self._hold(name, point)
+            self._update_oldest_held(name, _stream)
+
+        if _passed:
+            self._hold_record(_index, (_passed, step, time, timestamp))
+
+        # Release the points of any strategy which has held a point for too long, such as a metric no longer logged
+        while (
+            _oldest := self._oldest_held_index()
+        ) is not None and self._record_count - _oldest > self._max_held_records:
+            _name = self._oldest_held_heap[0][1]
+            _stream = self._streams[_name]
+            for point in _stream.flush():
+                self._hold(_name, point)
+            self._update_oldest_held(_name, _stream)
+
+        return self._release(_oldest)
+
+    def _update_oldest_held(self, metric_name: str, stream: _Strategy) -> None:
+        """Record the index of the earliest record with a point held by the strategy of a metric.
+
+        Parameters
+        ----------
+        metric_name : str
+            The name of the metric
+        stream : _Strategy
+            The downsampling state of the metric
+
+        """
+        _oldest = stream.oldest_held()
+        if _oldest is None:
+            self._oldest_held.pop(metric_name, None)
+        elif _oldest != self._oldest_held.get(metric_name):
+            self._oldest_held[metric_name] = _oldest
+            heapq.heappush(self._oldest_held_heap, (_oldest, metric_name))
+
+    def _oldest_held_index(self) -> typing.Optional[int]:
+        """Get the index of the earliest record with a point held by any strategy.
+
+        Returns
+        -------
+        typing.Optional[int]
+            The index of the record, or None if no points are held
+
+        """
+        while self._oldest_held_heap:
+            _index, _name = self._oldest_held_heap[0]
+            if self._oldest_held.get(_name) == _index:
+                return _index
+            heapq.heappop(self._oldest_held_heap)
+        return None
+
+    def _hold(self, metric_name: str, point: MetricPoint) -> None:
+        """Hold a point released by the strategy of a metric until all earlier records have been released.
+
+        Parameters
+        ----------
+        metric_name : str
+            The name of the metric
+        point : MetricPoint
+            The point released
+
+        """
+        value, step, time, timestamp, index = point
+        self._hold_record(index, ({metric_name: value}, step, time, timestamp))
+
+    def _hold_record(self, index: int, record: MetricRecord) -> None:
+        """Hold a record until all earlier records have been released.
+
+        Parameters
+        ----------
+        index : int
+            The index of the record it came from
+        record : MetricRecord
+            The (metrics, step, time, timestamp) record
+
+        """
+        heapq.heappush(self._held, (index, next(self._held_counter), record))
+
+    def _release(self, before: typing.Optional[int]) -> typing.List[MetricRecord]:
+        """Release the records held from before the given index, in the order they were added.
+
+        Parameters
+        ----------
+        before : typing.Optional[int]
+            The index of the earliest record with a point still held by a strategy, or None to release all records
+
+        Returns
+        -------
+        typing.List[MetricRecord]
+            The (metrics, step, time, timestamp) records to log
+
+        """
+        _records: typing.List[MetricRecord] = []
+        while self._held and (before is None or self._held[0][0] < before):
+            _records.append(heapq.heappop(self._held)[2])
+        return _records
+
+    def flush(self) -> typing.List[MetricRecord]:
+        """Release the points still held for incomplete time buckets and LTTB windows, and the records held behind them.
+
+        Returns
+        -------
+        typing.List[MetricRecord]
+            The (metrics, step, time, timestamp) records to log
+
+        """
+        for name, stream in self._streams.items():
+            if stream is not None:
+                for point in stream.flush():
+                    self._hold(name, point)
+        self._oldest_held.clear()
+        self._oldest_held_heap.clear()
+        return self._release(None)
@@ -0,0 +1,152 @@
+"""Event Pipeline.
+
+Pipeline for rate limiting and deduplicating events logged by connectors before they are sent to Simvue.
+"""
+
+import threading
+import time
+import typing
+
+
+class TokenBucket:
+    """Allow up to a given number of events per second, with bursts of up to one second's worth of events."""
+
+    def __init__(self, rate: float):
+        """Initialize the bucket, starting full.
+
+        Parameters
+        ----------
+        rate : float
+            The number of events allowed per second
+
+        """
+        self._rate = rate
+        self._capacity = max(rate, 1.0)
+        self._tokens = self._capacity
+        self._last_update = time.monotonic()
+
+    def consume(self) -> bool:
+        """Take a token from the bucket if one is available.
+
+        Returns
+        -------
+        bool
+            Whether a token was available
+
+        """
+        _now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (_now - self._last_update) * self._rate
+        )
+        self._last_update = _now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class EventPipeline:
+    """Filter events before they are logged, coalescing repeated messages and dropping events above rate limits.
+
+    A message which is identical to the one logged immediately before it is not logged again, but counted,
+    and the count is logged as a single event once a different message arrives or the pipeline is closed.
+    Events can then be limited both per source and in total, with the number of events dropped from each
+    source logged as a summary event when the pipeline is closed.
+    """
+
+    def __init__(
+        self,
+        log_callback: typing.Callable[[str, typing.Optional[str]], typing.Any],
+        max_events_per_second: typing.Optional[float] = None,
+        source_rate_limits: typing.Optional[typing.Dict[str, float]] = None,
+    ):
+        """Initialize the pipeline.
+
+        Parameters
+        ----------
+        log_callback : typing.Callable[[str, typing.Optional[str]], typing.Any]
+            Function called with the message and timestamp of each event which passes through the pipeline
+        max_events_per_second : typing.Optional[float], optional
+            Maximum number of events to log per second across all sources, by default None (no limit)
+        source_rate_limits : typing.Optional[typing.Dict[str, float]], optional
+            Maximum number of events to log per second from each named source, by default None (no limits)
+
+        """
+        self._log_callback = log_callback
+        self._total_bucket = (
+            TokenBucket(max_events_per_second) if max_events_per_second else None
+        )
+        self._source_buckets: typing.Dict[str, TokenBucket] = {
+            source: TokenBucket(rate)
+            for source, rate in (source_rate_limits or {}).items()
+        }
+        self._dropped: typing.Dict[str, int] = {}
+        self._last_message: typing.Optional[str] = None
+        self._repeats: int = 0
+        self._lock = threading.Lock()
+
+    def _log_repeats(self):
+        """Log the number of times the previous message was repeated, if it was repeated at all."""
+        if self._repeats:
+            self._log_callback(
+                f"{self._last_message} [repeated {self._repeats} more time{'s' if self._repeats > 1 else ''}]",
+                None,
+            )
+            self._repeats = 0
+
+    def log(
+        self,
+        message: str,
+        timestamp: typing.Optional[str] = None,
+        source: str = "default",
+    ) -> bool:
+        """Pass an event through the pipeline.
+
+        Parameters
+        ----------
+        message : str
+            The event message
+        timestamp : typing.Optional[str], optional
+            The timestamp of the event, by default None
+        source : str, optional
+            The name of the source of the event, used to apply per source rate limits, by default "default"
+
+        Returns
+        -------
+        bool
+            Whether the event was logged or counted as a repeat, rather than dropped
+
+        """
+        with self._lock:
+            if message == self._last_message:
+                self._repeats += 1
+                return True
+
+            if (_bucket := self._source_buckets.get(source)) and not _bucket.consume():
+                self._dropped[source] = self._dropped.get(source, 0) + 1
+                return False
+            if self._total_bucket and not self._total_bucket.consume():
+                self._dropped[source] = self._dropped.get(source, 0) + 1
+                return False
+
+            self._log_repeats()
+            self._last_message = message
+            self._log_callback(message, timestamp)
+            return True
+
+    def close(self):
+        """Log any outstanding repeat count, and a summary of any events which were dropped."""
+        with self._lock:
+            self._log_repeats()
+            self._last_message = None
+
+            if self._dropped:
+                _summary = ", ".join(
+                    f"{count} from '{source}'"
+                    for source, count in self._dropped.items()
+                )
+                self._log_callback(
+                    f"{sum(self._dropped.values())} events were not logged due to rate limits: {_summary}.",
+                    None,
+                )
+                self._dropped = {}
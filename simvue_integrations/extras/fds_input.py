@@ -0,0 +1,194 @@
+"""FDS Input.
+
+Read FDS input files with results cached per process, and expand a base input file into variants for parameter sweeps.
+"""
+
+import itertools
+import os
+import pathlib
+import re
+import threading
+import typing
+
+import f90nml
+from multiparser.parsing import flatten_data
+
+# A parameter in a namelist group, such as 'reac.soot_yield', or 'surf[1].hrrpua' for the second SURF group
+_PARAMETER_PATTERN: re.Pattern[str] = re.compile(
+    r"^(?P<group>\w+)(?:\[(?P<index>\d+)\])?\.(?P<key>\w+)$"
+)
+
+_MAX_CACHED_INPUTS: int = 1024
+_parsed_inputs: typing.Dict[typing.Tuple[str, int, int], "FDSInput"] = {}
+_cache_lock = threading.Lock()
+
+
+class FDSInput(typing.NamedTuple):
+    """The information which FDSRun needs from an FDS input file."""
+
+    chid: str
+    metadata: typing.Dict[str, typing.Any]
+
+
+def _file_key(
+    input_file: typing.Union[str, pathlib.Path],
+) -> typing.Tuple[str, int, int]:
+    """Identify a file by its path, modification time and size.
+
+    Parameters
+    ----------
+    input_file : typing.Union[str, pathlib.Path]
+        Path to the file
+
+    Returns
+    -------
+    typing.Tuple[str, int, int]
+        The key of the file in the cache
+
+    """
+    _stat = os.stat(input_file)
+    return (str(pathlib.Path(input_file).resolve()), _stat.st_mtime_ns, _stat.st_size)
+
+
+def _cache_input(
+    input_file: typing.Union[str, pathlib.Path], namelist: f90nml.Namelist
+) -> FDSInput:
+    """Store the information from a parsed input file in the cache.
+
+    Parameters
+    ----------
+    input_file : typing.Union[str, pathlib.Path]
+        Path to the input file
+    namelist : f90nml.Namelist
+        The namelist read from, or written to, the input file
+
+    Returns
+    -------
+    FDSInput
+        The information stored
+
+    """
+    # Metadata matches that produced by parsing the file with Multiparser, without any empty values
+    _input = FDSInput(
+        chid=namelist["head"]["chid"],
+        metadata={
+            key: value
+            for key, value in flatten_data(dict(namelist.todict())).items()
+            if value
+        },
+    )
+    _key = _file_key(input_file)
+    with _cache_lock:
+        if len(_parsed_inputs) >= _MAX_CACHED_INPUTS:
+            _parsed_inputs.clear()
+        _parsed_inputs[_key] = _input
+    return _input
+
+
+def read_fds_input(input_file: typing.Union[str, pathlib.Path]) -> FDSInput:
+    """Read the CHID and metadata from an FDS input file, reusing the result if the file has been read or written before.
+
+    Parameters
+    ----------
+    input_file : typing.Union[str, pathlib.Path]
+        Path to the FDS input file
+
+    Returns
+    -------
+    FDSInput
+        The CHID of the simulation, and the parameters in the file as metadata
+
+    """
+    with _cache_lock:
+        _input = _parsed_inputs.get(_file_key(input_file))
+    return _input or _cache_input(input_file, f90nml.read(input_file))
+
+
+def _set_parameter(namelist: f90nml.Namelist, parameter: str, value: typing.Any):
+    """Set the value of a parameter in a namelist.
+
+    Parameters
+    ----------
+    namelist : f90nml.Namelist
+        The namelist to modify
+    parameter : str
+        The parameter to set, of the form 'group.key', or 'group[index].key' for repeated groups
+    value : typing.Any
+        The value to set
+
+    Raises
+    ------
+    ValueError
+        Raised if the parameter is not of the expected form, or its group is not in the namelist
+
+    """
+    if not (_match := _PARAMETER_PATTERN.match(parameter)):
+        raise ValueError(
+            f"Parameter '{parameter}' must be of the form 'group.key' or 'group[index].key'."
+        )
+    _group_name = _match.group("group").lower()
+    if _group_name not in namelist:
+        raise ValueError(
+            f"Parameter '{parameter}' refers to a group which is not in the input file."
+        )
+    _group = namelist[_group_name]
+    if isinstance(_group, list):
+        _group = _group[int(_match.group("index") or 0)]
+    _group[_match.group("key").lower()] = value
+
+
+def expand_fds_template(
+    base_input_file: typing.Union[str, pathlib.Path],
+    parameters: typing.Dict[str, typing.Sequence[typing.Any]],
+    output_dir: typing.Union[str, pathlib.Path],
+    chid_prefix: typing.Optional[str] = None,
+) -> typing.Dict[str, pathlib.Path]:
+    """Write a variant of a base FDS input file for every combination of parameter values.
+
+    The base file is parsed once, and each variant is written from a single working copy of its namelist, with a
+    unique CHID. The CHID and metadata of each variant are cached as it is written, so that FDSRun does not need to
+    parse the variants again. Each variant is written to its own subdirectory of the output directory, so that the
+    results of different variants are kept apart. Comments in the base file are not copied to the variants.
+
+    Parameters
+    ----------
+    base_input_file : typing.Union[str, pathlib.Path]
+        Path to the base FDS input file
+    parameters : typing.Dict[str, typing.Sequence[typing.Any]]
+        The values to use for each parameter, keyed by 'group.key', or 'group[index].key' for repeated groups
+        Eg {"reac.soot_yield": [0.01, 0.03], "surf[0].hrrpua": [150, 300]}
+    output_dir : typing.Union[str, pathlib.Path]
+        The directory to write the variants to
+    chid_prefix : typing.Optional[str], optional
+        The prefix of the CHID of each variant, which is followed by the index of the variant, by default None
+        Uses the CHID of the base input file by default.
+
+    Returns
+    -------
+    typing.Dict[str, pathlib.Path]
+        The path to the input file of each variant, keyed by its CHID
+
+    """
+    _namelist = f90nml.read(base_input_file)
+    # FDS only recognises namelist groups written in upper case
+    _namelist.uppercase = True
+    _chid_prefix = chid_prefix or _namelist["head"]["chid"]
+
+    _combinations = list(itertools.product(*parameters.values()))
+    # Indices are padded to the same width, so that no CHID is a prefix of another
+    _width = len(str(len(_combinations) - 1))
+    _variants = {}
+
+    for index, values in enumerate(_combinations):
+        for parameter, value in zip(parameters.keys(), values):
+            _set_parameter(_namelist, parameter, value)
+        _chid = f"{_chid_prefix}_{index:0{_width}d}"
+        _namelist["head"]["chid"] = _chid
+
+        _input_file = pathlib.Path(output_dir).joinpath(_chid, f"{_chid}.fds")
+        _input_file.parent.mkdir(parents=True, exist_ok=True)
+        _namelist.write(_input_file, force=True)
+        _cache_input(_input_file, _namelist)
+        _variants[_chid] = _input_file
+
+    return _variants
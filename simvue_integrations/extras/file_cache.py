@@ -0,0 +1,240 @@
+"""File Cache.
+
+Local record of which file contents have already been stored on each Simvue server, used to report how many
+uploaded files the server already held, and of file checksums so that unchanged files are not hashed again.
+"""
+
+import contextlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import typing
+
+from simvue.utilities import calculate_sha256
+
+
+class _LockFile:
+    """Lock file held as a context manager, so that only one process at a time updates the cache file."""
+
+    def __init__(
+        self, lock_path: pathlib.Path, timeout: float = 10.0, stale_after: float = 60.0
+    ):
+        """Initialize the lock.
+
+        Parameters
+        ----------
+        lock_path : pathlib.Path
+            Path to the lock file
+        timeout : float, optional
+            Time in seconds to wait for the lock, by default 10.0
+        stale_after : float, optional
+            Age in seconds after which a lock file is assumed to have been left by a process which has exited,
+            and is removed, by default 60.0
+
+        """
+        self._lock_path = lock_path
+        self._timeout = timeout
+        self._stale_after = stale_after
+
+    def __enter__(self):
+        """Wait until the lock file can be created.
+
+        Raises
+        ------
+        TimeoutError
+            Raised if the lock could not be acquired within the timeout
+
+        """
+        _deadline = time.monotonic() + self._timeout
+        while True:
+            try:
+                os.close(os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                with contextlib.suppress(FileNotFoundError):
+                    if (
+                        time.time() - os.path.getmtime(self._lock_path)
+                        > self._stale_after
+                    ):
+                        os.remove(self._lock_path)
+                        continue
+                if time.monotonic() > _deadline:
+                    raise TimeoutError(
+                        f"Timed out waiting for lock file {self._lock_path}"
+                    )
+                time.sleep(0.05)
+
+    def __exit__(self, *_):
+        """Remove the lock file."""
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._lock_path)
+
+
+class FileCache:
+    """Record which file contents have been uploaded to each server, and count uploads of contents already stored.
+
+    The cache does not skip any uploads: every run still registers each of its files with the server. Simvue only
+    stores the contents of an artifact once per checksum, so registering a file whose contents are already stored
+    does not transfer the file again, and this cache counts such uploads as hits so that the saving can be reported.
+    The checksum sent when registering a file is taken from the cache, so a file is only read to hash it when its
+    path, size or modification time has changed since it was last hashed. Files which are written afresh for each
+    run, such as the archives uploaded by OpenfoamRun with upload_as_zip, are hashed every run, and are only hits if
+    their contents are identical to a previous upload.
+
+    Only the most recently uploaded checksums are kept for each server, so the cache does not grow indefinitely.
+    The cache file is updated under a lock file, so that runs sharing a cache can save it at the same time.
+    """
+
+    def __init__(
+        self, cache_path: typing.Union[str, pathlib.Path], max_stored: int = 100000
+    ):
+        """Initialize the cache, loading any existing cache file.
+
+        Parameters
+        ----------
+        cache_path : typing.Union[str, pathlib.Path]
+            Path to the JSON file used to store the cache between runs
+        max_stored : int, optional
+            Maximum number of checksums to keep for each server, by default 100000
+            The least recently uploaded checksums are dropped first.
+
+        """
+        self._cache_path = pathlib.Path(cache_path)
+        self._lock_path = self._cache_path.with_name(f"{self._cache_path.name}.lock")
+        self._max_stored = max_stored
+        self._lock = threading.Lock()
+        _cache = self._load()
+        self._checksums: typing.Dict[str, typing.Dict[str, typing.Any]] = _cache[
+            "checksums"
+        ]
+        # Held as dictionaries in order of upload, least recent first, so that the oldest can be dropped
+        self._stored: typing.Dict[str, typing.Dict[str, None]] = {
+            server_url: dict.fromkeys(checksums)
+            for server_url, checksums in _cache["stored"].items()
+        }
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def _load(self) -> typing.Dict[str, typing.Any]:
+        """Load the cache file, ignoring it if it does not exist or cannot be read.
+
+        Returns
+        -------
+        typing.Dict[str, typing.Any]
+            The checksums of files, and the checksums of contents stored on each server, least recent first
+
+        """
+        try:
+            _cache = json.loads(self._cache_path.read_text())
+            return {"checksums": _cache["checksums"], "stored": _cache["stored"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {"checksums": {}, "stored": {}}
+
+    def checksum(self, file_path: typing.Union[str, pathlib.Path]) -> str:
+        """Get the SHA256 checksum of a file, only reading the file if it has changed since it was last hashed.
+
+        Parameters
+        ----------
+        file_path : typing.Union[str, pathlib.Path]
+            Path to the file
+
+        Returns
+        -------
+        str
+            The checksum of the file
+
+        """
+        _path = str(pathlib.Path(file_path).absolute())
+        _stat = os.stat(_path)
+
+        with self._lock:
+            _entry = self._checksums.get(_path)
+            if _entry and (_entry["size"], _entry["mtime_ns"]) == (
+                _stat.st_size,
+                _stat.st_mtime_ns,
+            ):
+                return _entry["checksum"]
+
+        _checksum = calculate_sha256(_path, True)
+
+        with self._lock:
+            self._checksums[_path] = {
+                "size": _stat.st_size,
+                "mtime_ns": _stat.st_mtime_ns,
+                "checksum": _checksum,
+            }
+        return _checksum
+
+    def record_upload(self, checksum: str, server_url: str) -> bool:
+        """Record that contents with the given checksum have been uploaded to a server, counting a hit or a miss.
+
+        Parameters
+        ----------
+        checksum : str
+            The checksum of the contents
+        server_url : str
+            The URL of the Simvue server
+
+        Returns
+        -------
+        bool
+            Whether the contents had already been uploaded to the server before
+
+        """
+        with self._lock:
+            _stored = self._stored.setdefault(server_url, {})
+            _hit = checksum in _stored
+            if _hit:
+                self.hits += 1
+                del _stored[checksum]
+            else:
+                self.misses += 1
+            _stored[checksum] = None
+            return _hit
+
+    def save(self):
+        """Write the cache to disk, merging it with any entries written by other runs since it was loaded.
+
+        Raises TimeoutError if another run holds the lock on the cache file for too long.
+        """
+        self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock, _LockFile(self._lock_path):
+            _cache = self._load()
+            _cache["checksums"].update(self._checksums)
+            # Drop files which no longer exist, such as temporary archives, so the cache does not grow indefinitely
+            _cache["checksums"] = {
+                path: entry
+                for path, entry in _cache["checksums"].items()
+                if os.path.exists(path)
+            }
+            for server_url, checksums in self._stored.items():
+                _stored = dict.fromkeys(_cache["stored"].get(server_url, []))
+                for checksum in checksums:
+                    _stored.pop(checksum, None)
+                    _stored[checksum] = None
+                _cache["stored"][server_url] = list(_stored)[-self._max_stored :]
+
+            # Written to a temporary file and then moved, so that other runs never read a partially written cache
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self._cache_path.parent, suffix=".tmp", delete=False
+            ) as temp_file:
+                json.dump(_cache, temp_file)
+            os.replace(temp_file.name, self._cache_path)
+
+    def summary(self) -> str:
+        """Describe the number of cache hits and misses.
+
+        Returns
+        -------
+        str
+            The summary message
+
+        """
+        return (
+            f"File cache: {self.hits} file{'s' if self.hits != 1 else ''} already stored, "
+            f"{self.misses} new file{'s' if self.misses != 1 else ''} uploaded."
+        )
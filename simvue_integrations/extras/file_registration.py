@@ -0,0 +1,58 @@
+"""File Registration.
+
+Build the data with which a file is registered as an artifact of a Simvue run, as simvue.Run.save_file does, for
+uploads which already know the checksum of the file and so do not need it to be hashed again.
+"""
+
+import mimetypes
+import os
+import typing
+
+import simvue
+
+
+def file_registration(
+    run: simvue.Run,
+    file_path: typing.Union[str, os.PathLike],
+    category: typing.Literal["input", "output", "code"],
+    checksum: str,
+    name: typing.Optional[str] = None,
+    filetype: typing.Optional[str] = None,
+) -> typing.Dict[str, typing.Any]:
+    """Build the data to register a file with, in the form sent to the server by simvue.Run.save_file.
+
+    Parameters
+    ----------
+    run : simvue.Run
+        The run to register the file with
+    file_path : typing.Union[str, os.PathLike]
+        Path to the file
+    category : typing.Literal["input", "output", "code"]
+        Category of the file with respect to the run
+    checksum : str
+        The SHA256 checksum of the file
+    name : typing.Optional[str], optional
+        Name to associate with the file, by default the file name
+    filetype : typing.Optional[str], optional
+        The MIME type of the file, by default guessed from the file name
+
+    Returns
+    -------
+    typing.Dict[str, typing.Any]
+        The data to pass to the save_file method of the run's server proxy
+
+    """
+    return {
+        "name": name or os.path.basename(file_path),
+        "run": run._name,
+        "type": filetype
+        or mimetypes.guess_type(file_path)[0]
+        or "application/octet-stream",
+        "storage": run._storage_id,
+        "category": category,
+        "size": os.path.getsize(file_path),
+        "originalPath": os.path.abspath(
+            os.path.expanduser(os.path.expandvars(file_path))
+        ),
+        "checksum": checksum,
+    }
@@ -0,0 +1,157 @@
+"""HIT Parser.
+
+Parser for the HIT format used by MOOSE input files, with results cached per process.
+"""
+
+import hashlib
+import os
+import pathlib
+import re
+import threading
+import typing
+
+HitValue = typing.Union[str, float]
+
+# Each token of a HIT file, matched in a single pass. Block ends such as [] or [../] are matched before block starts,
+# and quoted values may span multiple lines.
+_HIT_TOKEN: re.Pattern[str] = re.compile(
+    r"""
+    (?P<comment>\#[^\n]*)
+    |(?P<block_end>\[[^\w\]]*\])
+    |\[(?P<block_name>[^\]\n]+)\]
+    |(?P<key>[^\s=\[\]\#'"]+)[ \t]*=[ \t]*(?P<value>'[^']*'|"[^"]*"|[^\n\#]*)
+    |(?P<other>[^\s\#\[]+)
+    """,
+    re.VERBOSE,
+)
+
+_MAX_CACHED_FILES: int = 128
+_file_digests: typing.Dict[typing.Tuple[str, int, int], str] = {}
+_parsed_inputs: typing.Dict[str, typing.Dict[str, HitValue]] = {}
+_cache_lock = threading.Lock()
+
+
+def _format_value(value: str) -> HitValue:
+    """Convert a value to a float if possible, and compact values which span multiple lines onto a single line.
+
+    Parameters
+    ----------
+    value : str
+        The value as written in the input file
+
+    Returns
+    -------
+    HitValue
+        The value as a float, or as a string
+
+    """
+    value = value.strip()
+    if "\n" in value:
+        # Multi line arrays are stored with single spaces between each entry, keeping any ';' row separators
+        return f"{value[0]}{' '.join(value[1:-1].split())}{value[-1]}"
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _block_path(block_name: str) -> typing.List[str]:
+    """Convert the name of a block into the keys it adds to the path of parameters within it.
+
+    Parameters
+    ----------
+    block_name : str
+        The name of the block, from between the square brackets
+
+    Returns
+    -------
+    typing.List[str]
+        The key for each level of the block name, with dots replaced to avoid clashing with dot notation
+
+    """
+    block_name = block_name.strip().removeprefix("./")
+    return [part.replace(".", "_") for part in block_name.strip("/").split("/")]
+
+
+def parse_hit(text: str) -> typing.Dict[str, HitValue]:
+    """Parse the contents of a HIT file into a flat dictionary, using dot notation for keys within blocks.
+
+    Parameters
+    ----------
+    text : str
+        The contents of the HIT file
+
+    Returns
+    -------
+    typing.Dict[str, HitValue]
+        Each parameter in the file, keyed by its block path and name
+
+    """
+    parameters: typing.Dict[str, HitValue] = {}
+    # Each entry is the list of keys added by one open block, since a block name such as [A/B] is closed by a single []
+    block_stack: typing.List[typing.List[str]] = []
+    path: typing.List[str] = []
+
+    for token in _HIT_TOKEN.finditer(text):
+        kind = token.lastgroup
+        if kind == "block_end":
+            if block_stack:
+                del path[len(path) - len(block_stack.pop()) :]
+        elif kind == "value":
+            key_path = path + token.group("key").strip("/").split("/")
+            parameters[".".join(key_path)] = _format_value(token.group("value"))
+        elif kind == "block_name":
+            block_stack.append(_block_path(token.group("block_name")))
+            path += block_stack[-1]
+
+    return parameters
+
+
+def parse_hit_file(
+    input_file: typing.Union[str, pathlib.Path],
+) -> typing.Dict[str, HitValue]:
+    """Parse a HIT file, reusing the result from any previous parse of the same file or of identical contents.
+
+    Files are identified by their path, modification time and size, and then by a hash of their contents,
+    so that many runs launched from the same input file, or from copies of it, only parse it once per process.
+
+    Parameters
+    ----------
+    input_file : typing.Union[str, pathlib.Path]
+        Path to the HIT file
+
+    Returns
+    -------
+    typing.Dict[str, HitValue]
+        Each parameter in the file, keyed by its block path and name
+
+    """
+    _stat = os.stat(input_file)
+    _file_key = (
+        str(pathlib.Path(input_file).resolve()),
+        _stat.st_mtime_ns,
+        _stat.st_size,
+    )
+
+    with _cache_lock:
+        _digest = _file_digests.get(_file_key)
+        if _digest and _digest in _parsed_inputs:
+            return dict(_parsed_inputs[_digest])
+
+    _content = pathlib.Path(input_file).read_bytes()
+    _digest = hashlib.sha256(_content).hexdigest()
+
+    with _cache_lock:
+        _parsed = _parsed_inputs.get(_digest)
+
+    if _parsed is None:
+        _parsed = parse_hit(_content.decode())
+
+    with _cache_lock:
+        if len(_parsed_inputs) >= _MAX_CACHED_FILES:
+            _parsed_inputs.clear()
+            _file_digests.clear()
+        _file_digests[_file_key] = _digest
+        _parsed_inputs[_digest] = _parsed
+
+    return dict(_parsed)
@@ -0,0 +1,128 @@
+"""Interval Aggregator.
+
+Aggregate the values of metrics over a fixed number of steps, so that high frequency metrics are only logged once
+per interval.
+"""
+
+import typing
+
+Aggregation = typing.Literal["mean", "min", "max", "last"]
+
+
+class IntervalAggregator:
+    """Aggregate the values of each metric over an interval of steps, returning the aggregates once it is complete.
+
+    Values are only combined with addition, division and the given minimum and maximum functions, so values which
+    are tensors stay on the device they were computed on until the aggregates are converted to numbers by the caller.
+    """
+
+    __slots__ = (
+        "interval",
+        "aggregation",
+        "_minimum",
+        "_maximum",
+        "_values",
+        "_counts",
+        "_count",
+    )
+
+    def __init__(
+        self,
+        interval: int = 1,
+        aggregation: Aggregation = "mean",
+        minimum: typing.Callable[[typing.Any, typing.Any], typing.Any] = min,
+        maximum: typing.Callable[[typing.Any, typing.Any], typing.Any] = max,
+    ):
+        """Initialize the aggregator.
+
+        Parameters
+        ----------
+        interval : int, optional
+            Number of steps to aggregate the values of each metric over, by default 1
+        aggregation : Aggregation, optional
+            How to aggregate the values over each interval, either 'mean', 'min', 'max' or 'last', by default 'mean'
+        minimum : typing.Callable[[typing.Any, typing.Any], typing.Any], optional
+            Function returning the smaller of two values, by default min
+        maximum : typing.Callable[[typing.Any, typing.Any], typing.Any], optional
+            Function returning the larger of two values, by default max
+
+        """
+        self.interval = interval
+        self.aggregation = aggregation
+        self._minimum = minimum
+        self._maximum = maximum
+        self._values: typing.Dict[str, typing.Any] = {}
+        # Number of values of each metric, and number of steps, in the current interval
+        self._counts: typing.Dict[str, int] = {}
+        self._count: int = 0
+
+    def _combine(self, current: typing.Any, value: typing.Any) -> typing.Any:
+        """Combine a new value of a metric with its aggregate so far.
+
+        Parameters
+        ----------
+        current : typing.Any
+            The aggregate so far, the sum of the values if calculating the mean
+        value : typing.Any
+            The new value
+
+        Returns
+        -------
+        typing.Any
+            The new aggregate
+
+        """
+        if self.aggregation == "mean":
+            return current + value
+        if self.aggregation == "min":
+            return self._minimum(current, value)
+        if self.aggregation == "max":
+            return self._maximum(current, value)
+        return value
+
+    def add(
+        self, values: typing.Dict[str, typing.Any]
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """Add the values of metrics for a step, returning the aggregates if this step completes the interval.
+
+        Parameters
+        ----------
+        values : typing.Dict[str, typing.Any]
+            The value of each metric for this step, where metrics whose value is None are ignored
+
+        Returns
+        -------
+        typing.Optional[typing.Dict[str, typing.Any]]
+            The aggregate of each metric over the interval, or None if the interval is not yet complete
+
+        """
+        for name, value in values.items():
+            if value is None:
+                continue
+            if name in self._values:
+                self._values[name] = self._combine(self._values[name], value)
+                self._counts[name] += 1
+            else:
+                self._values[name] = value
+                self._counts[name] = 1
+        self._count += 1
+        if self._count < self.interval:
+            return None
+        return self.flush()
+
+    def flush(self) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """Return the aggregates of the values added since the last complete interval, and start a new interval.
+
+        Returns
+        -------
+        typing.Optional[typing.Dict[str, typing.Any]]
+            The aggregate of each metric, or None if no values have been added
+
+        """
+        _values, _counts = self._values, self._counts
+        self._values, self._counts, self._count = {}, {}, 0
+        if not _values:
+            return None
+        if self.aggregation == "mean":
+            return {name: value / _counts[name] for name, value in _values.items()}
+        return _values
@@ -0,0 +1,142 @@
+"""Metric Buffer.
+
+Buffer for collecting metric records from connector callbacks, so that they can be sent to Simvue in bulk.
+"""
+
+import asyncio
+import threading
+import typing
+
+MetricRecord = typing.Tuple[typing.Dict[str, typing.Any], typing.Any, typing.Any, str]
+
+
+class MetricBuffer:
+    """Collect metric records and pass them on in batches, once enough records are held or enough time has passed.
+
+    Consecutive records for the same step, time and timestamp are merged into a single record as long as
+    their metric names do not overlap, so that a step is only passed on as a separate record once a record
+    for a different step arrives. Optionally, the buffer is also flushed at the end of each step, when a record
+    for a different step arrives. Records are always passed on in the order they were added.
+    """
+
+    def __init__(
+        self,
+        flush_callback: typing.Callable[[typing.List[MetricRecord]], None],
+        max_records: int = 100,
+        flush_interval: float = 1.0,
+        exception_callback: typing.Optional[typing.Callable[[str], None]] = None,
+        flush_on_step: bool = False,
+    ):
+        """Initialize the buffer.
+
+        Parameters
+        ----------
+        flush_callback : typing.Callable[[typing.List[MetricRecord]], None]
+            Function which is passed each batch of (metrics, step, time, timestamp) records
+        max_records : int, optional
+            Number of records to hold before passing them on, by default 100
+        flush_interval : float, optional
+            Maximum time in seconds which a record is held before being passed on, by default 1.0
+        exception_callback : typing.Optional[typing.Callable[[str], None]], optional
+            Function called with a message if a timed flush fails, by default None
+        flush_on_step : bool, optional
+            Whether to flush the records held for a step as soon as a record for a different step is added,
+            by default False
+
+        """
+        self._flush_callback = flush_callback
+        self._max_records = max_records
+        self._flush_interval = flush_interval
+        self._exception_callback = exception_callback
+        self._flush_on_step = flush_on_step
+        self._records: typing.List[MetricRecord] = []
+        # Held while flushing as well as adding, so that batches cannot be passed on out of order
+        self._lock = threading.RLock()
+        self._termination_trigger = threading.Event()
+        self._flush_thread: typing.Optional[threading.Thread] = None
+
+    def add(
+        self,
+        metrics: typing.Dict[str, typing.Any],
+        step: typing.Any,
+        time: typing.Any,
+        timestamp: str,
+    ) -> None:
+        """Add a metric record to the buffer, flushing the buffer if it is full or, optionally, a new step has begun.
+
+        Parameters
+        ----------
+        metrics : typing.Dict[str, typing.Any]
+            The metric values to log
+        step : typing.Any
+            The step of the record
+        time : typing.Any
+            The simulation time of the record
+        timestamp : str
+            The timestamp of the record
+
+        """
+        with self._lock:
+            if self._records:
+                last_metrics, last_step, last_time, last_timestamp = self._records[-1]
+                if (last_step, last_time, last_timestamp) == (
+                    step,
+                    time,
+                    timestamp,
+                ) and last_metrics.keys().isdisjoint(metrics):
+                    last_metrics.update(metrics)
+                    return
+                if self._flush_on_step and last_step != step:
+                    self.flush()
+
+            self._records.append((dict(metrics), step, time, timestamp))
+
+            if len(self._records) >= self._max_records:
+                self.flush()
+
+    def flush(self):
+        """Pass all records held in the buffer to the flush callback."""
+        with self._lock:
+            if not self._records:
+                return
+            _records, self._records = self._records, []
+            self._flush_callback(_records)
+
+    def _timed_flush(self):
+        """Flush the buffer, passing any error to the exception callback rather than raising it."""
+        try:
+            self.flush()
+        except RuntimeError as e:
+            if self._exception_callback:
+                self._exception_callback(f"Failed to flush metrics: {e}")
+
+    def _flush_loop(self):
+        """Periodically flush the buffer until the buffer is stopped."""
+        while not self._termination_trigger.wait(self._flush_interval):
+            self._timed_flush()
+
+    async def flush_periodically(self):
+        """Periodically flush the buffer from the running event loop, as an alternative to start().
+
+        Returns once the buffer is stopped, or can be cancelled before calling stop().
+        """
+        self._termination_trigger.clear()
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            if self._termination_trigger.is_set():
+                return
+            await asyncio.get_running_loop().run_in_executor(None, self._timed_flush)
+
+    def start(self):
+        """Start flushing the buffer periodically in a background thread."""
+        self._termination_trigger.clear()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+
+    def stop(self):
+        """Stop the background thread and flush any remaining records."""
+        self._termination_trigger.set()
+        if self._flush_thread:
+            self._flush_thread.join()
+            self._flush_thread = None
+        self.flush()
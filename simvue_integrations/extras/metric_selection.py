@@ -0,0 +1,136 @@
+"""Metric Selection.
+
+Select which values in a dictionary of logs to forward as metrics, using glob patterns of metric names.
+"""
+
+import fnmatch
+import re
+import typing
+
+
+class MetricSelector:
+    """Select the values to log as metrics from dictionaries of logs whose keys are discovered as they are seen.
+
+    The name each key is logged under, or that it is not logged, is worked out the first time the key is seen and
+    cached, so that selecting metrics from each later dictionary with the same keys is a single pass over the cache.
+    """
+
+    def __init__(
+        self,
+        include: typing.Optional[typing.List[str]] = None,
+        exclude: typing.Optional[typing.List[str]] = None,
+        ignore_keys: typing.Iterable[str] = (),
+    ):
+        """Initialize the selector.
+
+        Parameters
+        ----------
+        include : typing.Optional[typing.List[str]], optional
+            Glob patterns of the metric names to log, by default None (log all metrics)
+        exclude : typing.Optional[typing.List[str]], optional
+            Glob patterns of the metric names not to log, which take precedence over include, by default None
+        ignore_keys : typing.Iterable[str], optional
+            Keys which are never metrics, by default ()
+
+        """
+        self._include: typing.Optional[re.Pattern[str]] = (
+            self._compile(include) if include is not None else None
+        )
+        self._exclude: typing.Optional[re.Pattern[str]] = (
+            self._compile(exclude) if exclude else None
+        )
+        self._ignore_keys = frozenset(ignore_keys)
+        # For each prefix, every key seen so far, and the name to log the selected keys under
+        self._seen_keys: typing.Dict[str, typing.Set[str]] = {}
+        self._metric_names: typing.Dict[str, typing.Dict[str, str]] = {}
+
+    @staticmethod
+    def _compile(patterns: typing.List[str]) -> re.Pattern[str]:
+        """Combine glob patterns into a single regular expression.
+
+        Parameters
+        ----------
+        patterns : typing.List[str]
+            The glob patterns
+
+        Returns
+        -------
+        re.Pattern[str]
+            Pattern matching a name if any of the glob patterns match it
+
+        """
+        return re.compile(
+            "|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns)
+            or "(?!)"
+        )
+
+    def _is_selected(self, name: str) -> bool:
+        """Check whether a metric name is allowed by the include and exclude patterns.
+
+        Parameters
+        ----------
+        name : str
+            The metric name
+
+        Returns
+        -------
+        bool
+            Whether the metric should be logged
+
+        """
+        if self._include and not self._include.match(name):
+            return False
+        return not (self._exclude and self._exclude.match(name))
+
+    def metric_names(
+        self, logs: typing.Dict[str, typing.Any], prefix: str = ""
+    ) -> typing.Dict[str, str]:
+        """Get the name to log each selected key of the logs under, discovering any keys not seen before.
+
+        Parameters
+        ----------
+        logs : typing.Dict[str, typing.Any]
+            The logs
+        prefix : str, optional
+            Prefix added to each key to give its metric name, by default ""
+
+        Returns
+        -------
+        typing.Dict[str, str]
+            The metric name of each selected key
+
+        """
+        _seen_keys = self._seen_keys.setdefault(prefix, set())
+        _metric_names = self._metric_names.setdefault(prefix, {})
+        if not _seen_keys.issuperset(logs.keys()):
+            for key in logs:
+                if key in _seen_keys:
+                    continue
+                _seen_keys.add(key)
+                if key not in self._ignore_keys and self._is_selected(prefix + key):
+                    _metric_names[key] = prefix + key
+        return _metric_names
+
+    def select(
+        self, logs: typing.Dict[str, typing.Any], prefix: str = ""
+    ) -> typing.Dict[str, typing.Any]:
+        """Select the values in the logs to log as metrics.
+
+        Parameters
+        ----------
+        logs : typing.Dict[str, typing.Any]
+            The logs
+        prefix : str, optional
+            Prefix added to each key to give its metric name, by default ""
+
+        Returns
+        -------
+        typing.Dict[str, typing.Any]
+            The value of each selected metric which is present in the logs, keyed by metric name
+
+        """
+        return {
+            name: logs[key]
+            for key, name in self.metric_names(logs, prefix).items()
+            if logs.get(key) is not None
+        }
@@ -0,0 +1,126 @@
+"""MOOSE Log.
+
+Compiled patterns and per-step state for the lines of interest in the MOOSE console log.
+"""
+
+import re
+import time
+import typing
+
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+
+# Label and pattern for each line of interest in the MOOSE log, in the form passed to Multiparser.
+# Multiparser passes on the text matched by each pattern, or the group it captures, which is the residual for iterations.
+LOG_PATTERNS: typing.Tuple[
+    typing.Tuple[str, typing.Union[str, re.Pattern[str]]], ...
+] = (
+    ("time_step", re.compile(r"Time Step.*")),
+    ("converged", " Solve Converged!"),
+    ("non_converged", " Solve Did NOT Converge!"),
+    (
+        "terminated",
+        re.compile(r"Terminator '.+' is causing the execution to terminate."),
+    ),
+    ("nonlinear", re.compile(r" \d+ Nonlinear \|R\| = (\S+)")),
+    ("linear", re.compile(r"     \d+ Linear \|R\| = (\S+)")),
+)
+
+TIME_STEP_PATTERN: re.Pattern[str] = re.compile(
+    rf"Time Step\s+(\d+), time = ({_NUMBER})(?:, dt = ({_NUMBER}))?"
+)
+TERMINATOR_PATTERN: re.Pattern[str] = re.compile(
+    r"Terminator '(.+)' is causing the execution to terminate."
+)
+
+# The header of the log, which describes the framework, mesh and executioner, ends when the first solve starts
+HEADER_END_PATTERN: re.Pattern[str] = re.compile(
+    r"^\s*(?:Time Step\s+\d+|\d+ Nonlinear \|R\|)"
+)
+# Maximum number of characters to read while searching the log for the end of the header
+HEADER_MAX_SIZE: int = 1024 * 1024
+# Characters which will fail server side validation of a metadata key
+HEADER_KEY_INVALID_PATTERN: re.Pattern[str] = re.compile(r"[^\w\-\s\.]+")
+
+
+class StepRecord(typing.NamedTuple):
+    """Summary of a single step of a MOOSE simulation."""
+
+    step: int
+    time: float
+    dt: typing.Optional[float]
+    nonlinear_iterations: int
+    linear_iterations: int
+    wall_time: float
+
+
+class MooseStepState:
+    """Keep track of the step currently being solved by MOOSE, as each line of interest is read from the log.
+
+    Linear and nonlinear iterations are counted from the start of a step until its solve converges, including any
+    attempts at the same step which did not converge, and the wall time of a step is measured from when it was first
+    started. The counters are plain integer attributes, so that the many iteration lines in a log cost only an increment.
+    """
+
+    __slots__ = (
+        "step",
+        "time",
+        "dt",
+        "nonlinear",
+        "linear",
+        "wall_start",
+        "_in_progress",
+    )
+
+    def __init__(self):
+        """Initialize the state before the first step."""
+        self.step: int = 0
+        self.time: float = 0
+        self.dt: typing.Optional[float] = None
+        self.nonlinear: int = 0
+        self.linear: int = 0
+        # For static problems there are no steps, so the wall time is measured from the start of the simulation
+        self.wall_start: float = time.monotonic()
+        self._in_progress: bool = False
+
+    def start_step(self, line: str) -> None:
+        """Start a new step from a 'Time Step' line in the log.
+
+        Parameters
+        ----------
+        line : str
+            The line from the log, of the form 'Time Step X, time = Y, dt = Z'
+
+        """
+        if not (_match := TIME_STEP_PATTERN.search(line)):
+            return
+
+        _step = int(_match.group(1))
+        # A step which is being retried after failing to converge is printed again, with the same step number
+        if not (self._in_progress and _step == self.step):
+            self.wall_start = time.monotonic()
+        self._in_progress = True
+        self.step = _step
+        self.time = float(_match.group(2))
+        self.dt = float(_match.group(3)) if _match.group(3) else None
+
+    def finish_step(self) -> StepRecord:
+        """Finish the current step once its solve has converged, resetting the iteration counters for the next step.
+
+        Returns
+        -------
+        StepRecord
+            Summary of the step which has finished
+
+        """
+        _record = StepRecord(
+            step=self.step,
+            time=self.time,
+            dt=self.dt,
+            nonlinear_iterations=self.nonlinear,
+            linear_iterations=self.linear,
+            wall_time=time.monotonic() - self.wall_start,
+        )
+        self.nonlinear = 0
+        self.linear = 0
+        self._in_progress = False
+        return _record
@@ -0,0 +1,214 @@
+"""Parallel Zip.
+
+Create Zip archives with members compressed in parallel across several threads.
+"""
+
+import concurrent.futures
+import os
+import pathlib
+import shutil
+import tempfile
+import typing
+import zipfile
+import zlib
+
+COMPRESSION_METHODS: typing.Dict[str, int] = {
+    "stored": zipfile.ZIP_STORED,
+    "deflated": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+# Private parts of zipfile used to add members compressed outside of the ZipFile, which have been stable across
+# Python 3.10 - 3.12; if they are missing, members are compressed and written one at a time with ZipFile.write()
+_ZIPFILE_ATTRIBUTES = ("fp", "filelist", "NameToInfo", "start_dir", "_didModify")
+
+# Compressed members larger than this are held in a temporary file rather than in memory until written
+_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _compress_member(
+    file_path: pathlib.Path, compress_type: int, compresslevel: typing.Optional[int]
+) -> typing.Tuple[int, int, typing.IO[bytes]]:
+    """Compress a single file, in the form used for the data of a Zip archive member.
+
+    Parameters
+    ----------
+    file_path : pathlib.Path
+        The path to the file to compress
+    compress_type : int
+        The zipfile compression method to use
+    compresslevel : typing.Optional[int]
+        The compression level to use, or None for the default level of the compression method
+
+    Returns
+    -------
+    typing.Tuple[int, int, typing.IO[bytes]]
+        The CRC-32 and size of the uncompressed file, and a buffer holding the compressed data
+
+    """
+    # Uses zipfile's own compressors, so that data matches what ZipFile.write() would produce
+    _compressor = zipfile._get_compressor(compress_type, compresslevel)
+    _buffer = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    _crc = 0
+    _size = 0
+
+    with open(file_path, "rb") as in_file:
+        while _chunk := in_file.read(_CHUNK_SIZE):
+            _crc = zlib.crc32(_chunk, _crc)
+            _size += len(_chunk)
+            _buffer.write(_compressor.compress(_chunk) if _compressor else _chunk)
+
+    if _compressor:
+        _buffer.write(_compressor.flush())
+
+    return _crc, _size, _buffer
+
+
+def _supports_parallel_write(zip_file: zipfile.ZipFile) -> bool:
+    """Check whether members can be compressed in parallel and added to a Zip archive with this version of zipfile.
+
+    Parameters
+    ----------
+    zip_file : zipfile.ZipFile
+        The archive being written
+
+    Returns
+    -------
+    bool
+        Whether the private parts of zipfile used to add compressed members are all present
+
+    """
+    return hasattr(zipfile, "_get_compressor") and all(
+        hasattr(zip_file, attribute) for attribute in _ZIPFILE_ATTRIBUTES
+    )
+
+
+def _write_members_parallel(
+    zip_file: zipfile.ZipFile,
+    members: typing.Iterable[typing.Tuple[pathlib.Path, str]],
+    compress_type: int,
+    compresslevel: typing.Optional[int],
+    max_workers: int,
+):
+    """Compress members in worker threads, and write them to an open Zip archive in order from the calling thread.
+
+    Parameters
+    ----------
+    zip_file : zipfile.ZipFile
+        The archive to write to
+    members : typing.Iterable[typing.Tuple[pathlib.Path, str]]
+        The path of each file to add to the archive, and the name to give it within the archive
+    compress_type : int
+        The zipfile compression method to use
+    compresslevel : typing.Optional[int]
+        The compression level to use, or None for the default level of the compression method
+    max_workers : int
+        The number of threads to compress members with
+
+    """
+    _members = iter(members)
+    _pending: typing.List[typing.Tuple[zipfile.ZipInfo, concurrent.futures.Future]] = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def _submit_next() -> bool:
+            """Start compressing the next member, if there are any left.
+
+            Returns
+            -------
+            bool
+                Whether there was a member left to start compressing
+
+            """
+            if (_member := next(_members, None)) is None:
+                return False
+            file_path, arcname = _member
+            _pending.append(
+                (
+                    zipfile.ZipInfo.from_file(file_path, arcname),
+                    executor.submit(
+                        _compress_member, file_path, compress_type, compresslevel
+                    ),
+                )
+            )
+            return True
+
+        while len(_pending) < 2 * max_workers and _submit_next():
+            pass
+
+        while _pending:
+            zip_info, future = _pending.pop(0)
+            _submit_next()
+            _crc, _size, _buffer = future.result()
+
+            with _buffer:
+                zip_info.compress_type = compress_type
+                zip_info.CRC = _crc
+                zip_info.file_size = _size
+                zip_info.compress_size = _buffer.tell()
+                if compress_type == zipfile.ZIP_LZMA:
+                    # Marks that the LZMA data starts with an end of stream marker, as set by ZipFile.write()
+                    zip_info.flag_bits |= 0x02
+
+                zip_info.header_offset = zip_file.fp.tell()
+                zip_file.fp.write(zip_info.FileHeader())
+                _buffer.seek(0)
+                shutil.copyfileobj(_buffer, zip_file.fp)
+
+            # Register the member, so that the central directory is written for it when the archive is closed
+            zip_file.filelist.append(zip_info)
+            zip_file.NameToInfo[zip_info.filename] = zip_info
+            zip_file.start_dir = zip_file.fp.tell()
+            zip_file._didModify = True
+
+
+def write_zip(
+    out_path: typing.Union[str, pathlib.Path],
+    members: typing.Iterable[typing.Tuple[pathlib.Path, str]],
+    compression: typing.Literal["stored", "deflated", "bzip2", "lzma"] = "deflated",
+    compresslevel: typing.Optional[int] = None,
+    max_workers: typing.Optional[int] = None,
+):
+    """Write a Zip archive, compressing members in parallel and writing them to the archive in order.
+
+    Compressed data is produced in worker threads (zlib, bz2 and lzma all release the GIL while compressing),
+    and written to the archive by the calling thread, using the headers generated by zipfile itself.
+    At most twice as many members as there are workers are held in memory or temporary files at once.
+    If this version of zipfile does not provide the private attributes this relies on, members are instead
+    compressed and written one at a time with ZipFile.write().
+
+    Parameters
+    ----------
+    out_path : typing.Union[str, pathlib.Path]
+        The path of the archive to create
+    members : typing.Iterable[typing.Tuple[pathlib.Path, str]]
+        The path of each file to add to the archive, and the name to give it within the archive
+    compression : typing.Literal["stored", "deflated", "bzip2", "lzma"], optional
+        The compression method to use, by default "deflated"
+    compresslevel : typing.Optional[int], optional
+        The compression level to use, by default None (the default level of the compression method)
+    max_workers : typing.Optional[int], optional
+        The number of threads to compress members with, by default the number of CPUs
+
+    """
+    _compress_type = COMPRESSION_METHODS[compression]
+
+    with zipfile.ZipFile(out_path, "w") as zip_file:
+        if _supports_parallel_write(zip_file):
+            _write_members_parallel(
+                zip_file,
+                members,
+                _compress_type,
+                compresslevel,
+                max_workers or os.cpu_count() or 1,
+            )
+        else:
+            for file_path, arcname in members:
+                zip_file.write(
+                    file_path,
+                    arcname,
+                    compress_type=_compress_type,
+                    compresslevel=compresslevel,
+                )
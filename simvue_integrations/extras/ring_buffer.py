@@ -0,0 +1,104 @@
+"""Ring Buffer.
+
+Fixed size buffer of high frequency values, for connectors which downsample values before logging them as metrics.
+"""
+
+import typing
+
+import numpy
+
+
+class RingBuffer:
+    """Hold the most recent values appended, each with the index of the value in the stream of all values appended.
+
+    Values are stored in preallocated NumPy arrays, so memory use is fixed regardless of how many values are
+    appended. Once the buffer is full the oldest values are overwritten.
+    """
+
+    __slots__ = ("_indices", "_values", "_count", "_start")
+
+    def __init__(self, capacity: int = 4096):
+        """Initialize the buffer.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            Maximum number of values to hold, by default 4096
+
+        """
+        self._indices = numpy.empty(capacity, dtype=numpy.int64)
+        self._values = numpy.empty(capacity, dtype=numpy.float64)
+        # Total number of values ever appended, and the total when the buffer was last drained
+        self._count: int = 0
+        self._start: int = 0
+
+    def __len__(self) -> int:
+        """Get the number of values currently held.
+
+        Returns
+        -------
+        int
+            The number of values held
+
+        """
+        return min(self._count - self._start, len(self._values))
+
+    def append(self, value: float):
+        """Append a value, overwriting the oldest value held if the buffer is full.
+
+        Parameters
+        ----------
+        value : float
+            The value to append
+
+        """
+        _position = self._count % len(self._values)
+        self._indices[_position] = self._count
+        self._values[_position] = value
+        self._count += 1
+
+    def drain(self) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+        """Remove all values held, oldest first.
+
+        Returns
+        -------
+        typing.Tuple[numpy.ndarray, numpy.ndarray]
+            The stream index of each value held, and the values
+
+        """
+        _length = len(self)
+        _positions = numpy.arange(self._count - _length, self._count) % len(
+            self._values
+        )
+        self._start = self._count
+        return self._indices[_positions], self._values[_positions]
+
+
+def downsample_stride(
+    indices: numpy.ndarray, values: numpy.ndarray, max_points: int
+) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+    """Reduce a series to at most the given number of evenly spaced points, always keeping the first and last points.
+
+    Parameters
+    ----------
+    indices : numpy.ndarray
+        The index of each point
+    values : numpy.ndarray
+        The value of each point
+    max_points : int
+        The maximum number of points to keep, at least 1
+
+    Returns
+    -------
+    typing.Tuple[numpy.ndarray, numpy.ndarray]
+        The indices and values of the points kept
+
+    """
+    if len(values) <= max_points:
+        return indices, values
+    if max_points == 1:
+        return indices[-1:], values[-1:]
+    _keep = numpy.unique(
+        numpy.linspace(0, len(values) - 1, max_points).round().astype(int)
+    )
+    return indices[_keep], values[_keep]
@@ -0,0 +1,140 @@
+"""Run Pool.
+
+Create Simvue runs ahead of when they are needed and close them once finished in background threads, for callbacks
+which create a short lived run for each stage of a longer process, such as each epoch of model training.
+"""
+
+import concurrent.futures
+import typing
+
+import simvue
+
+
+class RunPool:
+    """Create and close a sequence of runs in background threads, so that the caller never waits on the server.
+
+    Runs are created by a callback, with the index of the run in the sequence and whether it should be started
+    immediately. While one run is in use the next is created in the 'created' state, and it is only started once it
+    is needed, so that its start time and duration only cover the stage it tracks. Runs which are released are closed
+    in the background, and any errors raised while closing them are raised again when the pool is shut down.
+    Runs are prepared and closed in separate threads, so that preparing the next run never waits for a run which is
+    waiting on slow work, such as file uploads, before it can be closed.
+    """
+
+    def __init__(
+        self,
+        create_run: typing.Callable[[int, bool], simvue.Run],
+        prepare_ahead: bool = True,
+    ):
+        """Initialize the pool.
+
+        Parameters
+        ----------
+        create_run : typing.Callable[[int, bool], simvue.Run]
+            Function called with the index of a run and whether to start it, which returns the initialised run
+        prepare_ahead : bool, optional
+            Whether to create the next run in the background while the current run is in use, by default True
+            Runs can only be started after they are created when online, so this should be False for offline runs.
+
+        """
+        self._create_run = create_run
+        self._prepare_ahead = prepare_ahead
+        self._prepare_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="simvue_run_pool_prepare"
+        )
+        self._close_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="simvue_run_pool_close"
+        )
+        self._prepared: typing.Dict[int, concurrent.futures.Future] = {}
+        self._closing: typing.List[concurrent.futures.Future] = []
+
+    def get(self, index: int, prepare_next: bool = True) -> simvue.Run:
+        """Get the started run for the given index, creating it now if it was not created in the background.
+
+        Parameters
+        ----------
+        index : int
+            The index of the run in the sequence
+        prepare_next : bool, optional
+            Whether a run with the next index will be needed, and so should be created in the background, by default True
+
+        Returns
+        -------
+        simvue.Run
+            The run, which has been started
+
+        """
+        if _prepared := self._prepared.pop(index, None):
+            run = _prepared.result()
+            run.reconnect(run.id)
+        else:
+            run = self._create_run(index, True)
+
+        if prepare_next and self._prepare_ahead and index + 1 not in self._prepared:
+            self._prepared[index + 1] = self._prepare_executor.submit(
+                self._create_run, index + 1, False
+            )
+        return run
+
+    def _close(
+        self,
+        run: simvue.Run,
+        wait_for: typing.Optional[typing.List[concurrent.futures.Future]],
+    ):
+        """Close a run once any work still using it has finished.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to close
+        wait_for : typing.Optional[typing.List[concurrent.futures.Future]]
+            Futures of work using the run, such as file uploads, which must finish before it is closed
+
+        """
+        if wait_for:
+            concurrent.futures.wait(wait_for)
+        run.close()
+
+    def release(
+        self,
+        run: simvue.Run,
+        wait_for: typing.Optional[typing.List[concurrent.futures.Future]] = None,
+    ):
+        """Close a run which is no longer in use in the background.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to close
+        wait_for : typing.Optional[typing.List[concurrent.futures.Future]], optional
+            Futures of work using the run, such as file uploads, which must finish before it is closed, by default None
+
+        """
+        self._closing.append(self._close_executor.submit(self._close, run, wait_for))
+
+    def shutdown(self):
+        """Wait for all runs to be closed, and delete any runs which were created but never used.
+
+        Every run is closed and the background threads are stopped even if preparing, deleting or closing
+        another run failed, after which the first of any errors is raised again.
+        """
+        _errors: typing.List[Exception] = []
+        try:
+            for _prepared in self._prepared.values():
+                try:
+                    simvue.Client().delete_run(_prepared.result().id)
+                except Exception as e:
+                    _errors.append(e)
+            for _closing in self._closing:
+                try:
+                    _closing.result()
+                except Exception as e:
+                    _errors.append(e)
+        finally:
+            self._prepared = {}
+            self._closing = []
+            self._prepare_executor.shutdown()
+            self._close_executor.shutdown()
+
+        if _errors:
+            raise _errors[0]
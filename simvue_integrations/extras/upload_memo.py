@@ -0,0 +1,311 @@
+"""Upload Memo.
+
+Remember the files and objects uploaded to runs in this process, so that identical content is only hashed and
+serialised once, and never uploaded to the same run twice.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+import typing
+import weakref
+
+import simvue
+
+from simvue_integrations.extras.file_registration import file_registration
+
+
+def _run_key(run: simvue.Run) -> str:
+    """Get a key identifying a run, which is available for offline runs too.
+
+    Parameters
+    ----------
+    run : simvue.Run
+        The run
+
+    Returns
+    -------
+    str
+        The ID of the run if it has one, otherwise its name
+
+    """
+    return run.id or run._name
+
+
+class UploadMemo:
+    """Upload files and JSON serialisable objects to runs, only hashing and serialising identical content once.
+
+    Objects are serialised to JSON in the same way as simvue.Run.save_object, and each distinct payload is written
+    once, keyed by its hash, to a file which is saved to every run that needs it, so the artifacts are the same as
+    those from save_object. Objects derived from a source, such as the config of a model, are only serialised once for
+    as long as the source exists, and files are only hashed again if their size or modification time changes.
+
+    Files are registered with the server using the memo's own checksum, rather than with simvue.Run.save_file which
+    would hash them again. Saving content to the same run under the same name again is skipped entirely, while saving
+    it to another run only registers it, since the Simvue server stores the contents of an artifact once per checksum.
+    Offline runs only record the path of each file until they are sent, so objects are saved to offline runs with
+    simvue.Run.save_object, and the payload files are removed when the process exits.
+    """
+
+    def __init__(self):
+        """Initialize the memo."""
+        self._lock = threading.Lock()
+        self._payload_directory: typing.Optional[pathlib.Path] = None
+        # Path of the payload file of each serialised object by its hash, and digest of each file by its state
+        self._payload_paths: typing.Dict[str, pathlib.Path] = {}
+        self._file_digests: typing.Dict[typing.Tuple[pathlib.Path, int, int], str] = {}
+        # Digest and payload file of the object last serialised from each source still alive, by source ID and name
+        self._source_payloads: typing.Dict[
+            typing.Tuple[int, str], typing.Tuple[str, pathlib.Path]
+        ] = {}
+        # Run, artifact name and content hash of each upload so far
+        self._uploads: typing.Set[typing.Tuple[str, str, str]] = set()
+
+    def _file_digest(self, file_path: pathlib.Path) -> str:
+        """Get the SHA256 digest of a file, only reading the file if it has changed since it was last hashed.
+
+        Parameters
+        ----------
+        file_path : pathlib.Path
+            The file to hash
+
+        Returns
+        -------
+        str
+            The hex digest of the file
+
+        """
+        _stat = file_path.stat()
+        _key = (file_path, _stat.st_size, _stat.st_mtime_ns)
+        if not (_digest := self._file_digests.get(_key)):
+            _digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+            self._file_digests[_key] = _digest
+        return _digest
+
+    def _payload_path(
+        self, obj: typing.Any
+    ) -> typing.Optional[typing.Tuple[str, pathlib.Path]]:
+        """Get the file holding a serialised object, writing it if this is the first time the payload was seen.
+
+        Parameters
+        ----------
+        obj : typing.Any
+            The object, or a function returning the object
+
+        Returns
+        -------
+        typing.Optional[typing.Tuple[str, pathlib.Path]]
+            The SHA256 digest of the payload and the path of the file holding it, or None if obj cannot be serialised
+
+        """
+        try:
+            payload = json.dumps(obj() if callable(obj) else obj).encode()
+        except TypeError:
+            return None
+        _digest = hashlib.sha256(payload).hexdigest()
+        if not (_path := self._payload_paths.get(_digest)):
+            if not self._payload_directory:
+                self._payload_directory = pathlib.Path(
+                    tempfile.mkdtemp(prefix="simvue_payloads_")
+                )
+                atexit.register(shutil.rmtree, self._payload_directory, True)
+            _path = self._payload_directory.joinpath(f"{_digest}.json")
+            _path.write_bytes(payload)
+            self._payload_paths[_digest] = _path
+        return _digest, _path
+
+    def _source_payload(
+        self, source: typing.Any, name: str, obj: typing.Any
+    ) -> typing.Optional[typing.Tuple[str, pathlib.Path]]:
+        """Get the payload of an object derived from a source, only serialising it the first time the source is seen.
+
+        Parameters
+        ----------
+        source : typing.Any
+            The object which obj was derived from, which must not change in a way which changes obj
+        name : str
+            The name the object is saved under
+        obj : typing.Any
+            The object, or a function returning the object, which is only called the first time the source is seen
+
+        Returns
+        -------
+        typing.Optional[typing.Tuple[str, pathlib.Path]]
+            The SHA256 digest of the payload and the path of the file holding it, or None if obj cannot be serialised
+
+        """
+        _key = (id(source), name)
+        if _payload := self._source_payloads.get(_key):
+            return _payload
+        if not (_payload := self._payload_path(obj)):
+            return None
+        try:
+            # The entry is removed once the source is deleted, so that its ID can be reused by another object
+            weakref.finalize(source, self._source_payloads.pop, _key, None)
+        except TypeError:
+            return _payload
+        self._source_payloads[_key] = _payload
+        return _payload
+
+    def _register(
+        self,
+        run: simvue.Run,
+        file_path: pathlib.Path,
+        category: typing.Literal["input", "output", "code"],
+        name: str,
+        digest: str,
+        filetype: typing.Optional[str] = None,
+    ) -> bool:
+        """Register a file with a run using its known digest, handling failures as simvue.Run.save_file does.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to save the file to
+        file_path : pathlib.Path
+            The path of the file
+        category : typing.Literal["input", "output", "code"]
+            The category of the file with respect to the run
+        name : str
+            The name to save the file under
+        digest : str
+            The SHA256 digest of the file
+        filetype : typing.Optional[str], optional
+            The MIME type of the file, by default guessed from the file name
+
+        Returns
+        -------
+        bool
+            Whether the file was saved
+
+        """
+        if run._mode == "disabled":
+            return True
+        if (
+            run._aborted
+            or not run._simvue
+            or (run._status == "created" and category == "output")
+            or not os.path.getsize(file_path)
+        ):
+            # Left to save_file, which reports each of these cases in the same way as any other upload
+            return run.save_file(
+                file_path, category=category, filetype=filetype, name=name
+            )
+        try:
+            return (
+                run._simvue.save_file(
+                    file_registration(
+                        run, file_path, category, digest, name=name, filetype=filetype
+                    )
+                )
+                is not None
+            )
+        except RuntimeError as e:
+            run._error(f"{e.args[0]}")
+            return False
+
+    def save_file(
+        self,
+        run: simvue.Run,
+        file_path: typing.Union[str, pathlib.Path],
+        category: typing.Literal["input", "output", "code"],
+        name: typing.Optional[str] = None,
+    ) -> bool:
+        """Save a file to a run, unless the same content has already been saved to the run under the same name.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to save the file to
+        file_path : typing.Union[str, pathlib.Path]
+            The path of the file
+        category : typing.Literal["input", "output", "code"]
+            The category of the file with respect to the run
+        name : typing.Optional[str], optional
+            The name to save the file under, by default None (the name of the file)
+
+        Returns
+        -------
+        bool
+            Whether the file was saved, or had already been saved
+
+        """
+        file_path = pathlib.Path(file_path).absolute()
+        name = name or file_path.name
+        with self._lock:
+            _upload = (_run_key(run), name, self._file_digest(file_path))
+            if _upload in self._uploads:
+                return True
+        if not self._register(run, file_path, category, name, _upload[2]):
+            return False
+        with self._lock:
+            self._uploads.add(_upload)
+        return True
+
+    def save_object(
+        self,
+        run: simvue.Run,
+        obj: typing.Any,
+        category: typing.Literal["input", "output", "code"],
+        name: str,
+        source: typing.Optional[typing.Any] = None,
+    ) -> bool:
+        """Save a JSON serialisable object to a run, unless the same object has already been saved to it under the same name.
+
+        Parameters
+        ----------
+        run : simvue.Run
+            The run to save the object to
+        obj : typing.Any
+            The object, or a function returning the object, such as the get_config method of a model
+            The object is saved with simvue.Run.save_object if it cannot be serialised to JSON, or the run is offline.
+        category : typing.Literal["input", "output", "code"]
+            The category of the object with respect to the run
+        name : str
+            The name to save the object under
+        source : typing.Optional[typing.Any], optional
+            The object which obj was derived from, such as the model a config was taken from, by default None
+            If given, obj is only retrieved and serialised the first time it is saved from this source, for as long as
+            the source exists, so the source must not change in a way which changes obj.
+
+        Returns
+        -------
+        bool
+            Whether the object was saved, or had already been saved
+
+        """
+        with self._lock:
+            _payload = (
+                self._payload_path(obj)
+                if source is None
+                else self._source_payload(source, name, obj)
+            )
+        if not _payload:
+            return run.save_object(
+                obj() if callable(obj) else obj, category=category, name=name
+            )
+
+        _digest, _path = _payload
+        with self._lock:
+            _upload = (_run_key(run), name, _digest)
+            if _upload in self._uploads:
+                return True
+        if run._mode == "offline":
+            # Offline runs only record the path of a file until they are sent, so the object is stored with the run
+            _saved = run.save_object(
+                obj() if callable(obj) else obj, category=category, name=name
+            )
+        else:
+            _saved = self._register(
+                run, _path, category, name, _digest, filetype="application/json"
+            )
+        if not _saved:
+            return False
+        with self._lock:
+            self._uploads.add(_upload)
+        return True
@@ -0,0 +1,137 @@
+"""Upload Pool.
+
+Pool of threads for uploading many files concurrently, retrying uploads which fail.
+"""
+
+import concurrent.futures
+import os.path
+import threading
+import time
+import typing
+
+FileUpload = typing.Tuple[str, str, typing.Optional[str]]
+
+
+class UploadPool:
+    """Upload batches of files concurrently with a bounded number of threads, keeping totals across all batches.
+
+    Each upload is retried if the upload callback raises one of the retried exception types, waiting twice as long
+    before each successive attempt. Other exceptions, such as invalid file names, are not retried. Uploads which
+    still fail are returned to the caller.
+    """
+
+    def __init__(
+        self,
+        upload_callback: typing.Callable[[str, str, typing.Optional[str]], typing.Any],
+        max_workers: int = 4,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        retry_exceptions: typing.Tuple[typing.Type[Exception], ...] = (
+            RuntimeError,
+            OSError,
+        ),
+    ):
+        """Initialize the pool.
+
+        Parameters
+        ----------
+        upload_callback : typing.Callable[[str, str, typing.Optional[str]], typing.Any]
+            Function called with the path, category and name of each file to upload
+        max_workers : int, optional
+            Maximum number of files to upload at once, by default 4
+        max_retries : int, optional
+            Number of times to retry an upload which fails, by default 3
+        retry_delay : float, optional
+            Time in seconds to wait before the first retry of an upload, by default 1.0
+        retry_exceptions : typing.Tuple[typing.Type[Exception], ...], optional
+            Exceptions raised by the upload callback after which the upload is retried,
+            by default RuntimeError, and OSError which covers connection errors
+
+        """
+        self._upload_callback = upload_callback
+        self._max_workers = max_workers
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+        self._retry_exceptions = retry_exceptions
+        self._lock = threading.Lock()
+        self.files_uploaded: int = 0
+        self.bytes_uploaded: int = 0
+        self.upload_time: float = 0.0
+
+    def _upload_with_retries(self, upload: FileUpload):
+        """Upload a single file, retrying on failure.
+
+        Parameters
+        ----------
+        upload : FileUpload
+            The path, category and name of the file to upload
+
+        Raises
+        ------
+        Exception
+            Raised if the upload still fails after all retries, or fails with an exception which is not retried
+
+        """
+        for attempt in range(self._max_retries + 1):
+            try:
+                self._upload_callback(*upload)
+                break
+            except Exception as e:
+                if attempt == self._max_retries or not isinstance(
+                    e, self._retry_exceptions
+                ):
+                    raise
+                time.sleep(self._retry_delay * 2**attempt)
+
+        with self._lock:
+            self.files_uploaded += 1
+            self.bytes_uploaded += os.path.getsize(upload[0])
+
+    def upload(
+        self, uploads: typing.Iterable[FileUpload]
+    ) -> typing.List[typing.Tuple[FileUpload, Exception]]:
+        """Upload a batch of files, returning once every upload has finished.
+
+        Parameters
+        ----------
+        uploads : typing.Iterable[FileUpload]
+            The path, category and name of each file to upload
+
+        Returns
+        -------
+        typing.List[typing.Tuple[FileUpload, Exception]]
+            Each upload which failed, along with the exception raised by its last attempt
+
+        """
+        _start_time = time.monotonic()
+        _failures = []
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._max_workers
+        ) as executor:
+            _futures = {
+                executor.submit(self._upload_with_retries, upload): upload
+                for upload in uploads
+            }
+            for future in concurrent.futures.as_completed(_futures):
+                if _exception := future.exception():
+                    _failures.append((_futures[future], _exception))
+
+        self.upload_time += time.monotonic() - _start_time
+        return _failures
+
+    def summary(self) -> str:
+        """Describe the total number of files and bytes uploaded, and the average throughput.
+
+        Returns
+        -------
+        str
+            The summary message
+
+        """
+        _megabytes = self.bytes_uploaded / 1e6
+        _throughput = _megabytes / self.upload_time if self.upload_time else 0.0
+        return (
+            f"Uploaded {self.files_uploaded} file{'s' if self.files_uploaded != 1 else ''} "
+            f"({_megabytes:.2f} MB) in {self.upload_time:.2f} s ({_throughput:.2f} MB/s)."
+        )
@@ -7,7 +7,14 @@ Classses which could be used in the construction of multiple adapters.
 import enum
 from typing import Callable, Literal, Optional, Union
 
-from pydantic import BaseModel, Field, PositiveInt, ValidationInfo, field_validator
+from pydantic import (
+    BaseModel,
+    Field,
+    PositiveFloat,
+    PositiveInt,
+    ValidationInfo,
+    field_validator,
+)
 
 NAME_REGEX: str = r"^[a-zA-Z0-9\-\_\s\/\.:]+$"
 
@@ -38,6 +45,7 @@ def check_input(
     name_of_parameter: str,
     required_when_name: str,
     required_when_values: list,
+    described_as: str = "alerts",
 ) -> Union[str, float, int, None]:
     """Check that alert fields are correctly defined in cases where parameters are only required if another parameter is set.
 
@@ -53,6 +61,8 @@ def check_input(
         The name of the parameter which defines whether the field is required
     required_when_values : list
         The values of the parameter above which mean that the field is required
+    described_as : str, optional
+        What the validated dictionaries define, used in error messages, by default "alerts"
 
     Returns
     -------
@@ -70,13 +80,13 @@ def check_input(
         other_values.get(required_when_name) in required_when_values
     ) and value_to_check is None:
         raise ValueError(
-            f"'{name_of_parameter}' must be provided for alerts using '{required_when_name} = {other_values.get(required_when_name)}'."
+            f"'{name_of_parameter}' must be provided for {described_as} using '{required_when_name} = {other_values.get(required_when_name)}'."
         )
     elif (
         other_values.get(required_when_name) not in required_when_values
     ) and value_to_check is not None:
         raise ValueError(
-            f"'{name_of_parameter}' must not be provided for alerts using '{required_when_name} = {other_values.get(required_when_name)}'."
+            f"'{name_of_parameter}' must not be provided for {described_as} using '{required_when_name} = {other_values.get(required_when_name)}'."
         )
     return value_to_check
 
@@ -167,3 +177,52 @@ class AlertValidator(BaseModel, extra="forbid"):  # type: ignore
             "rule",
             ["is outside range", "is inside range"],
         )
+
+
+class DownsamplingValidator(BaseModel, extra="forbid"):  # type: ignore
+    """Validate the downsampling strategy for a set of metrics, when provided as a dictionary."""
+
+    method: Literal["every_nth", "time_bucket", "lttb"]
+    # For 'every_nth':
+    n: Optional[PositiveInt] = Field(default=None, validate_default=True)
+    # For 'time_bucket':
+    bucket_width: Optional[PositiveFloat] = Field(default=None, validate_default=True)
+    aggregation: Literal["mean", "min", "max"] = Field(default="mean")
+    # For 'lttb':
+    window: Optional[PositiveInt] = Field(default=None, validate_default=True)
+    points_per_window: Optional[PositiveInt] = Field(
+        default=None, validate_default=True
+    )
+
+    @field_validator("n")
+    def _check_n(cls, v, validation_info):
+        """Check that n is specified if the method is 'every_nth'."""
+        return check_input(
+            v, validation_info, "n", "method", ["every_nth"], "downsampling"
+        )
+
+    @field_validator("bucket_width")
+    def _check_bucket_width(cls, v, validation_info):
+        """Check that bucket_width is specified if the method is 'time_bucket'."""
+        return check_input(
+            v,
+            validation_info,
+            "bucket_width",
+            "method",
+            ["time_bucket"],
+            "downsampling",
+        )
+
+    @field_validator("window")
+    def _check_window(cls, v, validation_info):
+        """Check that window is specified if the method is 'lttb'."""
+        return check_input(
+            v, validation_info, "window", "method", ["lttb"], "downsampling"
+        )
+
+    @field_validator("points_per_window")
+    def _check_points_per_window(cls, v, validation_info):
+        """Check that points_per_window is specified if the method is 'lttb'."""
+        return check_input(
+            v, validation_info, "points_per_window", "method", ["lttb"], "downsampling"
+        )
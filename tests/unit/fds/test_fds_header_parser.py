@@ -45,4 +45,64 @@ def test_fds_header_parser(folder_setup):
     assert run_data["metadata"]["fds.compilation_date"] == "Apr 09, 2024 13:24:51"
     assert run_data["metadata"]["fds.mpi_processes"] == 1
     assert run_data["metadata"]["fds.mpi_version"] == 3.1
-    assert run_data["metadata"]["fds.mpi_library_version"] == "Intel(R) MPI Library 2021.6 for Linux* OS"
\ No newline at end of file
+    assert run_data["metadata"]["fds.mpi_library_version"] == "Intel(R) MPI Library 2021.6 for Linux* OS"
+
+class CountingFile:
+    """
+    File which counts the lines read from it, to check that parsing stops early.
+    """
+    def __init__(self, file):
+        self._file = file
+        self.lines_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self._file.close()
+
+    def __iter__(self):
+        for line in self._file:
+            self.lines_read += 1
+            yield line
+
+def counting_open(opened_files):
+    """
+    Replacement for open which records each file opened, so the lines read from it can be counted.
+    """
+    def _open(*args, **kwargs):
+        opened_files.append(CountingFile(open(*args, **kwargs)))
+        return opened_files[-1]
+    return _open
+
+def test_fds_header_parser_bounded():
+    """
+    Check that the header parser stops reading at the first time step, and once every header field has been found.
+    """
+    header_path = pathlib.Path(__file__).parent.joinpath("example_data", "fds_header.txt")
+    log_path = pathlib.Path(__file__).parent.joinpath("example_data", "fds_log.txt")
+    temp_dir = tempfile.TemporaryDirectory(prefix="fds_test")
+    run = FDSRun(mode="disabled")
+    _, expected = run._header_metadata(input_file=str(header_path))
+    assert len(expected) == 7
+
+    # Long log after the header, which should not be read
+    long_log_path = pathlib.Path(temp_dir.name).joinpath("fds_long.out")
+    long_log_path.write_text(header_path.read_text() + "\n" + log_path.read_text() * 1000)
+    opened_files = []
+    with patch("simvue_integrations.connectors.fds.open", counting_open(opened_files), create=True):
+        _, metadata = run._header_metadata(input_file=str(long_log_path))
+    assert metadata == expected
+    # Reading stops once every header field has been found, within the header
+    assert len(opened_files) == 1
+    assert opened_files[0].lines_read <= len(header_path.read_text().splitlines())
+
+    # Lines which look like header fields after the first time step are ignored
+    partial_log_path = pathlib.Path(temp_dir.name).joinpath("fds_partial.out")
+    partial_log_path.write_text(
+        " Revision         : FDS-6.9.1-0-g889da6a-release\n"
+        "       Time Step        1   October 16, 2024  12:48:59\n"
+        " MPI version: 3.1\n"
+    )
+    _, metadata = run._header_metadata(input_file=str(partial_log_path))
+    assert metadata == {"fds.revision": "FDS-6.9.1-0-g889da6a-release"}
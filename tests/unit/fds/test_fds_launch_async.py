@@ -0,0 +1,57 @@
+from simvue_integrations.connectors.fds import FDSRun
+import simvue
+import asyncio
+import threading
+import time
+import tempfile
+from unittest.mock import patch
+import uuid
+import pathlib
+
+def mock_fds_process(self, *_, **__):
+    """
+    Mock process for creating FDS log file, writing all lines for each time step at once.
+    """
+    def write_to_log():
+        log_lines = pathlib.Path(__file__).parent.joinpath("example_data", "fds_log.txt").read_text().splitlines(keepends=True)
+        with pathlib.Path(self.workdir_path).joinpath("fds_test.out").open(mode="w") as temp_logfile:
+            for i in range(0, len(log_lines), 13):
+                temp_logfile.writelines(log_lines[i:i + 13])
+                temp_logfile.flush()
+                time.sleep(0.05)
+        time.sleep(1)
+        self._trigger.set()
+    thread = threading.Thread(target=write_to_log)
+    thread.start()
+
+@patch.object(FDSRun, 'add_process', mock_fds_process)
+def test_fds_launch_async(folder_setup):
+    """
+    Check that several FDS simulations can be monitored concurrently from a single event loop.
+    """
+    temp_dirs = [tempfile.TemporaryDirectory(prefix="fds_test") for _ in range(3)]
+    runs = [FDSRun() for _ in temp_dirs]
+    for i, run in enumerate(runs):
+        run.init(name='test_fds_launch_async-%d-%s' % (i, str(uuid.uuid4())), folder=folder_setup)
+
+    async def launch_all():
+        await asyncio.gather(*[
+            run.launch_async(
+                fds_input_file_path = pathlib.Path(__file__).parent.joinpath("example_data", "fds_input.fds"),
+                workdir_path = temp_dir.name,
+            )
+            for run, temp_dir in zip(runs, temp_dirs)
+        ])
+
+    asyncio.run(launch_all())
+
+    run_ids = [run.id for run in runs]
+    for run in runs:
+        run.close()
+
+    client = simvue.Client()
+    for run_id in run_ids:
+        # Check that all 9 metrics were created for each run, and the run completed as normal
+        assert len(client.get_metrics_names(run_id)) == 9
+        events = [event["message"] for event in client.get_events(run_id)]
+        assert "Simulation Complete!" in events
@@ -0,0 +1,81 @@
+from simvue_integrations.connectors.fds import FDSRun
+import os
+import pathlib
+import pytest
+import re
+import time
+
+# The per-line patterns used by the original FDS log parser, searched one at a time
+REFERENCE_PATTERNS = [
+    (re.compile(r"\s+Time\sStep\s+(\d+).*"), "step"),
+    (re.compile(r"\s+Step\sSize:.*Total\sTime:\s+([\d\.]+)\ss.*"), "time"),
+    (re.compile(r"\s+Pressure\sIterations:\s(\d+)$"), "pressure_iteration"),
+    (re.compile(r"\s+Maximum\sVelocity\sError:\s+([\d\.\-\+E]+)\son\sMesh\s\d+\sat\s\(\d+,\d+,\d+\)$"), "max_velocity_error"),
+    (re.compile(r"\s+Maximum\sPressure\sError:\s+([\d\.\-\+E]+)\son\sMesh\s\d+\sat\s\(\d+,\d+,\d+\)$"), "max_pressure_error"),
+    (re.compile(r"\s+Max\sCFL\snumber:\s+([\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$"), "max_cfl"),
+    (re.compile(r"\s+Max\sdivergence:\s+([\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$"), "max_divergence"),
+    (re.compile(r"\s+Min\sdivergence:\s+([\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$"), "min_divergence"),
+    (re.compile(r"\s+Max\sVN\snumber:\s+([\d\.E\-\+]+)\sat\s\(\d+,\d+,\d+\)$"), "max_vn"),
+    (re.compile(r"\s+No.\sof\sLagrangian\sParticles:\s+(\d+)$"), "num_lagrangian_particles"),
+    (re.compile(r"\s+Total\sHeat\sRelease\sRate:\s+([\d\.\-]+)\skW$"), "total_heat_release_rate"),
+    (re.compile(r"\s+Radiation\sLoss\sto\sBoundaries:\s+([\d\.\-]+)\skW$"), "radiation_loss_to_boundaries"),
+]
+
+def reference_parser(file_content):
+    """
+    Search every pattern against every line, as the FDS log parser used to.
+    """
+    _out_data = []
+    _out_record = {}
+    for line in file_content.split("\n"):
+        for pattern, name in REFERENCE_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                if name == "step":
+                    if _out_record:
+                        _out_data += [_out_record]
+                    _out_record = {}
+                _out_record[name] = match.group(1)
+    if _out_record:
+        _out_data += [_out_record]
+    return _out_data
+
+def parse_log(file_content, log_path):
+    run = FDSRun(mode="disabled")
+    # Events are not under test here, so are discarded
+    run.log_event = lambda *_, **__: True
+    _, parsed_data = run._log_parser(
+        file_content=file_content,
+        **{"__input_file": str(log_path), "__read_bytes": len(file_content)},
+    )
+    return parsed_data
+
+def test_fds_log_parser_patterns():
+    """
+    Check the combined pattern produces the same records as searching each of the original patterns in turn.
+    """
+    log_path = pathlib.Path(__file__).parent.joinpath("example_data", "fds_log.txt")
+    file_content = log_path.read_text()
+
+    parsed_data = parse_log(file_content, log_path)
+    assert parsed_data
+    assert parsed_data == reference_parser(file_content)
+
+@pytest.mark.skipif(not os.environ.get("SIMVUE_INTEGRATIONS_BENCHMARKS"), reason="Set SIMVUE_INTEGRATIONS_BENCHMARKS=1 to run benchmarks")
+def test_fds_log_parser_benchmark():
+    """
+    Compare the time taken by the combined pattern and by the original patterns on the example log scaled up 1000x.
+    """
+    log_path = pathlib.Path(__file__).parent.joinpath("example_data", "fds_log.txt")
+    file_content = log_path.read_text() * 1000
+
+    start = time.perf_counter()
+    parsed_data = parse_log(file_content, log_path)
+    parser_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected_data = reference_parser(file_content)
+    reference_time = time.perf_counter() - start
+
+    print(f"Combined pattern: {parser_time:.3f}s, original patterns: {reference_time:.3f}s")
+    assert parsed_data == expected_data
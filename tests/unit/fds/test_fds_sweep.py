@@ -0,0 +1,56 @@
+from simvue_integrations.connectors.fds import FDSRun, FDSSweep
+import simvue
+import threading
+import time
+import tempfile
+from unittest.mock import patch
+import pathlib
+
+def mock_fds_process(self, *_, **__):
+    """
+    Mock process for creating FDS log file, writing all lines for each time step at once.
+    """
+    def write_to_log():
+        log_lines = pathlib.Path(__file__).parent.joinpath("example_data", "fds_log.txt").read_text().splitlines(keepends=True)
+        with pathlib.Path(self.workdir_path).joinpath("fds_test.out").open(mode="w") as temp_logfile:
+            for i in range(0, len(log_lines), 13):
+                temp_logfile.writelines(log_lines[i:i + 13])
+                temp_logfile.flush()
+                time.sleep(0.05)
+        time.sleep(1)
+        self._trigger.set()
+    thread = threading.Thread(target=write_to_log)
+    thread.start()
+
+@patch.object(FDSRun, 'add_process', mock_fds_process)
+def test_fds_sweep(folder_setup):
+    """
+    Check that a sweep runs every case in its own run, and that a case which fails does not stop the others.
+    """
+    temp_dirs = [tempfile.TemporaryDirectory(prefix="fds_test") for _ in range(4)]
+    input_file = pathlib.Path(__file__).parent.joinpath("example_data", "fds_input.fds")
+    cases = {
+        f"test_fds_sweep-{i}": {
+            "fds_input_file_path": input_file if i != 2 else pathlib.Path(temp_dir.name).joinpath("missing.fds"),
+            "workdir_path": temp_dir.name,
+        }
+        for i, temp_dir in enumerate(temp_dirs)
+    }
+
+    sweep = FDSSweep(folder=folder_setup, max_parallel_cases=2)
+    results = sweep.launch(cases)
+
+    assert [result.name for result in results] == list(cases.keys())
+    assert [result.succeeded for result in results] == [True, True, False, True]
+    assert "Path does not point to a file" in results[2].error
+    assert sweep.summary().startswith("Ran 4 cases (1 failed)")
+
+    client = simvue.Client()
+    for result in results:
+        run_data = client.get_run(result.run_id)
+        assert run_data["folder"] == folder_setup
+        if result.succeeded:
+            assert run_data["status"] == "completed"
+            assert len(client.get_metrics_names(result.run_id)) == 9
+        else:
+            assert run_data["status"] == "failed"
@@ -0,0 +1,99 @@
+from simvue_integrations.connectors.fds import FDSRun, FDSSweep
+from simvue_integrations.extras.fds_input import expand_fds_template, read_fds_input
+import simvue
+import threading
+import time
+import tempfile
+import pytest
+import f90nml
+from unittest.mock import patch
+import pathlib
+
+def mock_fds_process(self, *_, **__):
+    """
+    Mock process for creating FDS log file, writing all lines for each time step at once.
+    """
+    def write_to_log():
+        log_lines = pathlib.Path(__file__).parent.joinpath("example_data", "fds_log.txt").read_text().splitlines(keepends=True)
+        with pathlib.Path(f"{self._results_prefix}.out").open(mode="w") as temp_logfile:
+            for i in range(0, len(log_lines), 13):
+                temp_logfile.writelines(log_lines[i:i + 13])
+                temp_logfile.flush()
+                time.sleep(0.05)
+        time.sleep(1)
+        self._trigger.set()
+    thread = threading.Thread(target=write_to_log)
+    thread.start()
+
+def test_fds_template_expansion():
+    """
+    Check that a variant is written for every combination of parameters, each with a unique CHID, and that the
+    variants are not parsed again when read.
+    """
+    temp_dir = tempfile.TemporaryDirectory(prefix="fds_test")
+    input_file = pathlib.Path(__file__).parent.joinpath("example_data", "fds_input.fds")
+    variants = expand_fds_template(
+        input_file,
+        {"reac.soot_yield": [0.01, 0.03, 0.05], "surf[0].hrrpua": [150, 300], "time.t_end": [5.0, 10.0]},
+        temp_dir.name,
+    )
+
+    assert list(variants.keys()) == [f"fds_test_{i:02d}" for i in range(12)]
+    assert len(set(variants.values())) == 12
+
+    # Last variant uses the last value of every parameter
+    namelist = f90nml.read(variants["fds_test_11"])
+    assert namelist["head"]["chid"] == "fds_test_11"
+    assert namelist["reac"]["soot_yield"] == 0.05
+    assert namelist["surf"][0]["hrrpua"] == 300
+    assert namelist["time"]["t_end"] == 10.0
+
+    # Variants were cached as they were written, so reading them does not parse them again
+    with patch.object(f90nml, "read", side_effect=AssertionError("Input file parsed again")):
+        fds_input = read_fds_input(variants["fds_test_11"])
+    assert fds_input.chid == "fds_test_11"
+    assert fds_input.metadata["reac.soot_yield"] == 0.05
+    assert fds_input.metadata["_grp_surf_0.hrrpua"] == 300
+    assert fds_input.metadata["mesh.ijk.1"] == read_fds_input(input_file).metadata["mesh.ijk.1"] == 40
+
+    # Modifying a variant means it is parsed again
+    variants["fds_test_11"].write_text(variants["fds_test_11"].read_text().replace("fds_test_11", "modified"))
+    assert read_fds_input(variants["fds_test_11"]).chid == "modified"
+
+def test_fds_template_invalid():
+    """
+    Check that parameters which cannot be set in the input file are rejected.
+    """
+    temp_dir = tempfile.TemporaryDirectory(prefix="fds_test")
+    input_file = pathlib.Path(__file__).parent.joinpath("example_data", "fds_input.fds")
+    with pytest.raises(ValueError, match="must be of the form"):
+        expand_fds_template(input_file, {"soot_yield": [0.01]}, temp_dir.name)
+    with pytest.raises(ValueError, match="group which is not in the input file"):
+        expand_fds_template(input_file, {"ramp.t": [1.0]}, temp_dir.name)
+
+@patch.object(FDSRun, 'add_process', mock_fds_process)
+def test_fds_sweep_template(folder_setup):
+    """
+    Check that a sweep over a template runs every variant in its own run, with the parameters of the variant as metadata.
+    """
+    temp_dir = tempfile.TemporaryDirectory(prefix="fds_test")
+    input_file = pathlib.Path(__file__).parent.joinpath("example_data", "fds_input.fds")
+
+    sweep = FDSSweep(folder=folder_setup, max_parallel_cases=2)
+    results = sweep.launch_template(
+        input_file,
+        {"reac.soot_yield": [0.01, 0.03]},
+        temp_dir.name,
+        chid_prefix="test_fds_sweep_template",
+    )
+
+    assert [result.name for result in results] == ["test_fds_sweep_template_0", "test_fds_sweep_template_1"]
+    assert all(result.succeeded for result in results)
+
+    client = simvue.Client()
+    for result, soot_yield in zip(results, [0.01, 0.03]):
+        run_data = client.get_run(result.run_id)
+        assert run_data["status"] == "completed"
+        assert run_data["metadata"]["head.chid"] == result.name
+        assert run_data["metadata"]["reac.soot_yield"] == soot_yield
+        assert pathlib.Path(temp_dir.name).joinpath(result.name, f"{result.name}.out").exists()
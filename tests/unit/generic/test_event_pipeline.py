@@ -0,0 +1,38 @@
+import threading
+import uuid
+from unittest.mock import patch
+from simvue_integrations.connectors.generic import WrappedRun
+import simvue
+
+def mock_events_process(self, *_, **__):
+    """
+    Mock process which logs a repeated message, followed by a burst of messages from a rate limited source
+    """
+    def log_events():
+        for _ in range(5):
+            self.log_event("Repeated message")
+        for i in range(100):
+            self.log_event(f"Noisy message {i}", source="noisy")
+        self.log_event("Final message")
+        self._trigger.set()
+
+    thread = threading.Thread(target=log_events)
+    thread.start()
+
+@patch.object(WrappedRun, '_during_simulation', mock_events_process)
+def test_event_pipeline(folder_setup):
+    """
+    Check that repeated events are coalesced, and events above the rate limit are dropped and summarised.
+    """
+    with WrappedRun() as run:
+        run.init('test_event_pipeline-%s' % str(uuid.uuid4()), folder=folder_setup)
+        run_id = run.id
+        run.launch(event_rate_limits={"noisy": 10})
+
+    client = simvue.Client()
+    events = [event["message"] for event in client.get_events(run_id)]
+    assert events.count("Repeated message") == 1
+    assert "Repeated message [repeated 4 more times]" in events
+    assert len([event for event in events if event.startswith("Noisy message")]) == 10
+    assert "Final message" in events
+    assert "90 events were not logged due to rate limits: 90 from 'noisy'." in events
@@ -0,0 +1,60 @@
+import json
+import pathlib
+import tempfile
+import threading
+from unittest.mock import patch
+from simvue_integrations.extras import file_cache
+from simvue_integrations.extras.file_cache import FileCache
+
+SERVER_URL = "https://simvue.example.com"
+
+def test_file_cache_checksum_reused():
+    """
+    Check that a file is only hashed again once it has been modified.
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    file_path = pathlib.Path(temp_dir.name).joinpath("result.txt")
+    file_path.write_text("Result 1\n")
+    cache = FileCache(pathlib.Path(temp_dir.name).joinpath("file_cache.json"))
+
+    with patch.object(file_cache, "calculate_sha256", side_effect=file_cache.calculate_sha256) as calculate_sha256:
+        first_checksum = cache.checksum(file_path)
+        assert cache.checksum(file_path) == first_checksum
+        assert calculate_sha256.call_count == 1
+
+        file_path.write_text("Result 2, which is longer\n")
+        assert cache.checksum(file_path) != first_checksum
+        assert calculate_sha256.call_count == 2
+
+def test_file_cache_stored_bounded():
+    """
+    Check that only the most recently uploaded checksums are kept, counting a repeated upload as the most recent.
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    cache_path = pathlib.Path(temp_dir.name).joinpath("file_cache.json")
+    cache = FileCache(cache_path, max_stored=3)
+    for checksum in ("a", "b", "c", "a", "d"):
+        cache.record_upload(checksum, SERVER_URL)
+    cache.save()
+
+    assert (cache.hits, cache.misses) == (1, 4)
+    assert json.loads(cache_path.read_text())["stored"][SERVER_URL] == ["c", "a", "d"]
+    assert not cache_path.with_name("file_cache.json.lock").exists()
+
+def test_file_cache_concurrent_save():
+    """
+    Check that runs saving the same cache at the same time do not lose each other's entries.
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    cache_path = pathlib.Path(temp_dir.name).joinpath("file_cache.json")
+    caches = [FileCache(cache_path) for _ in range(8)]
+    for index, cache in enumerate(caches):
+        cache.record_upload(f"checksum_{index}", SERVER_URL)
+
+    threads = [threading.Thread(target=cache.save) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(json.loads(cache_path.read_text())["stored"][SERVER_URL]) == sorted(f"checksum_{index}" for index in range(8))
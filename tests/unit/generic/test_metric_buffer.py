@@ -0,0 +1,76 @@
+import threading
+import uuid
+from unittest.mock import patch
+from simvue_integrations.connectors.generic import WrappedRun
+import simvue
+from simvue_integrations.extras.metric_buffer import MetricBuffer
+
+def mock_metrics_process(self, *_, **__):
+    """
+    Mock process which logs more metrics than fit in the buffer, and then finishes before the buffer is flushed by age
+    """
+    def log_metrics():
+        for i in range(250):
+            self.log_metrics({"value": i}, step=i, time=i * 0.1)
+        self._trigger.set()
+
+    thread = threading.Thread(target=log_metrics)
+    thread.start()
+
+@patch.object(WrappedRun, '_during_simulation', mock_metrics_process)
+def test_metric_buffer(folder_setup):
+    """
+    Check that buffered metrics are all uploaded in order once the simulation finishes.
+    """
+    with WrappedRun() as run:
+        run.init('test_metric_buffer-%s' % str(uuid.uuid4()), folder=folder_setup)
+        run_id = run.id
+        run.launch(metrics_buffer_size=100, metrics_flush_interval=60)
+
+    client = simvue.Client()
+    metrics = client.get_metric_values(metric_names=["value"], run_ids=[run_id,], output_format="dict", xaxis="step")
+    assert list(metrics["value"].values()) == [float(i) for i in range(250)]
+
+def mock_invalid_metrics_process(self, *_, **__):
+    """
+    Mock process which logs an invalid metric between valid ones, checking it is accepted without validation when logged
+    """
+    def log_metrics():
+        for i in range(5):
+            self.log_metrics({"value": i}, step=i)
+        assert self.log_metrics({"bad name!!": 1.0}, step=5)
+        for i in range(6, 10):
+            self.log_metrics({"value": i}, step=i)
+        self._trigger.set()
+
+    thread = threading.Thread(target=log_metrics)
+    thread.start()
+
+@patch.object(WrappedRun, '_during_simulation', mock_invalid_metrics_process)
+def test_metric_buffer_invalid_metric(folder_setup):
+    """
+    Check that an invalid metric is dropped when the buffer is flushed, without losing the valid metrics buffered around it.
+    """
+    with WrappedRun() as run:
+        run.init('test_metric_buffer_invalid_metric-%s' % str(uuid.uuid4()), folder=folder_setup)
+        run_id = run.id
+        run.launch(metrics_buffer_size=100, metrics_flush_interval=60)
+
+    client = simvue.Client()
+    assert client.get_run(run_id)["status"] == "completed"
+    metrics = client.get_metric_values(metric_names=["value"], run_ids=[run_id,], output_format="dict", xaxis="step")
+    assert list(metrics["value"].values()) == [float(i) for i in range(10) if i != 5]
+
+def test_metric_buffer_flush_on_step():
+    """
+    Check that the records held for a step are flushed once a record for the next step arrives, merging records within a step.
+    """
+    flushed = []
+    buffer = MetricBuffer(flush_callback=flushed.append, max_records=100, flush_interval=60, flush_on_step=True)
+    buffer.add({"a": 1.0}, 0, 0.0, "2024-01-01T00:00:00.000000")
+    buffer.add({"b": 2.0}, 0, 0.0, "2024-01-01T00:00:00.000000")
+    assert not flushed
+    buffer.add({"a": 3.0}, 1, 0.1, "2024-01-01T00:00:01.000000")
+    assert flushed == [[({"a": 1.0, "b": 2.0}, 0, 0.0, "2024-01-01T00:00:00.000000")]]
+    buffer.flush()
+    assert flushed[-1] == [({"a": 3.0}, 1, 0.1, "2024-01-01T00:00:01.000000")]
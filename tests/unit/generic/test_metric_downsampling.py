@@ -0,0 +1,118 @@
+import math
+import uuid
+import pytest
+from simvue_integrations.connectors.generic import WrappedRun
+from simvue_integrations.extras.downsampling import MetricDownsampler
+import simvue
+
+class DownsampledRun(WrappedRun):
+    """
+    Run which logs a high frequency metric, a low frequency metric and an unmatched metric during the simulation.
+    """
+    def _during_simulation(self):
+        for i in range(10000):
+            metrics = {"fast.sine": math.sin(i / 100), "unmatched": i}
+            if i % 10 == 0:
+                metrics["slow"] = i
+            self.log_metrics(metrics, step=i, time=i * 0.01)
+        self._trigger.set()
+
+def test_metric_downsampling(folder_setup):
+    """
+    Check that metrics matching each pattern are downsampled with their strategy, and other metrics are all uploaded.
+    """
+    with DownsampledRun() as run:
+        run.init('test_metric_downsampling-%s' % str(uuid.uuid4()), folder=folder_setup)
+        run_id = run.id
+        run.launch(
+            metric_downsampling={
+                "fast.*": {"method": "lttb", "window": 1000, "points_per_window": 50},
+                "slow": {"method": "time_bucket", "bucket_width": 1.0, "aggregation": "max"},
+            }
+        )
+
+    client = simvue.Client()
+    def get_values(metric_name):
+        return client.get_metric_values(metric_names=[metric_name], run_ids=[run_id,], output_format="dict", xaxis="step")[metric_name]
+
+    # 10 windows of 1000 values, each reduced to 50 values
+    fast = get_values("fast.sine")
+    assert len(fast) == 500
+    assert min(step for step, _ in fast) == 0
+    assert max(step for step, _ in fast) == 9999
+
+    # One value per second of simulation time, the maximum of the ten logged in that second
+    slow = get_values("slow")
+    assert list(slow.values()) == [float(i) for i in range(90, 10000, 100)]
+
+    assert len(get_values("unmatched")) == 10000
+
+def test_metric_downsampling_strategies():
+    """
+    Check each downsampling strategy on its own, including the points released at the end.
+    """
+    downsampler = MetricDownsampler(
+        {
+            "every_*": {"method": "every_nth", "n": 3},
+            "mean": {"method": "time_bucket", "bucket_width": 2},
+            "spike": {"method": "lttb", "window": 100, "points_per_window": 10},
+        }
+    )
+    records = []
+    for i in range(100):
+        records += downsampler.add(
+            {"every_third": i, "mean": i, "spike": 100.0 if i == 37 else 0.0, "other": i}, i, None, "timestamp"
+        )
+    records += downsampler.flush()
+
+    def values(name):
+        return [(step, metrics[name]) for metrics, step, _, _ in records if name in metrics]
+
+    assert values("every_third") == [(i, i) for i in range(0, 100, 3)]
+    # Means of each pair of steps, logged at the last step of the pair
+    assert values("mean") == [(i + 1, i + 0.5) for i in range(0, 100, 2)]
+    # LTTB always keeps the first and last points, and the spike
+    spike = values("spike")
+    assert len(spike) == 10
+    assert (0, 0.0) in spike and (99, 0.0) in spike and (37, 100.0) in spike
+    assert values("other") == [(i, i) for i in range(100)]
+    # Metrics which are not downsampled are held back behind the buckets and windows, so steps stay in order
+    steps = [step for _, step, _, _ in records]
+    assert steps == sorted(steps)
+
+def test_metric_downsampling_string_times():
+    """
+    Check that time buckets accept times and steps given as numeric strings, as read from CSV files.
+    """
+    downsampler = MetricDownsampler({"*": {"method": "time_bucket", "bucket_width": 1.0, "aggregation": "max"}})
+    records = []
+    for i in range(20):
+        records += downsampler.add({"value": i}, str(i), f"{i * 0.25}", "timestamp")
+    records += downsampler.flush()
+    assert [metrics["value"] for metrics, _, _, _ in records] == [3, 7, 11, 15, 19]
+
+def test_metric_downsampling_invalid():
+    """
+    Check that a strategy missing its parameters is rejected.
+    """
+    with pytest.raises(ValueError, match="'n' must be provided for downsampling"):
+        MetricDownsampler({"*": {"method": "every_nth"}})
+
+def test_metric_downsampling_stale_stream():
+    """
+    Check that a metric which stops being logged part way through a bucket does not hold back later records indefinitely.
+    """
+    downsampler = MetricDownsampler({"stale": {"method": "time_bucket", "bucket_width": 1e6}}, max_held_records=100)
+    records = downsampler.add({"stale": 1.0, "other": 0}, 0, None, "timestamp")
+    max_held = 0
+    for i in range(1, 1000):
+        records += downsampler.add({"other": i}, i, None, "timestamp")
+        max_held = max(max_held, len(downsampler._held))
+    released = len(records)
+    records += downsampler.flush()
+
+    # The stale bucket is released once it is more than 100 records old, and later records are released as they arrive
+    assert max_held <= 101
+    assert released == 1001
+    assert sorted((step, list(metrics.items())) for metrics, step, _, _ in records[:2]) == [(0, [("other", 0)]), (0, [("stale", 1.0)])]
+    assert [metrics["other"] for metrics, _, _, _ in records if "other" in metrics] == list(range(1000))
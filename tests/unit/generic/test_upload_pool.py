@@ -0,0 +1,112 @@
+import pathlib
+import tempfile
+import uuid
+from unittest.mock import patch
+from simvue_integrations.connectors.generic import WrappedRun
+from simvue_integrations.extras.upload_pool import UploadPool
+import simvue
+
+class UploadRun(WrappedRun):
+    """
+    Run which creates a set of result files during the simulation, and uploads them all afterwards.
+    """
+    def _during_simulation(self):
+        for i in range(20):
+            pathlib.Path(self.results_dir).joinpath(f"result_{i}.txt").write_text(f"Result {i}\n" * 100)
+        self._trigger.set()
+
+    def _post_simulation(self):
+        self._save_files(sorted(pathlib.Path(self.results_dir).glob("result_*.txt")), "output")
+        super()._post_simulation()
+
+_failed_uploads = set()
+
+def mock_flaky_upload(self, file_path, category, name=None):
+    """
+    Mock upload which fails the first time each file is uploaded.
+    """
+    if file_path not in _failed_uploads:
+        _failed_uploads.add(file_path)
+        raise RuntimeError("Connection reset")
+    return WrappedRun._upload_file(self, file_path, category, name)
+
+@patch.object(UploadRun, '_upload_file', mock_flaky_upload)
+def test_upload_pool(folder_setup):
+    """
+    Check that files are all uploaded by the upload pool after retrying failed uploads, and a summary is logged.
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    with UploadRun() as run:
+        run.init('test_upload_pool-%s' % str(uuid.uuid4()), folder=folder_setup)
+        run_id = run.id
+        run.results_dir = temp_dir.name
+        run.launch(upload_workers=4)
+
+    client = simvue.Client()
+    retrieved_dir = tempfile.TemporaryDirectory()
+    client.get_artifacts_as_files(run_id, "output", retrieved_dir.name)
+    assert sorted(file.name for file in pathlib.Path(retrieved_dir.name).iterdir()) == sorted(f"result_{i}.txt" for i in range(20))
+
+    events = [event["message"] for event in client.get_events(run_id)]
+    assert any(event.startswith("Uploaded 20 files") for event in events)
+    assert not any(event.startswith("Failed to upload") for event in events)
+
+class FlakyServerUploadRun(UploadRun):
+    """
+    Run whose server fails to register the first file it is sent, and registers files normally after that.
+    """
+    def _during_simulation(self):
+        save_file = self._simvue.save_file
+        self.registrations = []
+
+        def flaky_save_file(data):
+            self.registrations.append(data["name"])
+            if len(self.registrations) == 1:
+                raise RuntimeError("Internal server error")
+            return save_file(data)
+
+        self._simvue.save_file = flaky_save_file
+        super()._during_simulation()
+
+def test_upload_pool_server_error_retried(folder_setup):
+    """
+    Check that an upload which the server fails to register is retried, without the failure ending the run.
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    with FlakyServerUploadRun() as run:
+        run.init('test_upload_pool_server_error_retried-%s' % str(uuid.uuid4()), folder=folder_setup)
+        run_id = run.id
+        run.results_dir = temp_dir.name
+        run.launch(upload_workers=4)
+        assert not run._aborted
+        assert len(run.registrations) == 21
+
+    client = simvue.Client()
+    assert client.get_run(run_id)["status"] == "completed"
+    retrieved_dir = tempfile.TemporaryDirectory()
+    client.get_artifacts_as_files(run_id, "output", retrieved_dir.name)
+    assert sorted(file.name for file in pathlib.Path(retrieved_dir.name).iterdir()) == sorted(f"result_{i}.txt" for i in range(20))
+
+def test_upload_pool_retried_exceptions():
+    """
+    Check that uploads are retried after connection errors, but not after errors which a retry would not fix.
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    file_path = pathlib.Path(temp_dir.name).joinpath("result.txt")
+    file_path.write_text("Result\n")
+    attempts = []
+
+    def upload_callback(file_path, category, name):
+        attempts.append(name)
+        if name == "flaky" and attempts.count(name) == 1:
+            raise ConnectionError("Connection reset")
+        if name == "invalid":
+            raise ValueError("Invalid name")
+
+    pool = UploadPool(upload_callback, retry_delay=0)
+    failures = pool.upload([(str(file_path), "output", "flaky"), (str(file_path), "output", "invalid")])
+
+    assert attempts.count("flaky") == 2
+    assert attempts.count("invalid") == 1
+    assert [(upload[2], type(e)) for upload, e in failures] == [("invalid", ValueError)]
+    assert pool.files_uploaded == 1
@@ -49,4 +49,57 @@ def test_moose_header_parser(folder_setup):
         assert metadata.get("mesh") == None
         
         
-        
\ No newline at end of file
+        
+class CountingFile:
+    """
+    File which counts the lines read from it, to check that parsing stops early.
+    """
+    def __init__(self, file):
+        self._file = file
+        self.lines_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self._file.close()
+
+    def __iter__(self):
+        for line in self._file:
+            self.lines_read += 1
+            yield line
+
+def counting_open(opened_files):
+    """
+    Replacement for open which records each file opened, so the lines read from it can be counted.
+    """
+    def _open(*args, **kwargs):
+        opened_files.append(CountingFile(open(*args, **kwargs)))
+        return opened_files[-1]
+    return _open
+
+def test_moose_header_parser_bounded():
+    """
+    Check that only the header of the MOOSE log is parsed, however long the log has grown.
+    """
+    header_path = pathlib.Path(__file__).parent.joinpath("example_data", "moose_header.txt")
+    log_path = pathlib.Path(__file__).parent.joinpath("example_data", "moose_log.txt")
+    temp_dir = tempfile.TemporaryDirectory(prefix="moose_test")
+    run = MooseRun(mode="disabled")
+    _, expected = run._moose_header_parser(input_file=str(header_path))
+
+    # Lines after the first time step which contain a colon should not be added as metadata
+    long_log_path = pathlib.Path(temp_dir.name).joinpath("moose_long.txt")
+    long_log_path.write_text(
+        header_path.read_text() + "\n\n" + (log_path.read_text() + "Solver: should not be parsed\n") * 1000
+    )
+    opened_files = []
+    with patch("simvue_integrations.connectors.moose.open", counting_open(opened_files), create=True):
+        _, metadata = run._moose_header_parser(input_file=str(long_log_path))
+
+    assert metadata == expected
+    assert metadata["moose.num_processors"] == "1"
+    assert "moose.solver" not in metadata
+    # Reading stops at the first time step, just after the header
+    assert len(opened_files) == 1
+    assert opened_files[0].lines_read <= len(header_path.read_text().splitlines()) + 3
@@ -86,4 +86,24 @@ def test_moose_input_parser(folder_setup, file_name, expected_metadata, not_expe
         else:
             assert run._dt == None
         
-        
\ No newline at end of file
+        
+
+def test_moose_input_parser_cached():
+    """
+    Check that an input file, and copies of it, are only parsed once per process.
+    """
+    import shutil
+    import tempfile
+    from unittest.mock import patch
+    from simvue_integrations.extras import hit_parser
+
+    temp_dir = tempfile.TemporaryDirectory(prefix="moose_test")
+    example_file = pathlib.Path(__file__).parent.joinpath("example_data", "example_input_4.i")
+    copied_files = [shutil.copy(example_file, pathlib.Path(temp_dir.name).joinpath(f"input_{i}.i")) for i in range(3)]
+
+    with patch.object(hit_parser, "parse_hit", wraps=hit_parser.parse_hit) as parse_hit:
+        results = [hit_parser.parse_hit_file(file) for file in copied_files * 2]
+
+    assert parse_hit.call_count == 1
+    assert all(result == results[0] for result in results)
+    assert results[0]["VectorPostprocessors.temps_line.points"] == "'0 0.5 0.5  1 0.5 0.5  2 0.5 0.5  3 0.5 0.5  4 0.5 0.5  5 0.5 0.5  6 0.5 0.5'"
@@ -65,4 +65,33 @@ def test_moose_log_parser(folder_setup):
     
         
         
-        
\ No newline at end of file
+        
+@patch.object(MooseRun, '_moose_input_parser', lambda *_, **__: None)
+@patch.object(MooseRun, 'add_process', mock_moose_process)
+def test_moose_log_parser_residuals(folder_setup):
+    """
+    Check that the residual of each iteration is uploaded as a metric when residuals are tracked, downsampled per step.
+    """
+    name = 'test_moose_log_parser_residuals-%s' % str(uuid.uuid4())
+    with MooseRun() as run:
+        run.init(name=name, folder=folder_setup)
+        run_id = run.id
+        run.launch(
+            moose_application_path=pathlib.Path(__file__),
+            moose_file_path=pathlib.Path(__file__),
+            track_residuals=True,
+            residual_points_per_step=10,
+        )
+    client = simvue.Client()
+    # Each kind of residual is indexed by its own iterations, so retrieve them separately
+    nonlinear_residuals = client.get_metric_values(metric_names=["nonlinear_residual"], run_ids=[run_id,], output_format="dict", xaxis="step")["nonlinear_residual"]
+    linear_residuals = client.get_metric_values(metric_names=["linear_residual"], run_ids=[run_id,], output_format="dict", xaxis="step")["linear_residual"]
+
+    # Fewer nonlinear iterations than the limit per step, so all are uploaded
+    assert list(nonlinear_residuals.values()) == [1.568125e+02, 1.312554e-03, 1.159607e-08, 1.622758e+01, 1.607054e-04, 1.495259e-09]
+
+    # 112 and 107 linear iterations, downsampled to 10 per step including the first and last of each step
+    assert len(linear_residuals) == 20
+    assert list(linear_residuals.values())[0] == 1.568125e+02
+    assert list(linear_residuals.values())[9] == 1.159607e-08
+    assert max(step for (step, _) in linear_residuals.keys()) == 218
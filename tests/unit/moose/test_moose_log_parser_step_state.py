@@ -0,0 +1,153 @@
+from simvue_integrations.connectors.moose import MooseRun
+from simvue_integrations.extras.moose_log import LOG_PATTERNS, MooseStepState
+from simvue_integrations.extras.ring_buffer import RingBuffer
+import os
+import pathlib
+import pytest
+import re
+import time
+
+class ReferenceState:
+    """
+    Counters and callback for each line of the MOOSE log, as the MOOSE log parser used to handle them.
+    Only whole number times are parsed, as in the example log; fractional times are checked separately.
+    """
+    def __init__(self):
+        self.step_num = 0
+        self.step_time = 0
+        self.nonlinear = 0
+        self.linear = 0
+        self.records = []
+
+    def callback(self, log_data, _):
+        if any(
+            key in ("time_step", "converged", "non_converged", "terminated")
+            for key in log_data.keys()
+        ):
+            source, message = next(iter(log_data.items()))
+        if "time_step" in log_data.keys():
+            step_time = re.search(
+                r"Time Step (\d+), time = (\d+), dt = .*", log_data["time_step"]
+            )
+            if step_time:
+                self.step_num = int(step_time.group(1))
+                self.step_time = float(step_time.group(2))
+        elif "converged" in log_data.keys():
+            self.records.append((self.step_num, self.step_time, self.nonlinear, self.linear))
+            self.linear = 0
+            self.nonlinear = 0
+        elif "nonlinear" in log_data.keys():
+            self.nonlinear += 1
+        elif "linear" in log_data.keys():
+            self.linear += 1
+
+def matched_lines(file_content):
+    """
+    Label each line of interest in the log, as the file monitor would.
+    """
+    _lines = []
+    for line in file_content.split("\n"):
+        for label, pattern in LOG_PATTERNS:
+            if isinstance(pattern, re.Pattern):
+                if _results := pattern.findall(line):
+                    _lines.append({label: _results[0]})
+                    break
+            elif pattern in line:
+                _lines.append({label: pattern})
+                break
+    return _lines
+
+def run_callback(callback, lines):
+    start = time.perf_counter()
+    for line in lines:
+        callback(line, {})
+    return time.perf_counter() - start
+
+def step_state_run(records):
+    """
+    Create a run which parses MOOSE log lines, collecting its step records.
+    """
+    run = MooseRun(mode="disabled")
+    run._step_state = MooseStepState()
+    # Events and metrics are not under test here, so only the step records are collected
+    run.log_event = lambda *_, **__: True
+    run.update_metadata = lambda *_, **__: None
+    run.update_tags = lambda *_, **__: None
+    run._log_step_record = records.append
+    return run
+
+def test_moose_log_parser_step_state():
+    """
+    Check the step state machine produces the same step records as the original callback,
+    and keeps counting iterations and holding only the most recent residuals over a long step.
+    """
+    log_path = pathlib.Path(__file__).parent.joinpath("example_data", "moose_log.txt")
+    lines = matched_lines(log_path.read_text()) * 10
+
+    records = []
+    run = step_state_run(records)
+    run_callback(run._per_event_callback, lines)
+    reference = ReferenceState()
+    run_callback(reference.callback, lines)
+
+    assert records
+    assert [
+        (record.step, record.time, record.nonlinear_iterations, record.linear_iterations)
+        for record in records
+    ] == reference.records
+
+    # A single step with many linear iterations
+    linear_line = {"linear": "1.568125e+02"}
+    run_callback(run._per_event_callback, [linear_line] * 10_000)
+    run_callback(run._per_event_callback, [linear_line] * 20_000)
+    assert run._step_state.linear == 30_000
+
+    # Tracking residuals holds only the most recent residuals
+    run.track_residuals = True
+    run._residual_buffers = {"nonlinear": RingBuffer(4096), "linear": RingBuffer(4096)}
+    run_callback(run._per_event_callback, [linear_line] * 10_000)
+    assert len(run._residual_buffers["linear"]) == 4096
+
+def test_moose_log_parser_fractional_time():
+    """
+    Check that fractional and exponent times and time steps are parsed into the step record.
+    """
+    lines = [
+        {"time_step": "Time Step 3, time = 2.5e-01, dt = 0.125"},
+        {"nonlinear": "5.123e-01"},
+        {"linear": "1.568125e+02"},
+        {"converged": " Solve Converged!"},
+    ]
+    records = []
+    run = step_state_run(records)
+    run_callback(run._per_event_callback, lines)
+
+    assert [(record.step, record.time, record.dt) for record in records] == [(3, 0.25, 0.125)]
+    assert (records[0].nonlinear_iterations, records[0].linear_iterations) == (1, 1)
+
+@pytest.mark.skipif(not os.environ.get("SIMVUE_INTEGRATIONS_BENCHMARKS"), reason="Set SIMVUE_INTEGRATIONS_BENCHMARKS=1 to run benchmarks")
+def test_moose_log_parser_benchmark():
+    """
+    Compare the time taken by the step state machine and by the original callback on the example log repeated 1000x,
+    and check that the time taken per line does not grow with the number of iteration lines in a step.
+    """
+    log_path = pathlib.Path(__file__).parent.joinpath("example_data", "moose_log.txt")
+    lines = matched_lines(log_path.read_text()) * 1000
+
+    records = []
+    run = step_state_run(records)
+    parser_time = run_callback(run._per_event_callback, lines)
+    reference = ReferenceState()
+    reference_time = run_callback(reference.callback, lines)
+    print(f"Step state machine: {parser_time:.3f}s, original callback: {reference_time:.3f}s")
+
+    assert [
+        (record.step, record.time, record.nonlinear_iterations, record.linear_iterations)
+        for record in records
+    ] == reference.records
+
+    linear_line = {"linear": "1.568125e+02"}
+    short_step_time = run_callback(run._per_event_callback, [linear_line] * 100_000) / 100_000
+    long_step_time = run_callback(run._per_event_callback, [linear_line] * 2_000_000) / 2_000_000
+    print(f"Per line: {short_step_time * 1e9:.0f}ns for 1e5 lines, {long_step_time * 1e9:.0f}ns for 2e6 lines")
+    assert run._step_state.linear == 2_100_000
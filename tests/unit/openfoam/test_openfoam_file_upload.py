@@ -1,10 +1,12 @@
 from simvue_integrations.connectors.openfoam import OpenfoamRun
 import simvue
+import pytest
 import tempfile
 from unittest.mock import patch
 import uuid
 import pathlib
 import filecmp
+import shutil
 import zipfile
 import time
 import threading
@@ -48,11 +50,12 @@ def test_openfoam_file_upload(folder_setup):
         assert not (comparison.diff_files or comparison.left_only or comparison.right_only)
     
     
+@pytest.mark.parametrize("zip_compression", ("stored", "deflated", "bzip2", "lzma"))
 @patch.object(OpenfoamRun, 'add_process', mock_openfoam_process)
-def test_openfoam_file_upload_zipped(folder_setup):    
+def test_openfoam_file_upload_zipped(folder_setup, zip_compression):    
     """
     Check that all files from case directory are uploaded to artifacts,
-    split into two archives - one for inputs, one for results.
+    split into two archives - one for inputs, one for results, using each compression method.
     """
     name = 'test_openfoam_file_upload-%s' % str(uuid.uuid4())
     temp_dir = tempfile.TemporaryDirectory(prefix="openfoam_test")
@@ -62,7 +65,7 @@ def test_openfoam_file_upload_zipped(folder_setup):
         run.launch(
             openfoam_case_dir = pathlib.Path(__file__).parent.joinpath("example_data", "openfoam_case"),
             upload_as_zip=True,
-            
+            zip_compression=zip_compression,
         )
            
     client = simvue.Client()
@@ -76,6 +79,8 @@ def test_openfoam_file_upload_zipped(folder_setup):
     for file in ["inputs", "results"]:
         file_path = pathlib.Path(temp_dir.name).joinpath(f"{file}.zip")
         assert file_path.is_file()
+        # Check zip file was not left in the case directory
+        assert not example_dir_path.joinpath(f"{file}.zip").exists()
         # Extract files from zip file to directory to check contents
         with zipfile.ZipFile(file_path) as zip_file:
             zip_file.extractall(pathlib.Path(temp_dir.name).joinpath(file))
@@ -149,3 +154,114 @@ def test_openfoam_file_upload_after_abort(folder_setup):
         comparison = filecmp.dircmp(example_path, temp_subdir_path)
         # Check all files present and identical
         assert not (comparison.diff_files or comparison.left_only or comparison.right_only)
+
+
+def mock_openfoam_process_writing_results(self, *_, **__):
+    """
+    Mock OpenFOAM process which writes a new time directory every few seconds.
+    """
+    def write_results():
+        example_dir_path = pathlib.Path(__file__).parent.joinpath("example_data", "openfoam_case")
+        for time_dir in ("0.003", "0.006"):
+            time.sleep(3)
+            shutil.copytree(example_dir_path.joinpath("0.003"), pathlib.Path(self.openfoam_case_dir).joinpath(time_dir))
+        time.sleep(3)
+        self._trigger.set()
+    thread = threading.Thread(target=write_results)
+    thread.start()
+
+@patch.object(OpenfoamRun, 'add_process', mock_openfoam_process_writing_results)
+def test_openfoam_file_upload_during_simulation(folder_setup):
+    """
+    Check that completed time directories are uploaded while the simulation is running,
+    and only the remaining time directory is uploaded once it finishes.
+    """
+    name = 'test_openfoam_file_upload_during_simulation-%s' % str(uuid.uuid4())
+    case_dir = tempfile.TemporaryDirectory(prefix="openfoam_test")
+    example_dir_path = pathlib.Path(__file__).parent.joinpath("example_data", "openfoam_case")
+    for dir_name in ("system", "constant", "0"):
+        shutil.copytree(example_dir_path.joinpath(dir_name), pathlib.Path(case_dir.name).joinpath(dir_name))
+
+    with OpenfoamRun() as run:
+        run.init(name=name, folder=folder_setup)
+        run_id = run.id
+        run.launch(
+            openfoam_case_dir = case_dir.name,
+            upload_as_zip=True,
+            upload_during_simulation=True,
+        )
+
+    client = simvue.Client()
+    temp_dir = tempfile.TemporaryDirectory(prefix="openfoam_test")
+    temp_dir_path = pathlib.Path(temp_dir.name)
+    client.get_artifacts_as_files(run_id, "output", temp_dir.name)
+
+    # Directories 0 and 0.003 were complete once the next time directory was written, so are uploaded separately
+    expected_contents = {
+        "results_0.zip": ["0"],
+        "results_0.003.zip": ["0.003"],
+        "results.zip": ["0.006"],
+    }
+    assert sorted(file.name for file in temp_dir_path.iterdir()) == sorted(expected_contents)
+    for file_name, dir_names in expected_contents.items():
+        with zipfile.ZipFile(temp_dir_path.joinpath(file_name)) as zip_file:
+            assert sorted({pathlib.Path(name).parts[0] for name in zip_file.namelist()}) == dir_names
+
+
+def test_openfoam_time_directory_upload_failure():
+    """
+    Check that a time directory which fails to upload during the simulation is reported as an event,
+    without stopping later time directories being uploaded, and is left to be uploaded once the simulation finishes.
+    """
+    case_dir = tempfile.TemporaryDirectory(prefix="openfoam_test")
+    for dir_name in ("constant", "0", "0.1", "0.2", "0.3"):
+        pathlib.Path(case_dir.name).joinpath(dir_name).mkdir()
+
+    uploads = []
+    def mock_save_directory(dir_names, *_):
+        uploads.extend(dir_names)
+        if dir_names == ["0.1"]:
+            raise RuntimeError("Connection reset")
+
+    run = OpenfoamRun(mode="disabled")
+    run.openfoam_case_dir = case_dir.name
+    run._uploaded_time_dirs = set()
+    run._trigger = threading.Event()
+    run._time_dir_poll_interval = 0.01
+    events = []
+    run.log_event = lambda message, **_: events.append(message)
+    run._save_directory = mock_save_directory
+
+    watcher = threading.Thread(target=run._watch_time_directories)
+    watcher.start()
+    time.sleep(0.5)
+    run._trigger.set()
+    watcher.join()
+
+    assert uploads == ["0", "0.1", "0.2"]
+    assert run._uploaded_time_dirs == {"0", "0.2"}
+    assert events == ["Failed to upload time directory 0.1: Connection reset"]
+
+
+@patch.object(OpenfoamRun, 'add_process', mock_openfoam_process)
+def test_openfoam_file_upload_cached(folder_setup):
+    """
+    Check that a second run using the same file cache finds all of its files already stored.
+    """
+    cache_dir = tempfile.TemporaryDirectory(prefix="openfoam_test")
+    cache_path = pathlib.Path(cache_dir.name).joinpath("file_cache.json")
+    run_ids = []
+    for i in range(2):
+        with OpenfoamRun() as run:
+            run.init(name='test_openfoam_file_upload_cached-%d-%s' % (i, str(uuid.uuid4())), folder=folder_setup)
+            run_ids.append(run.id)
+            run.launch(
+                openfoam_case_dir = pathlib.Path(__file__).parent.joinpath("example_data", "openfoam_case"),
+                upload_as_zip=False,
+                file_cache_path=cache_path,
+            )
+
+    assert cache_path.is_file()
+    client = simvue.Client()
+    events = [event["message"] for event in client.get_events(run_ids[1])]
+    assert "File cache: 10 files already stored, 0 new files uploaded." in events
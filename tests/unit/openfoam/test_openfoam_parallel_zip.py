@@ -0,0 +1,33 @@
+from simvue_integrations.extras import parallel_zip
+from simvue_integrations.extras.parallel_zip import COMPRESSION_METHODS, write_zip
+import pathlib
+import pytest
+import tempfile
+import zipfile
+
+CASE_DIR = pathlib.Path(__file__).parent.joinpath("example_data", "openfoam_case")
+
+@pytest.mark.parametrize("parallel", (True, False), ids=("parallel", "zipfile_write"))
+@pytest.mark.parametrize("compression", ("stored", "deflated", "bzip2", "lzma"))
+def test_openfoam_parallel_zip(monkeypatch, compression, parallel):
+    """
+    Check that archives written with write_zip can be read back and verified by zipfile, both when members are
+    compressed in parallel and when falling back to ZipFile.write() because zipfile's private attributes are missing.
+    """
+    if not parallel:
+        monkeypatch.setattr(parallel_zip, "_ZIPFILE_ATTRIBUTES", parallel_zip._ZIPFILE_ATTRIBUTES + ("_missing_attribute",))
+
+    members = [
+        (file_path, str(file_path.relative_to(CASE_DIR)))
+        for file_path in sorted(CASE_DIR.rglob("*")) if file_path.is_file()
+    ]
+    temp_dir = tempfile.TemporaryDirectory()
+    out_zip = pathlib.Path(temp_dir.name).joinpath("results.zip")
+    write_zip(out_zip, members, compression=compression, max_workers=4)
+
+    with zipfile.ZipFile(out_zip) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == [arcname for _, arcname in members]
+        for file_path, arcname in members:
+            assert zip_file.getinfo(arcname).compress_type == COMPRESSION_METHODS[compression]
+            assert zip_file.read(arcname) == file_path.read_bytes()
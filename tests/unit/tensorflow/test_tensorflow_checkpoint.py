@@ -0,0 +1,141 @@
+from tensorflow import keras
+import uuid
+import simvue
+import simvue_integrations.connectors.tensorflow as sv_tf
+from simvue_integrations.extras.checkpoint_uploader import CheckpointUploader, rebuild_chunked_file
+import tempfile
+import os
+import pathlib
+
+def test_checkpoint_uploader_unchanged(folder_setup):
+    """
+    Check that a snapshot of the file is uploaded, and that uploads are skipped when the contents are unchanged.
+    """
+    temp_dir = tempfile.TemporaryDirectory(prefix="tensorflow_test")
+    checkpoint = pathlib.Path(temp_dir.name).joinpath("checkpoint.model.keras")
+    uploader = CheckpointUploader()
+    runs = []
+    for i, contents in enumerate((b"epoch_1", b"epoch_1", b"epoch_3")):
+        run = simvue.Run()
+        run.init(name=f"test_checkpoint_uploader_{i}-{uuid.uuid4()}", folder=folder_setup)
+        runs.append(run)
+        checkpoint.write_bytes(contents)
+        uploader.upload(run, checkpoint)
+        # Rewriting the file while it is uploaded does not change the upload
+        checkpoint.write_bytes(b"rewritten")
+    uploader.shutdown()
+    for run in runs:
+        run.close()
+
+    client = simvue.Client()
+    for run, expected in zip(runs, (b"epoch_1", None, b"epoch_3")):
+        download_dir = tempfile.TemporaryDirectory(prefix="tensorflow_test")
+        client.get_artifacts_as_files(run.id, "output", download_dir.name)
+        downloaded = pathlib.Path(download_dir.name).joinpath("checkpoint.model.keras")
+        if expected:
+            assert downloaded.read_bytes() == expected
+        else:
+            assert not downloaded.exists()
+
+def test_fit_checkpoint_upload(folder_setup, tensorflow_example_data):
+    """
+    Check that the checkpoint saved at the end of each epoch is uploaded to the epoch run in the background.
+    """
+    run_name = 'test_tensorflow_fit_checkpoint_upload-%s' % str(uuid.uuid4())
+    temp_dir = tempfile.TemporaryDirectory(prefix="tensorflow_test")
+    checkpoint_filepath = pathlib.Path(temp_dir.name).joinpath("checkpoint.model.keras")
+
+    tensorvue = sv_tf.TensorVue(
+        run_name=run_name,
+        run_folder=folder_setup,
+        model_checkpoint_filepath=str(checkpoint_filepath),
+        model_final_filepath=str(pathlib.Path(temp_dir.name).joinpath("final.keras")),
+    )
+    checkpoint_callback = keras.callbacks.ModelCheckpoint(filepath=str(checkpoint_filepath))
+
+    tensorflow_example_data.model.fit(
+        tensorflow_example_data.img_train[:1000],
+        tensorflow_example_data.label_train[:1000],
+        epochs=2,
+        validation_split=0.2,
+        callbacks=[checkpoint_callback, tensorvue,]
+    )
+    client = simvue.Client()
+
+    epoch_runs = client.get_runs(filters=[f'name contains {run_name}_epoch'])
+    assert len(epoch_runs) == 2
+    for epoch_run in epoch_runs:
+        assert epoch_run["status"] == "completed"
+        download_dir = tempfile.TemporaryDirectory(prefix="tensorflow_test")
+        client.get_artifacts_as_files(epoch_run["id"], "output", download_dir.name)
+        assert pathlib.Path(download_dir.name).joinpath("checkpoint.model.keras").exists()
+
+    simulation_run = client.get_runs(filters=[f'name contains {run_name}_simulation'])[0]
+    download_dir = tempfile.TemporaryDirectory(prefix="tensorflow_test")
+    client.get_artifacts_as_files(simulation_run["id"], "output", download_dir.name)
+    assert pathlib.Path(download_dir.name).joinpath("final_model.keras").exists()
+
+def test_checkpoint_uploader_chunked(folder_setup):
+    """
+    Check that only chunks which changed are uploaded, and that the file can be rebuilt from its manifest.
+    """
+    temp_dir = tempfile.TemporaryDirectory(prefix="tensorflow_test")
+    checkpoint = pathlib.Path(temp_dir.name).joinpath("checkpoint.model.keras")
+    contents = bytearray(os.urandom(8 * 1024 * 1024))
+    uploader = CheckpointUploader(chunk_size=256 * 1024)
+    runs = []
+    for i in range(2):
+        run = simvue.Run()
+        run.init(name=f"test_checkpoint_uploader_chunked_{i}-{uuid.uuid4()}", folder=folder_setup)
+        runs.append(run)
+        if i:
+            contents[4 * 1024 * 1024:4 * 1024 * 1024 + 100] = os.urandom(100)
+        checkpoint.write_bytes(contents)
+        uploader.upload(run, checkpoint)
+    uploader.shutdown()
+    for run in runs:
+        run.close()
+
+    client = simvue.Client()
+    manifest = client.get_artifact(runs[1].id, "checkpoint.model.keras.manifest")
+    assert sum(chunk["size"] for chunk in manifest["chunks"]) == len(contents)
+    # Most chunks are unchanged, so are only stored in the first run
+    chunk_runs = [chunk["run"] for chunk in manifest["chunks"]]
+    assert 0 < chunk_runs.count(runs[1].id) < chunk_runs.count(runs[0].id)
+
+    rebuilt = rebuild_chunked_file(runs[1].id, "checkpoint.model.keras", pathlib.Path(temp_dir.name).joinpath("rebuilt.keras"), client)
+    assert rebuilt.read_bytes() == contents
+
+class FlakyRun:
+    """
+    Run which fails to save the first file it is sent, without a server.
+    """
+    id = None
+
+    def __init__(self):
+        self.saved = []
+        self.attempts = 0
+
+    def save_file(self, file_path, category, name):
+        self.attempts += 1
+        if self.attempts == 1:
+            return False
+        self.saved.append(pathlib.Path(file_path).read_bytes())
+        return True
+
+def test_checkpoint_uploader_retry_failed():
+    """
+    Check that an unchanged file is uploaded again if its last upload failed, and skipped once it has been uploaded.
+    """
+    temp_dir = tempfile.TemporaryDirectory(prefix="tensorflow_test")
+    checkpoint = pathlib.Path(temp_dir.name).joinpath("checkpoint.model.keras")
+    checkpoint.write_bytes(b"epoch_1")
+    run = FlakyRun()
+    uploader = CheckpointUploader()
+    for _ in range(3):
+        if future := uploader.upload(run, checkpoint):
+            future.result()
+    uploader.shutdown()
+
+    assert run.attempts == 2
+    assert run.saved == [b"epoch_1"]
@@ -0,0 +1,63 @@
+import tensorflow as tf
+from tensorflow import keras
+import uuid
+import time
+import simvue
+import simvue_integrations.connectors.tensorflow as sv_tf
+from simvue_integrations.extras.dispatch_queue import DispatchQueue
+import pytest
+
+@pytest.mark.parametrize("policy", ("block", "drop", "sample"))
+def test_dispatch_queue_policies(policy):
+    """
+    Check that calls are made in order, and only dropped when the queue is full and the policy allows it.
+    """
+    calls = []
+    def slow_call(i):
+        time.sleep(0.0001)
+        calls.append(i)
+
+    queue = DispatchQueue(max_size=100, policy=policy)
+    for i in range(1000):
+        queue.put(slow_call, i)
+    # Calls which must be made are never dropped
+    queue.put_required(calls.append, "end")
+    queue.stop()
+
+    assert calls[-1] == "end"
+    assert calls[:-1] == sorted(calls[:-1])
+    if policy == "block":
+        assert len(calls) == 1001
+        assert queue.calls_dropped == 0
+    else:
+        assert len(calls) + queue.calls_dropped == 1001
+        assert queue.calls_dropped > 0
+
+def test_fit_dispatch_queue(folder_setup, tensorflow_example_data):
+    """
+    Check that every batch metric is logged when the queue is much smaller than the number of batches.
+    """
+    run_name = 'test_tensorflow_fit_dispatch_queue-%s' % str(uuid.uuid4())
+
+    tensorvue = sv_tf.TensorVue(
+        run_name=run_name,
+        run_folder=folder_setup,
+        dispatch_queue_size=5,
+        dispatch_policy="block",
+    )
+
+    # Fit the model, including the tensorvue callback:
+    tensorflow_example_data.model.fit(
+        tensorflow_example_data.img_train[:1000],
+        tensorflow_example_data.label_train[:1000],
+        epochs=2,
+        batch_size=10,
+        callbacks=[tensorvue,]
+    )
+
+    client = simvue.Client()
+    epoch_runs = client.get_runs(filters=[f'name contains {run_name}_epoch'], metrics=True)
+    assert len(epoch_runs) == 2
+    for epoch_run in epoch_runs:
+        assert epoch_run["status"] == "completed"
+        assert epoch_run["metrics"]["accuracy"]["count"] == 100
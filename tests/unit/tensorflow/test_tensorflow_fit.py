@@ -123,4 +123,104 @@ def test_fit_earlystopping(folder_setup, tensorflow_example_data):
     
     
     
-    
\ No newline at end of file
+    
+
+def test_fit_earlystopping_epoch_runs(folder_setup, tensorflow_example_data):
+    run_name = 'test_tensorflow_fit_earlystopping_epoch_runs-%s' % str(uuid.uuid4())
+
+    tensorvue = sv_tf.TensorVue(
+        run_name=run_name,
+        run_folder=folder_setup,
+        evaluation_parameter="accuracy",
+        evaluation_condition=">",
+        evaluation_target=0.8
+    )
+
+    # Fit the model, including the tensorvue callback:
+    tensorflow_example_data.model.fit(
+        tensorflow_example_data.img_train[:1000],
+        tensorflow_example_data.label_train[:1000],
+        epochs=10,
+        validation_split=0.2,
+        callbacks=[tensorvue,]
+    )
+    client = simvue.Client()
+    run_id = client.get_run_id_from_name(f"{run_name}_simulation")
+    accuracy_metric = client.get_metric_values(run_ids=[run_id], metric_names=["accuracy"], xaxis="step", output_format="dataframe")
+    num_epochs = len(accuracy_metric['accuracy'].tolist())
+    assert num_epochs < 10
+
+    # Check there is one completed run for each epoch trained, and the run prepared for the next epoch was removed
+    epoch_runs = client.get_runs(filters=[f'name contains {run_name}_epoch'])
+    assert len(epoch_runs) == num_epochs
+    assert all(epoch_run["status"] == "completed" for epoch_run in epoch_runs)
+
+
+def test_fit_batch_log_interval(folder_setup, tensorflow_example_data):
+    run_name = 'test_tensorflow_fit_batch_log_interval-%s' % str(uuid.uuid4())
+
+    tensorvue = sv_tf.TensorVue(
+        run_name=run_name,
+        run_folder=folder_setup,
+        batch_log_interval=10,
+        batch_aggregation="max",
+    )
+
+    # 800 training samples in batches of 32 gives 25 batches per epoch
+    tensorflow_example_data.model.fit(
+        tensorflow_example_data.img_train[:1000],
+        tensorflow_example_data.label_train[:1000],
+        epochs=2,
+        validation_split=0.2,
+        callbacks=[tensorvue,]
+    )
+    client = simvue.Client()
+
+    # Epoch metrics are still logged for every epoch
+    simulation_run = client.get_runs(filters=[f'name contains {run_name}_simulation'], metrics=True)[0]
+    for metric_name in ('accuracy','loss','val_accuracy','val_loss'):
+        assert simulation_run["metrics"][metric_name]["count"] == 2
+
+    # Batch metrics are logged after batches 10, 20 and the partial interval ending at batch 25
+    epoch_runs = client.get_runs(filters=[f'name contains {run_name}_epoch'])
+    for epoch_run in epoch_runs:
+        accuracy = client.get_metric_values(run_ids=[epoch_run["id"]], metric_names=["accuracy"], xaxis="step", output_format="dict")["accuracy"]
+        assert [step for step, _ in accuracy] == [9, 19, 24]
+
+def test_fit_metric_selection(folder_setup, tensorflow_example_data):
+    run_name = 'test_tensorflow_fit_metric_selection-%s' % str(uuid.uuid4())
+
+    # Track additional metrics, which should be discovered from the logs without being named in TensorVue
+    tensorflow_example_data.model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.01),
+        loss=keras.losses.SparseCategoricalCrossentropy(from_logits=True),
+        metrics=['accuracy', keras.metrics.SparseTopKCategoricalAccuracy(k=3, name='top_3_accuracy')]
+    )
+
+    tensorvue = sv_tf.TensorVue(
+        run_name=run_name,
+        run_folder=folder_setup,
+        metrics_include=['*accuracy', '*loss'],
+        metrics_exclude=['val_top_*'],
+    )
+
+    tensorflow_example_data.model.fit(
+        tensorflow_example_data.img_train[:1000],
+        tensorflow_example_data.label_train[:1000],
+        epochs=2,
+        validation_split=0.2,
+        callbacks=[tensorvue,]
+    )
+    client = simvue.Client()
+
+    simulation_run = client.get_runs(filters=[f'name contains {run_name}_simulation'], metrics=True)[0]
+    for metric_name in ('accuracy', 'loss', 'top_3_accuracy', 'val_accuracy', 'val_loss'):
+        assert simulation_run["metrics"][metric_name]["count"] == 2
+    assert not simulation_run["metrics"].get("val_top_3_accuracy")
+
+    epoch_runs = client.get_runs(filters=[f'name contains {run_name}_epoch'], metrics=True, metadata=True)
+    for epoch_run in epoch_runs:
+        assert epoch_run["metrics"].get("top_3_accuracy")
+        assert not epoch_run["metrics"].get("val_top_3_accuracy")
+        assert epoch_run["metadata"].get("final_top_3_accuracy")
+        assert not epoch_run["metadata"].get("final_val_top_3_accuracy")
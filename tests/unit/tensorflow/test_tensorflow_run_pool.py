@@ -0,0 +1,65 @@
+import concurrent.futures
+import pytest
+import threading
+from simvue_integrations.extras.run_pool import RunPool
+
+class MockRun:
+    """
+    Run which records whether it was started and closed, without a server.
+    """
+    def __init__(self, index, start):
+        self.id = f"run_{index}"
+        self.started = start
+        self.closed = False
+
+    def reconnect(self, run_id):
+        self.started = True
+
+    def close(self):
+        self.closed = True
+
+def test_run_pool_close_does_not_block_prepare():
+    """
+    Check that runs waiting on slow uploads before they are closed do not stop the next runs from being prepared.
+    """
+    pool = RunPool(MockRun)
+    uploads = []
+    runs = []
+    for index in range(3):
+        runs.append(pool.get(index))
+        uploads.append(concurrent.futures.Future())
+        pool.release(runs[-1], wait_for=[uploads[-1]])
+
+    # Every released run is still waiting for its upload, but the next run can be fetched
+    thread = threading.Thread(target=lambda: runs.append(pool.get(3, prepare_next=False)))
+    thread.start()
+    thread.join(timeout=5)
+    fetched_while_uploading = not thread.is_alive()
+    closed_while_uploading = any(run.closed for run in runs)
+
+    for upload in uploads:
+        upload.set_result(None)
+    thread.join()
+    assert fetched_while_uploading
+    assert not closed_while_uploading
+    assert runs[3].started
+    pool.release(runs[3])
+    pool.shutdown()
+    assert all(run.closed for run in runs)
+
+def test_run_pool_shutdown_after_failed_prepare():
+    """
+    Check that released runs are still closed when preparing the next run failed, and the failure is raised afterwards.
+    """
+    def create_run(index, start):
+        if not start:
+            raise RuntimeError("Server unavailable")
+        return MockRun(index, start)
+
+    pool = RunPool(create_run)
+    run = pool.get(0)
+    pool.release(run)
+    with pytest.raises(RuntimeError, match="Server unavailable"):
+        pool.shutdown()
+    assert run.closed
+    assert pool._prepare_executor._shutdown and pool._close_executor._shutdown
@@ -0,0 +1,100 @@
+import json
+import pathlib
+import subprocess
+import sys
+import uuid
+import simvue
+import simvue_integrations.connectors.tensorflow as sv_tf
+from simvue_integrations.extras import upload_memo
+from simvue_integrations.extras.upload_memo import UploadMemo
+from unittest.mock import patch
+
+def test_optimisation_trial_uploads_once(folder_setup, tensorflow_example_data):
+    """
+    Check that when training and evaluation are tracked in the same trial run, the script and model config are only
+    uploaded to it once, and that the model config can still be retrieved as an object.
+    """
+    run_name = 'test_tensorflow_upload_memo-%s' % str(uuid.uuid4())
+    trial_run = simvue.Run()
+    trial_run.init(name=f"{run_name}_0", folder=folder_setup)
+
+    tensorvue = sv_tf.TensorVue(
+        optimisation_framework=True,
+        simulation_run=trial_run,
+        evaluation_run=trial_run,
+        create_epoch_runs=False,
+        script_filepath=__file__,
+    )
+
+    with patch.object(upload_memo, "file_registration", side_effect=upload_memo.file_registration) as registration:
+        for _ in range(2):
+            tensorflow_example_data.model.fit(
+                tensorflow_example_data.img_train[:1000],
+                tensorflow_example_data.label_train[:1000],
+                epochs=1,
+                callbacks=[tensorvue,]
+            )
+            tensorflow_example_data.model.evaluate(
+                tensorflow_example_data.img_test[:1000],
+                tensorflow_example_data.label_test[:1000],
+                callbacks=[tensorvue,]
+            )
+    trial_run.close()
+
+    uploaded = [call.kwargs.get("name") for call in registration.call_args_list]
+    assert uploaded.count("model_config") == 1
+    assert uploaded.count("test_tensorflow_upload_memo.py") == 1
+
+    client = simvue.Client()
+    model_config = client.get_artifact(trial_run.id, "model_config")
+    assert model_config == json.loads(json.dumps(tensorflow_example_data.model.get_config()))
+
+def test_model_config_serialised_once(folder_setup):
+    """
+    Check that a config saved from the same model to several runs is only retrieved and serialised once, and saved
+    once to each run, and that a new model with the same config shares its payload.
+    """
+    class Model:
+        def __init__(self):
+            self.config_calls = 0
+
+        def get_config(self):
+            self.config_calls += 1
+            return {"layers": [{"class_name": "Dense", "units": 10}]}
+
+    memo = UploadMemo()
+    model = Model()
+    run_name = 'test_model_config_serialised_once-%s' % str(uuid.uuid4())
+    runs = [simvue.Run() for _ in range(2)]
+    for i, run in enumerate(runs):
+        run.init(name=f"{run_name}_{i}", folder=folder_setup)
+
+    with patch.object(upload_memo.json, "dumps", side_effect=json.dumps) as dumps, \
+            patch.object(upload_memo, "file_registration", side_effect=upload_memo.file_registration) as registration:
+        for run in runs:
+            for _ in range(3):
+                assert memo.save_object(run, model.get_config, category="input", name="model_config", source=model)
+        assert memo.save_object(runs[0], Model().get_config, category="input", name="model_config", source=Model())
+    for run in runs:
+        run.close()
+
+    assert model.config_calls == 1
+    assert dumps.call_count == 2
+    assert registration.call_count == 2
+    assert len(memo._payload_paths) == 1
+    client = simvue.Client()
+    for run in runs:
+        assert client.get_artifact(run.id, "model_config") == model.get_config()
+
+def test_upload_memo_payloads_removed_at_exit():
+    """
+    Check that the payload files written by the memo are removed when the process exits.
+    """
+    script = (
+        "from simvue_integrations.extras.upload_memo import UploadMemo\n"
+        "_, path = UploadMemo()._payload_path({'layers': []})\n"
+        "print(path.parent)\n"
+    )
+    payload_directory = pathlib.Path(subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+    assert payload_directory.name.startswith("simvue_payloads_")
+    assert not payload_directory.exists()